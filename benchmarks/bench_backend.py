@@ -0,0 +1,77 @@
+"""compile and submit-validation time of the installed pydantic backend
+
+run it once per pydantic version to compare v1 and v2, e.g. with a v2 venv:
+
+    python benchmarks/bench_backend.py
+    /path/to/v2/bin/python benchmarks/bench_backend.py
+
+compile: `compile_model` for each model in `models.SHAPES`, the first call
+(including the type caches) and the median of --repeat warm calls.
+validate: decoding and validating the submitted edit form of
+`models.edit_instance(n)`, see bench_decode.py.
+
+run: python benchmarks/bench_backend.py [--entries 1000] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+import warnings
+
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pydantic
+
+from pydform.backend import validate_model
+from pydform.plan import compile_model
+from pydform.submission import decode_body
+
+from bench_decode import CONTENT_TYPE, submitted_items
+from models import SHAPES, edit_instance
+
+
+def elapsed_ms(fn):
+  start = time.perf_counter()
+  fn()
+  return (time.perf_counter() - start) * 1000
+
+
+def main(entries, repeat):
+  logging.disable(logging.CRITICAL)
+  warnings.simplefilter("ignore")
+
+  print("pydantic %s" % pydantic.VERSION)
+  print("%-16s %12s %12s" % ("compile", "first ms", "warm ms"))
+
+  for name, build in SHAPES.items():
+    model = build()
+    first = elapsed_ms(lambda: compile_model(model))
+    warm = statistics.median([elapsed_ms(lambda: compile_model(model)) for _ in range(repeat)])
+    print("%-16s %12.2f %12.2f" % (name, first, warm))
+
+  print("%-16s %12s %12s" % ("validate", "decode ms", "validate ms"))
+
+  for n in entries:
+    instance = edit_instance(n)
+    model = instance.__class__
+    body = urlencode(submitted_items(instance)).encode("utf-8")
+
+    data = decode_body(body, CONTENT_TYPE)
+    decode = statistics.median([elapsed_ms(lambda: decode_body(body, CONTENT_TYPE)) for _ in range(repeat)])
+    validate = statistics.median([elapsed_ms(lambda: validate_model(model, data)) for _ in range(repeat)])
+
+    assert validate_model(model, data) == instance, "decoded model differs"
+    print("%-16s %12.2f %12.2f" % ("edit-%d" % n, decode, validate))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000])
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+
+  main(args.entries, args.repeat)
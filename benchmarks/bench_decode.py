@@ -0,0 +1,84 @@
+"""decode submitted edit forms with thousands of dict entries
+
+builds the urlencoded body the form for `models.edit_instance(n)` submits
+(a `Dict[str, int]` and a `Dict[str, Entry]` field of n entries each) and
+times parsing the body, `decode_form` and validating into the model. the
+per-entry cost should stay flat as n grows.
+
+run: python benchmarks/bench_decode.py [--entries 1000 10000] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydform.backend import validate_model
+from pydform.submission import decode_form, parse_body
+
+from models import edit_instance
+
+
+CONTENT_TYPE = "application/x-www-form-urlencoded"
+
+
+def submitted_items(instance):
+  """return the (name, value) pairs the edit form for instance submits"""
+  items = [("name", instance.name)]
+
+  for n, (k, v) in enumerate(instance.counts.items()):
+    items += [("counts._counts-%d-key" % n, k), ("counts._counts-%d-value" % n, str(v))]
+
+  for n, (k, v) in enumerate(instance.entries.items()):
+    prefix = "entries._entries-%d-key" % n
+    items += [
+      (prefix, k),
+      (prefix + ".kind", v.kind.value),
+      (prefix + ".size", str(v.size)),
+      (prefix + ".tags._tags-list", ",".join(v.tags)),
+    ]
+
+  return items + [("_uri", "/edit")]
+
+
+def timed(fn, repeat):
+  start = time.perf_counter()
+  for _ in range(repeat):
+    result = fn()
+  return result, (time.perf_counter() - start) / repeat
+
+
+def main(entries, repeat):
+  logging.disable(logging.CRITICAL)
+
+  print("%10s %10s %10s %10s %12s %10s" % ("entries", "body KiB", "parse ms", "decode ms", "validate ms", "us/entry"))
+
+  for n in entries:
+    instance = edit_instance(n)
+    model = instance.__class__
+    body = urlencode(submitted_items(instance)).encode("utf-8")
+
+    items, parse = timed(lambda: parse_body(body, CONTENT_TYPE), repeat)
+    data, decode = timed(lambda: decode_form(items), repeat)
+    result, validate = timed(lambda: validate_model(model, data), repeat)
+
+    assert result == instance, "decoded model differs"
+
+    # NB: two dict fields of n entries each
+    total = parse + decode + validate
+    print("%10d %10.1f %10.2f %10.2f %12.2f %10.2f" % (
+      n, len(body) / 1024, parse * 1000, decode * 1000, validate * 1000, total * 1e6 / (2 * n)
+    ))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000])
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+
+  main(args.entries, args.repeat)
@@ -0,0 +1,49 @@
+"""edit forms prefilled from model instances with large dicts
+
+renders `asform({"model": instance, ...})` for instances with a `Dict[str, int]`
+and a `Dict[str, Entry]` field of n entries each; the per-entry cost should
+stay flat as n grows since each entry is filled from a precompiled fragment.
+
+run: python benchmarks/bench_edit.py [--entries 100 1000 10000] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pydform
+
+from models import edit_instance
+
+
+def main(entries, repeat):
+  logging.disable(logging.CRITICAL)
+
+  print("%10s %10s %14s %12s" % ("entries", "ms", "us/entry", "output"))
+
+  for n in entries:
+    instance = edit_instance(n)
+    value = {"model": instance, "uri": "/edit"}
+
+    # compile the plan and entry fragments outside the timing
+    output = pydform.asform(value)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+      pydform.asform(value)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    # NB: two dict fields of n entries each
+    print("%10d %10.2f %14.2f %12d" % (n, elapsed * 1000, elapsed * 1e6 / (2 * n), len(output)))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--entries", type=int, nargs="+", default=[100, 1000, 10000])
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+
+  main(args.entries, args.repeat)
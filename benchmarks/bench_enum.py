@@ -0,0 +1,68 @@
+"""page size of forms with large enums, and the prefix search of the options endpoint
+
+renders `models.enum_model` (--fields fields of one enum) as selects (with
+`pydform.plan.LARGE_ENUM_SIZE` raised above the member count), as inputs
+sharing an inline datalist, and with the `enum_search` option (empty datalist
+filled from `pydform.datalist.OptionsApp`), then times `EnumIndex.search` for
+random prefixes of the members.
+
+run: python benchmarks/bench_enum.py [--members 1000 10000] [--fields 20]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pydform import plan
+from pydform.backend import model_fields
+from pydform.datalist import enum_index
+from pydform.jinja import build_form
+
+from models import enum_model
+
+
+def form_size(model, options=None, large_enum_size=plan.LARGE_ENUM_SIZE):
+  """return the length of the form for model, compiled with large_enum_size"""
+  saved, plan.LARGE_ENUM_SIZE = plan.LARGE_ENUM_SIZE, large_enum_size
+
+  try:
+    plan.plan_cache.clear()
+    return len(build_form(model, "/x", options))
+  finally:
+    plan.LARGE_ENUM_SIZE = saved
+    plan.plan_cache.clear()
+
+
+def main(members, fields):
+  logging.disable(logging.CRITICAL)
+
+  print("%8s %12s %12s %12s %14s" % ("members", "select", "datalist", "endpoint", "search [us]"))
+
+  for count in members:
+    model = enum_model(count, fields)
+    enum_type = model_fields(model)[0].type_
+
+    select = form_size(model, large_enum_size=count + 1)
+    datalist = form_size(model)
+    endpoint = form_size(model, {"enum_search": "/options"})
+
+    index = enum_index(enum_type)
+    prefixes = [v[:random.randint(0, len(v))] for v in random.sample(index.values, min(1000, count))]
+    number = 10
+    seconds = timeit.timeit(lambda: [index.search(p) for p in prefixes], number=number)
+
+    print("%8d %12d %12d %12d %14.2f" % (count, select, datalist, endpoint, seconds / number / len(prefixes) * 1e6))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--members", type=int, nargs="+", default=[1000, 10000])
+  parser.add_argument("--fields", type=int, default=20)
+  args = parser.parse_args()
+
+  main(args.members, args.fields)
@@ -0,0 +1,67 @@
+"""import time of pydform from `python -X importtime`
+
+each statement runs in a fresh interpreter; the time is the sum of the
+cumulative times of the top-level imports it triggers (i.e. excluding
+interpreter startup), the median over --repeat runs is reported.
+
+run: python benchmarks/bench_import.py [--repeat 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = {
+  "bare": "import pydform",
+  "asform": "import pydform; pydform.asform",
+}
+
+
+def import_us(statement):
+  """return the microseconds spent importing modules in one run of statement"""
+  env = dict(os.environ, PYTHONPATH=ROOT)
+  result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", statement],
+    env=env, capture_output=True, text=True, check=True,
+  )
+
+  total, started = 0, False
+
+  for line in result.stderr.splitlines():
+    if not line.startswith("import time:"):
+      continue
+
+    _, cumulative, name = line[len("import time:"):].split("|")
+
+    # NB: top-level imports have no indentation, startup ends with `site`
+    if name.startswith(" ") and not name.startswith("  "):
+      if started:
+        total += int(cumulative)
+      elif name.strip() == "site":
+        started = True
+
+  return total
+
+
+def import_ms(statement, repeat):
+  """return the median import time of statement in ms"""
+  return statistics.median([import_us(statement) for _ in range(repeat)]) / 1000
+
+
+def main(repeat):
+  print("%-8s %10s  %s" % ("name", "ms", "statement"))
+
+  for name, statement in STATEMENTS.items():
+    print("%-8s %10.2f  %s" % (name, import_ms(statement, repeat), statement))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--repeat", type=int, default=15)
+  args = parser.parse_args()
+
+  main(args.repeat)
@@ -0,0 +1,83 @@
+"""re-rendering a form after one nested model changed, in full vs incrementally
+
+builds a form of --fanout nested models of --width fields each, then a new
+version of the same classes (as `uvicorn --reload` does) where the first
+nested model has one field default changed, and renders it with `build_form`
+and with `pydform.incremental.render_update`. the median times over --repeat
+reloads are reported, the plan compile time separately since both pay it.
+
+run: python benchmarks/bench_incremental.py [--fanout 50] [--width 20] [--repeat 10]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pydantic
+
+from pydform.incremental import render_update
+from pydform.jinja import build_form
+from pydform.plan import get_plan
+
+
+def family(fanout, width, version):
+  """return the root model of a new version of the classes, the first nested model changes with version"""
+  types = (str, int, float, bool)
+
+  children = [
+    pydantic.create_model(
+      "Child%d" % i,
+      __module__="family",
+      **{"field_%d" % j: (types[j % len(types)], version if i == j == 0 else None) for j in range(width)}
+    )
+    for i in range(fanout)
+  ]
+
+  return pydantic.create_model(
+    "Family", __module__="family", **{"child_%d" % i: (child, None) for i, child in enumerate(children)}
+  )
+
+
+def main(fanout, width, repeat):
+  logging.disable(logging.CRITICAL)
+
+  render_update(family(fanout, width, 0), "/x")
+  timings = {"compile": [], "full": [], "incremental": []}
+  rendered = changed = 0
+
+  for version in range(1, repeat + 1):
+    model = family(fanout, width, version)
+
+    start = time.perf_counter()
+    get_plan(model)
+    timings["compile"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    build_form(model, "/x")
+    timings["full"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    update = render_update(model, "/x")
+    timings["incremental"].append(time.perf_counter() - start)
+
+    rendered, changed = update.rendered, len(update.changed)
+
+  nodes = fanout * (width + 1)
+  print("%d nodes, %d rendered incrementally, %d changed fragments" % (nodes, rendered, changed))
+
+  for name, values in timings.items():
+    print("%12s %8.2f ms" % (name, statistics.median(values) * 1e3))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--fanout", type=int, default=50)
+  parser.add_argument("--width", type=int, default=20)
+  parser.add_argument("--repeat", type=int, default=10)
+  args = parser.parse_args()
+
+  main(args.fanout, args.width, args.repeat)
@@ -0,0 +1,88 @@
+"""memory held by compiled plans for a registry of many models
+
+builds --models models which share a few nested types (an address model,
+a dict of item models, an enum), compiles and keeps a plan for each, and
+reports the memory allocated by compiling (tracemalloc) per field node and
+the number of distinct field descriptors behind the nodes.
+
+run: python benchmarks/bench_memory.py [--models 1000 5000]
+"""
+import argparse
+import enum
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pydantic
+
+from pydform.plan import compile_model
+
+
+class Kind(str, enum.Enum):
+  basic = "basic"
+  premium = "premium"
+
+
+def registry_models(count):
+  """return count models sharing nested types, like a registry of domain models"""
+  address = pydantic.create_model("Address", street=(str, ...), city=(str, ...), zip=(str, None))
+  item = pydantic.create_model("Item", sku=(str, ...), quantity=(int, 1), price=(float, 0.0))
+
+  return [
+    pydantic.create_model(
+      "Model%d" % i,
+      name=(str, ...),
+      count=(int, 0),
+      kind=(Kind, Kind.basic),
+      address=(address, None),
+      items=(Dict[str, item], None),
+      tags=(List[str], []),
+      **{"extra_%d" % i: (str, None)},
+    )
+    for i in range(count)
+  ]
+
+
+def walk(nodes):
+  stack = list(nodes)
+
+  while stack:
+    node = stack.pop()
+    yield node
+    stack.extend(node.children)
+
+
+def main(counts):
+  logging.disable(logging.CRITICAL)
+
+  print("%8s %8s %12s %12s %12s" % ("models", "fields", "descriptors", "KiB", "bytes/field"))
+
+  for count in counts:
+    models = registry_models(count)
+    gc.collect()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    plans = [compile_model(model) for model in models]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes = [node for plan in plans for node in walk(plan.nodes) if node.desc is not None]
+    descriptors = len({id(node.desc) for node in nodes})
+
+    print("%8d %8d %12d %12.1f %12.1f" % (count, len(nodes), descriptors, size / 1024, size / len(nodes)))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--models", type=int, nargs="+", default=[1000, 5000])
+  args = parser.parse_args()
+
+  main(args.models)
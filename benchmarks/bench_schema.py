@@ -0,0 +1,83 @@
+"""render forms from a JSON schema bundle vs from the pydantic models
+
+writes the schemas of `models.SHAPES` with `pydform.schema.dump_schemas`,
+then renders every form in a fresh interpreter either by building the models
+(standing in for importing the model modules) or by loading the bundle. the
+median wall time and the peak RSS over --repeat runs are reported.
+
+run: python benchmarks/bench_schema.py [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.join(ROOT, "benchmarks")
+
+PRELUDE = """
+import logging, resource, time
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+"""
+
+SOURCES = {
+  "models": """
+import pydform
+from models import SHAPES
+for model in [build() for build in SHAPES.values()]:
+  pydform.asform({"model": model, "uri": "/x"})
+""",
+  "schemas": """
+import pydform
+for model in pydform.load_schemas(%r).values():
+  pydform.asform({"model": model, "uri": "/x"})
+""",
+}
+
+REPORT = """
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def run(source):
+  """return (seconds, max rss KiB) of source in a fresh interpreter"""
+  env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, BENCHMARKS]))
+  result = subprocess.run(
+    [sys.executable, "-c", PRELUDE + source + REPORT],
+    env=env, capture_output=True, text=True, check=True,
+  )
+  seconds, rss = result.stdout.split()
+  return float(seconds), int(rss)
+
+
+def main(repeat):
+  sys.path.insert(0, ROOT)
+  sys.path.insert(0, BENCHMARKS)
+
+  from pydform.schema import dump_schemas
+  from models import SHAPES
+
+  with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "forms.json")
+    dump_schemas([build() for build in SHAPES.values()], path)
+
+    print("bundle: %d models, %.1f KiB" % (len(SHAPES), os.path.getsize(path) / 1024))
+    print("%-10s %10s %12s" % ("source", "ms", "max rss MiB"))
+
+    for name, source in SOURCES.items():
+      runs = [run(source % path if "%r" in source else source) for _ in range(repeat)]
+      print("%-10s %10.1f %12.1f" % (
+        name, statistics.median([s for s, _ in runs]) * 1000, max([r for _, r in runs]) / 1024
+      ))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+
+  main(args.repeat)
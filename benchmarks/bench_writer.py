@@ -0,0 +1,152 @@
+"""compare nested string building with the FragmentWriter on a deep model
+
+the `nested` renderer reproduces the pre-writer strategy where each container
+joins its children into a new string which its parent copies again, so each
+byte is copied once per nesting level.
+
+`strings` and `string bytes` count the output strings each strategy builds
+(fragments, joins and the final document); peak bytes is from tracemalloc.
+
+run: python benchmarks/bench_writer.py [--depth 20] [--repeat 50]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydform.html import DICT_SECTION_HEAD, DICT_SECTION_TAIL, RECURSIVE_PLACEHOLDER, write_plan, make_tag
+from pydform.plan import get_plan
+from pydform.writer import FragmentWriter
+
+from models import deep_model
+
+
+class Counter:
+  strings = 0
+  nbytes = 0
+
+  @classmethod
+  def add(cls, s):
+    cls.strings += 1
+    cls.nbytes += len(s)
+    return s
+
+
+class CountingWriter(FragmentWriter):
+  __slots__ = ()
+
+  def write(self, text):
+    Counter.add(text)
+    super().write(text)
+
+  def getvalue(self):
+    return Counter.add(super().getvalue())
+
+
+def render_nested(node):
+  """render a node by returning a new string at every level"""
+  if node.handler == "text":
+    return node.text
+  elif node.handler == "enum":
+    return "".join((
+      make_tag("label", attrs={"for": node.qualname}, content=node.label),
+      make_tag("select", attrs={"name": node.qualname, "id": node.qualname}, content="".join(
+        [make_tag("option", attrs=dict(value=v), content=v) for v in node.options]
+      ))
+    ))
+  elif node.handler == "dict":
+    fmt = dict(name=node.name, fieldname="_%s-key" % node.desc.fieldname)
+    return DICT_SECTION_HEAD.format(**fmt) + "".join([recurse(c) for c in node.children]) + DICT_SECTION_TAIL.format(**fmt)
+  elif node.handler in ("list", "tuple", "Union"):
+    return "<section><h3>%s</h3></section>%s" % (node.name, "".join([recurse(c) for c in node.children]))
+  elif node.handler == "basemodel":
+    return "".join([recurse(c) for c in node.children])
+  elif node.handler == "recursive":
+    return RECURSIVE_PLACEHOLDER.format(qualname=node.qualname, template=node.text, name=node.name)
+  elif node.handler == "template":
+    return "\n<template id='%s'>%s</template>\n" % (node.qualname, "".join([recurse(c) for c in node.children]))
+
+  return "".join((
+    make_tag("label", attrs={"for": node.qualname}, content=node.label),
+    make_tag("input", dict(node.attrs))
+  ))
+
+
+def count_nested(node):
+  return Counter.add(render_nested(node))
+
+
+# NB: swapped for count_nested when counting strings
+recurse = render_nested
+
+
+def render_writer(nodes, writer=FragmentWriter):
+  w = writer()
+  write_plan(w, nodes)
+  return w.getvalue()
+
+
+def measure(fn, counted, repeat):
+  """return (output, seconds per call, peak traced bytes, strings built, string bytes built)"""
+  global recurse
+
+  Counter.strings, Counter.nbytes = 0, 0
+  recurse = count_nested
+  output = counted()
+  recurse = render_nested
+  strings, nbytes = Counter.strings, Counter.nbytes
+
+  start = time.perf_counter()
+  for _ in range(repeat):
+    fn()
+  elapsed = (time.perf_counter() - start) / repeat
+
+  tracemalloc.start()
+  fn()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  return output, elapsed, peak, strings, nbytes
+
+
+def main(depth, repeat):
+  logging.disable(logging.CRITICAL)
+
+  print("%-10s %-8s %10s %12s %10s %14s %12s" % ("model", "render", "ms", "peak bytes", "strings", "string bytes", "output"))
+
+  for container in (False, True):
+    plan = get_plan(deep_model(depth, container=container))
+    label = "dict" if container else "basemodel"
+
+    strategies = {
+      "nested": (
+        lambda: "".join([render_nested(node) for node in plan.nodes]),
+        lambda: Counter.add("".join([count_nested(node) for node in plan.nodes])),
+      ),
+      "writer": (
+        lambda: render_writer(plan.nodes),
+        lambda: render_writer(plan.nodes, writer=CountingWriter),
+      ),
+    }
+
+    outputs = {}
+
+    for name, (fn, counted) in strategies.items():
+      output, elapsed, peak, strings, nbytes = measure(fn, counted, repeat)
+      outputs[name] = output
+      print("%-10s %-8s %10.3f %12d %10d %14d %12d" % (label, name, elapsed * 1000, peak, strings, nbytes, len(output)))
+
+    assert outputs["nested"] == outputs["writer"], "renderers disagree"
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--depth", type=int, default=20)
+  parser.add_argument("--repeat", type=int, default=50)
+  args = parser.parse_args()
+
+  main(args.depth, args.repeat)
@@ -0,0 +1,108 @@
+/*
+ * compare the old submission pipeline with encode_form_data under node
+ *
+ * generates the entries an edit form with a primitive dict and a model dict
+ * of n entries each submits, checks both pipelines give the same submission
+ * and prints the time per call. console.log is silenced for both, so the
+ * difference is the algorithm rather than the logging.
+ *
+ * run: node benchmarks/js/bench_submission.js [n ...]
+ */
+const fs = require("fs");
+const path = require("path");
+const vm = require("vm");
+
+const js_dir = path.join(__dirname, "..", "..", "pydform", "js");
+
+function load(files) {
+  // evaluate the scripts in a fresh context and return it
+  const context = vm.createContext({console: {log() {}}});
+
+  for (const file of files) {
+    vm.runInContext(fs.readFileSync(file, "utf8"), context, {filename: file});
+  }
+
+  return context;
+}
+
+const common = path.join(js_dir, "common.js");
+const old_ctx = load([common, path.join(__dirname, "submission_old.js")]);
+const new_ctx = load([common, path.join(js_dir, "submission.js")]);
+
+function old_encode(entries) {
+  // the data steps of the old submit_form
+  const form_data = Object.fromEntries(entries);
+  const zform_data = old_ctx.remove_zero_length_entries(form_data);
+  const vform_data = old_ctx.map_values(zform_data);
+  old_ctx.map_keys(vform_data);
+  old_ctx.map_lists(vform_data);
+  return old_ctx.inflate_form_data(vform_data);
+}
+
+function new_encode(entries) {
+  return new_ctx.encode_form_data(entries);
+}
+
+function form_entries(n) {
+  const entries = [["name", "edit"]];
+
+  for (let i = 0; i < n; i++) {
+    entries.push(["counts._counts-" + i + "-key", "count_" + i]);
+    entries.push(["counts._counts-" + i + "-value", String(i)]);
+  }
+
+  for (let i = 0; i < n; i++) {
+    const prefix = "entries._entries-" + i + "-key";
+    entries.push([prefix, "entry_" + i]);
+    entries.push([prefix + ".kind", "binary"]);
+    entries.push([prefix + ".size", String(i)]);
+    entries.push([prefix + ".tags._tags-list", "a,b"]);
+  }
+
+  entries.push(["_uri", "/edit"]);
+  return entries;
+}
+
+function canonical(value) {
+  // JSON with sorted keys, the pipelines insert keys in different orders
+  if (Array.isArray(value)) {
+    return "[" + value.map(canonical).join(",") + "]";
+  } else if (value && typeof value === "object") {
+    return "{" + Object.keys(value).sort().map(k => JSON.stringify(k) + ":" + canonical(value[k])).join(",") + "}";
+  }
+  return JSON.stringify(value);
+}
+
+function time_ms(fn, entries) {
+  // median of repeated calls, at least 3 and about 200ms worth
+  const samples = [];
+  const deadline = process.hrtime.bigint() + 200000000n;
+
+  while (samples.length < 3 || (process.hrtime.bigint() < deadline && samples.length < 100)) {
+    const start = process.hrtime.bigint();
+    fn(entries);
+    samples.push(Number(process.hrtime.bigint() - start) / 1e6);
+  }
+
+  samples.sort((a, b) => a - b);
+  return samples[Math.floor(samples.length / 2)];
+}
+
+const sizes = process.argv.length > 2 ? process.argv.slice(2).map(Number) : [100, 250, 500, 1000];
+
+console.log(["entries", "inputs", "old ms", "new ms", "speedup"].map(s => s.padStart(10)).join(" "));
+
+for (const n of sizes) {
+  const entries = form_entries(n);
+
+  if (canonical(old_encode(entries)) !== canonical(new_encode(entries))) {
+    throw new Error("pipelines disagree for n=" + n);
+  }
+
+  const old_ms = time_ms(old_encode, entries);
+  const new_ms = time_ms(new_encode, entries);
+
+  console.log([
+    String(n), String(entries.length), old_ms.toFixed(2), new_ms.toFixed(3), (old_ms / new_ms).toFixed(1) + "x"
+  ].map(s => s.padStart(10)).join(" "));
+}
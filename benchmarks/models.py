@@ -0,0 +1,133 @@
+"""synthetic pydantic models for benchmarking pydform"""
+import enum
+import pydantic
+
+from typing import Dict, List, Optional, Tuple, Union
+
+
+def wide_model(width=1000):
+  """a flat model with `width` primitive fields of rotating types"""
+  types = (str, int, float, bool)
+
+  return pydantic.create_model(
+    "Wide%d" % width,
+    **{"field_%d" % i: (types[i % len(types)], None) for i in range(width)}
+  )
+
+
+def deep_model(depth=20, container=False):
+  """build a chain of `depth` nested models
+
+     each level has a couple of primitive fields and a child which is the next
+     level, either directly or as the value type of a `Dict[str, Level]` when
+     container is True.
+  """
+  child = pydantic.create_model("Level%d" % depth, name=(str, ...), size=(int, 0))
+
+  for level in reversed(range(depth)):
+    child_type = Dict[str, child] if container else child
+
+    child = pydantic.create_model(
+      "Level%d" % level,
+      name=(str, ...),
+      size=(int, 0),
+      child=(child_type, None),
+    )
+
+  return child
+
+
+def fanout_model(fanout=50, width=10):
+  """a model with `fanout` `Dict[str, Item]` fields, each Item has `width` fields"""
+  item = wide_model(width)
+
+  return pydantic.create_model(
+    "Fanout%d" % fanout,
+    **{"items_%d" % i: (Dict[str, item], None) for i in range(fanout)}
+  )
+
+
+def enum_model(members=1000, fields=20):
+  """a model with `fields` fields of one Enum with `members` members"""
+  values = enum.Enum(
+    "Enum%d" % members,
+    {"member_%d" % i: "member_%d" % i for i in range(members)},
+    type=str
+  )
+
+  return pydantic.create_model(
+    "Enums%d" % members,
+    **{"choice_%d" % i: (values, None) for i in range(fields)}
+  )
+
+
+def mixed_model(copies=20):
+  """`Union`/`Tuple`/`List` mixes like `examples/nested-basemodel`, repeated `copies` times"""
+  class DataType(str, enum.Enum):
+    binary = "binary"
+    category = "category"
+    image = "image"
+
+  class Loss(str, enum.Enum):
+    auto = "auto"
+    dice = "dice"
+    focal = "focal"
+
+  definition = pydantic.create_model(
+    "Definition",
+    type=(DataType, ...),
+    shape=(Optional[Tuple[int, ...]], None),
+    loss=(Union[Loss, str], ...),
+    metrics=(List[Union[Loss, str]], ["auto"]),
+    tags=(List[str], []),
+  )
+
+  return pydantic.create_model(
+    "Mixed%d" % copies,
+    **{
+      name: field
+      for i in range(copies)
+      for name, field in (
+        ("outputs_%d" % i, (Dict[str, definition], None)),
+        ("primary_%d" % i, (definition, None)),
+      )
+    }
+  )
+
+
+def edit_instance(entries=10000):
+  """an instance with `entries` dict entries of primitive and model values, for edit forms"""
+  class Kind(str, enum.Enum):
+    binary = "binary"
+    category = "category"
+    image = "image"
+
+  entry = pydantic.create_model(
+    "Entry",
+    kind=(Kind, Kind.binary),
+    size=(int, 1),
+    tags=(List[str], []),
+  )
+
+  model = pydantic.create_model(
+    "Edit%d" % entries,
+    name=(str, ...),
+    counts=(Dict[str, int], {}),
+    entries=(Dict[str, entry], {}),
+  )
+
+  return model(
+    name="edit",
+    counts={"count_%d" % i: i for i in range(entries)},
+    entries={"entry_%d" % i: entry(kind=list(Kind)[i % len(Kind)], size=i, tags=["a", "b"]) for i in range(entries)},
+  )
+
+
+SHAPES = {
+  "wide-1000": lambda: wide_model(1000),
+  "deep-20": lambda: deep_model(20),
+  "deep-dict-20": lambda: deep_model(20, container=True),
+  "fanout-50": lambda: fanout_model(50),
+  "enum-1000": lambda: enum_model(1000),
+  "mixed-20": lambda: mixed_model(20),
+}
@@ -0,0 +1,235 @@
+"""benchmark asform on synthetic model shapes
+
+reports latency percentiles, allocation count and output size for each shape
+in `models.SHAPES`, for a cold conversion (compile and render) and for
+rendering a cached plan, and the import time from `bench_import`. results can
+be saved and later runs compared to them: allocation counts and output sizes
+are the same on every machine (for a python version), they are kept in the
+repository in `baseline.json`; times are saved in `timings.json`, which is
+local to the machine and not committed, and only compared when it exists.
+
+run:
+  python benchmarks/suite.py                     # print results
+  python benchmarks/suite.py --save              # write baseline.json and timings.json
+  python benchmarks/suite.py --compare           # exit 1 on regressions over --threshold
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydform.jinja import build_form, form_plan, render_form
+from pydform.plan import plan_cache
+from pydform.rtti import clear_type_cache
+
+from bench_import import STATEMENTS, import_ms
+from models import SHAPES
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TIMINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "timings.json")
+
+# metrics saved in the committed baseline, and in the local timings
+STABLE_METRICS = ("allocs", "output_kib")
+TIMED_METRICS = ("p50_ms", "p90_ms", "p99_ms")
+
+# metrics compared to the saved ones
+COMPARED_METRICS = ("p50_ms",) + STABLE_METRICS
+
+
+def cold(model):
+  plan_cache.clear()
+  clear_type_cache()
+  return build_form(model, "/submit")
+
+
+def warm(model):
+  return render_form(form_plan(model), "/submit")
+
+
+MODES = {
+  "cold": cold,
+  "render": warm,
+}
+
+
+def percentile(samples, p):
+  return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+
+def count_allocations(fn, model):
+  """return the number of memory blocks allocated by fn(model)
+
+     NB: python has no allocation counter, only the blocks in use; their
+     increases between profiler events (every python and builtin call and
+     return) are summed, so a block allocated and freed between two events is
+     not counted. the count is the same from run to run, unlike timings
+  """
+  count = 0
+  last = sys.getallocatedblocks()
+
+  def profile(frame, event, arg):
+    nonlocal count, last
+    blocks = sys.getallocatedblocks()
+
+    if blocks > last:
+      count += blocks - last
+
+    last = blocks
+
+  gc.disable()
+  sys.setprofile(profile)
+
+  try:
+    fn(model)
+  finally:
+    sys.setprofile(None)
+    gc.enable()
+
+  return count
+
+
+def run(fn, model, repeat):
+  """time fn(model) repeat times, then count the allocations of one call"""
+  output = fn(model)
+  samples = []
+
+  for _ in range(repeat):
+    start = time.perf_counter()
+    fn(model)
+    samples.append((time.perf_counter() - start) * 1000)
+
+  return {
+    "p50_ms": percentile(samples, 50),
+    "p90_ms": percentile(samples, 90),
+    "p99_ms": percentile(samples, 99),
+    "allocs": count_allocations(fn, model),
+    "output_kib": len(output) / 1024,
+  }
+
+
+def compare(results, baseline, threshold):
+  """return a list of (key, metric, baseline, result) which regressed past threshold
+
+     NB: only the metrics in both results and baseline are compared
+  """
+  regressions = []
+
+  for key, metrics in results.items():
+    for metric in COMPARED_METRICS:
+      base = baseline.get(key, {}).get(metric)
+
+      if base and metric in metrics and metrics[metric] > base * (1 + threshold):
+        regressions.append((key, metric, base, metrics[metric]))
+
+  return regressions
+
+
+def select(results, metrics):
+  """return results with only metrics, dropping the keys left empty"""
+  selected = {key: {m: v for m, v in r.items() if m in metrics} for key, r in results.items()}
+  return {key: r for key, r in selected.items() if r}
+
+
+def save(path, results):
+  with open(path, "w") as f:
+    json.dump({"python": python_version(), "results": results}, f, indent=2, sort_keys=True)
+  print("saved '%s'" % path)
+
+
+def load(path):
+  """return the python version and results saved at path, or None if there is no file"""
+  if not os.path.exists(path):
+    return None
+
+  with open(path, "r") as f:
+    saved = json.load(f)
+
+  return saved["python"], saved["results"]
+
+
+def python_version():
+  return "%d.%d" % sys.version_info[:2]
+
+
+def main(args):
+  logging.disable(logging.CRITICAL)
+
+  shapes = args.shapes or list(SHAPES)
+  results = {}
+
+  print("%-14s %-7s %9s %9s %9s %11s %11s" % ("shape", "mode", "p50 ms", "p90 ms", "p99 ms", "allocs", "output KiB"))
+
+  for shape in shapes:
+    model = SHAPES[shape]()
+
+    for mode, fn in MODES.items():
+      key = "%s/%s" % (shape, mode)
+      r = results[key] = run(fn, model, args.repeat)
+      print("%-14s %-7s %9.3f %9.3f %9.3f %11d %11.1f" % (
+        shape, mode, r["p50_ms"], r["p90_ms"], r["p99_ms"], r["allocs"], r["output_kib"]
+      ))
+
+  if not args.shapes:
+    print("%-14s %-7s %9s" % ("import", "", "p50 ms"))
+
+    for name, statement in STATEMENTS.items():
+      r = results["import/%s" % name] = {"p50_ms": import_ms(statement, args.import_repeat)}
+      print("%-14s %-7s %9.3f" % (name, "", r["p50_ms"]))
+
+  if args.save:
+    save(args.baseline, select(results, STABLE_METRICS))
+    save(args.timings, select(results, TIMED_METRICS))
+
+  if args.compare:
+    regressions = []
+
+    # NB: allocation counts change with the python version, not with the machine
+    python, baseline = load(args.baseline)
+
+    if python == python_version():
+      regressions += compare(select(results, STABLE_METRICS), baseline, args.threshold)
+    else:
+      print("skipped '%s', saved with python %s" % (args.baseline, python))
+
+    saved = load(args.timings)
+
+    if saved is not None:
+      regressions += compare(select(results, TIMED_METRICS), saved[1], args.threshold)
+    else:
+      print("skipped timings, no '%s' on this machine, record them with --save (make bench-save)" % args.timings)
+
+    for key, metric, base, result in regressions:
+      print("REGRESSION %s %s: %.3f -> %.3f" % (key, metric, base, result))
+
+    return 1 if regressions else 0
+
+  return 0
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("shapes", nargs="*", help="shapes to run from %s, default all" % ", ".join(SHAPES))
+  parser.add_argument("--repeat", type=int, default=30)
+  parser.add_argument("--import-repeat", type=int, default=9)
+  parser.add_argument("--baseline", default=BASELINE, help="allocation counts and sizes, committed")
+  parser.add_argument("--timings", default=TIMINGS, help="times, local to the machine")
+  parser.add_argument("--save", action="store_true", help="save results as the baseline")
+  parser.add_argument("--compare", action="store_true", help="compare results to the baseline")
+  parser.add_argument("--threshold", type=float, default=0.25, help="allowed fractional regression")
+  args = parser.parse_args()
+
+  for shape in args.shapes:
+    if shape not in SHAPES:
+      parser.error("unknown shape '%s'" % shape)
+
+  if args.compare and not args.save and not os.path.exists(args.baseline):
+    parser.error("no baseline at '%s', record one with --save (make bench-save)" % args.baseline)
+
+  sys.exit(main(args))
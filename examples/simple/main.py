@@ -39,6 +39,7 @@ class User(pydantic.BaseModel):
 # fast api setup
 #
 app = FastAPI()
+app.mount("/static/pydform", pydform.bundle.app)
 
 
 templates = Jinja2Templates(directory="pydform/examples/simple")
@@ -55,11 +56,7 @@ def get_users(request: Request):
   return templates.TemplateResponse(
       "template.html", {
           "request": request,
-          "pydform_script_header": {
-            "submit": pydform.js.form_submission_script,
-            "append": pydform.js.form_appendable_script,
-            "collapse": pydform.js.collapsible_elements_script
-          },
+          "pydform_script": pydform.bundle.script_tag("/static/pydform"),
           "users": request.app.state.user_list,
           "append_new_user": {
               "uri": request.url_for("post_new_user"),
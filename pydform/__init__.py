@@ -1,6 +1,55 @@
-from . import html
-from . import js
-from . import rtti
+"""pydantic.BaseModel to html form conversion
 
-from .fielddesc import FieldDesc
-from .jinja import asform
+the submodules and the names below are imported on first use, so `import pydform`
+does not import pydantic or read the javascript assets
+"""
+import importlib
+
+from .version import __version__
+
+
+# NB: `registry` is the FormRegistry instance, see NAMES
+SUBMODULES = (
+  "backend", "bundle", "cache", "datalist", "diskcache", "ext", "fielddesc", "html", "incremental", "jinja", "js",
+  "lazy", "plan", "rtti", "schema", "shared", "stats", "submission", "version", "writer",
+)
+
+# public name -> submodule defining it
+NAMES = {
+  "FieldDesc": "fielddesc",
+  "FormCache": "cache",
+  "form_cache": "cache",
+  "FormRegistry": "registry",
+  "registry": "registry",
+  "FieldNode": "plan",
+  "FormPlan": "plan",
+  "compile_model": "plan",
+  "get_plan": "plan",
+  "asform": "jinja",
+  "asform_async": "jinja",
+  "iter_form": "jinja",
+  "render_form": "jinja",
+  "decode_form": "submission",
+  "decode_model": "submission",
+  "schema_model": "schema",
+  "load_schemas": "schema",
+}
+
+__all__ = ["__version__", *SUBMODULES, *NAMES]
+
+
+def __getattr__(name):
+  if name in NAMES:
+    value = getattr(importlib.import_module("." + NAMES[name], __name__), name)
+  elif name in SUBMODULES:
+    value = importlib.import_module("." + name, __name__)
+  else:
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+  # NB: cached so later lookups skip __getattr__
+  globals()[name] = value
+  return value
+
+
+def __dir__():
+  return sorted(set(globals()) | set(__all__))
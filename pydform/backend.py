@@ -0,0 +1,198 @@
+"""pydantic version backend, the only module which depends on the pydantic major version
+
+the planner reads model fields through the pydantic v1 `ModelField` attributes
+(`name`, `outer_type_`, `type_`, `required`, `default`, `alias`, `field_info`,
+`sub_fields`). with pydantic v1 these are the model's own fields; with
+pydantic v2 `model_fields` are wrapped in `AnnotatedField`, which derives the
+same attributes from the field annotation the way v1 does, so both versions
+compile the same plan and render the same html.
+
+`FormModel` classes are models described without pydantic (see
+`pydform.schema`), they list their own `AnnotatedField`s.
+
+NB: pydantic v2 makes `Optional[X]` fields without a default required, so
+they get the `required` attribute where v1 leaves it out
+"""
+import abc
+import collections.abc
+import logging
+import types
+import typing
+
+import pydantic
+
+from typing import Any, List, NamedTuple, Optional
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+PYDANTIC_V2 = pydantic.VERSION.startswith("2.")
+
+UNION_TYPES = (typing.Union, getattr(types, "UnionType", typing.Union))
+
+# single argument containers, v1 `type_` is the item type
+SEQUENCE_TYPES = (list, set, frozenset, collections.abc.Sequence, collections.abc.Set, collections.abc.Iterable)
+
+MAPPING_TYPES = (dict, collections.abc.Mapping)
+
+
+if PYDANTIC_V2:
+  from pydantic_core import PydanticUndefined
+
+  ModelMetaclass = type(pydantic.BaseModel)
+
+  def get_origin(tp):
+    return typing.get_origin(tp)
+
+  def get_args(tp):
+    return typing.get_args(tp)
+
+  def display_as_type(v) -> str:
+    """type name like `pydantic.typing.display_as_type` in v1"""
+    origin = get_origin(v)
+
+    if origin in UNION_TYPES:
+      return "Union[%s]" % ", ".join([display_as_type(a) for a in get_args(v)])
+
+    if origin is not None:
+      return str(v).replace("typing.", "")
+
+    try:
+      return v.__name__
+    except AttributeError:
+      return str(v).replace("typing.", "")
+
+else:
+  from pydantic.fields import ModelField
+  from pydantic.main import ModelMetaclass
+  from pydantic.typing import display_as_type, get_args, get_origin
+
+
+class AnnotatedFieldInfo(NamedTuple):
+  """the v1 `FieldInfo` attributes used by `pydform.fielddesc`"""
+  description: Optional[str]
+  extra: dict
+
+
+class AnnotatedField:
+  """a model field given by its annotation, with the attributes of a v1 `ModelField`
+
+     name: str, field name (or `<name>_<type>` for union members, like v1)
+     annotation: field type, without `Annotated` metadata
+     required: bool
+     default: default value, None if there is none
+     alias: str, default name
+     description: str, the input placeholder
+     extra: dict, e.g. `{"no_html": True}`
+  """
+  __slots__ = ("name", "outer_type_", "type_", "required", "default", "alias", "field_info", "sub_fields")
+
+  def __init__(self, name: str, annotation, required=True, default=None, alias=None, description=None, extra=None):
+    self.name = name
+    self.required = required
+    self.default = default
+    self.alias = alias or name
+    self.field_info = AnnotatedFieldInfo(description, extra or {})
+    self.outer_type_, self.type_, self.sub_fields = analyse_type(name, annotation)
+
+  def __repr__(self):
+    return "AnnotatedField(name=%r, type=%s)" % (self.name, display_as_type(self.outer_type_))
+
+
+class FormModel(abc.ABC):
+  """base class of models described without pydantic
+
+     subclasses implement `form_fields`, returning their fields in order as
+     AnnotatedField; they are planned like pydantic models
+  """
+  @classmethod
+  @abc.abstractmethod
+  def form_fields(cls) -> List[AnnotatedField]:
+    """return the fields of the model in order"""
+
+
+def analyse_type(name: str, annotation):
+  """return (outer_type_, type_, sub_fields) for a v2 annotation, as v1 computes them"""
+  origin = get_origin(annotation)
+  args = get_args(annotation)
+
+  # NB: v1 unwraps `Optional[X]` to X, unions with more members keep `None`
+  if origin in UNION_TYPES:
+    members = [a for a in args if a is not type(None)]
+
+    if len(members) == 1:
+      return analyse_type(name, members[0])
+
+    return annotation, annotation, [AnnotatedField("%s_%s" % (name, display_as_type(a)), a) for a in members]
+
+  if origin is tuple:
+    if len(args) == 2 and args[1] is Ellipsis:
+      return annotation, args[0], [AnnotatedField("%s_0" % name, args[0])]
+
+    return annotation, annotation, [AnnotatedField("%s_%d" % (name, i), a) for i, a in enumerate(args)]
+
+  if origin in SEQUENCE_TYPES and args:
+    return annotation, args[0], [AnnotatedField("_%s" % name, args[0])]
+
+  if origin in MAPPING_TYPES and args:
+    return annotation, args[1], [AnnotatedField("_%s" % name, args[1])]
+
+  return annotation, annotation, None
+
+
+def model_fields(model) -> List[Any]:
+  """return the fields of a model class as v1 `ModelField` (or `AnnotatedField`) in order"""
+  if issubclass(model, FormModel):
+    return model.form_fields()
+
+  if not PYDANTIC_V2:
+    return list(model.__fields__.values())
+
+  # NB: a model with forward references is completed on first use
+  if not getattr(model, "__pydantic_complete__", True):
+    model.model_rebuild()
+
+  return [
+    AnnotatedField(
+      name,
+      info.annotation,
+      required=info.is_required(),
+      default=None if info.default is PydanticUndefined else info.default,
+      alias=info.alias,
+      description=info.description,
+      extra=info.json_schema_extra if isinstance(info.json_schema_extra, dict) else None,
+    )
+    for name, info in model.model_fields.items()
+  ]
+
+
+def is_model_class(obj) -> bool:
+  """true if obj is a pydantic.BaseModel (or FormModel) derived class"""
+  return isinstance(obj, ModelMetaclass) or (isinstance(obj, type) and issubclass(obj, FormModel))
+
+
+def model_schema(model) -> dict:
+  """return the JSON schema of a model class"""
+  if PYDANTIC_V2 and not issubclass(model, FormModel):
+    return model.model_json_schema()
+
+  return model.schema()
+
+
+def model_dict(instance) -> dict:
+  """return a model instance as a (nested) dict"""
+  return instance.model_dump() if PYDANTIC_V2 else instance.dict()
+
+
+def validate_model(model, data: dict):
+  """validate data as an instance of model, raises pydantic.ValidationError"""
+  return model.model_validate(data) if PYDANTIC_V2 else model.parse_obj(data)
+
+
+if PYDANTIC_V2:
+  ModelField = AnnotatedField
+
+# fields accepted by the planner
+FIELD_TYPES = (ModelField, AnnotatedField)
@@ -0,0 +1,141 @@
+"""single minified javascript asset for the form scripts, served by filename hash
+
+the scripts in `pydform/js` are joined and minified once into a bundle named
+after a hash of its content, so it can be cached forever by browsers and
+proxies; a new release changes the name. mount `app` under a static prefix and
+put `script_tag(prefix)` in the page instead of the inline `pydform.js` scripts:
+
+    app.mount("/static/pydform", pydform.bundle.app)
+
+    {{ pydform_script | safe }}  # pydform.bundle.script_tag("/static/pydform")
+
+`app` is a plain ASGI application so it works with starlette, fastapi or any
+other ASGI server.
+"""
+import functools
+import hashlib
+import logging
+import re
+
+from typing import NamedTuple
+
+from .js import read_script
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+# NB: order matters, later scripts use the helpers in common.js
+JS_FILES = ("common.js", "submission.js", "append.js", "collapsible.js", "lazy.js", "datalist.js", "incremental.js")
+
+CACHE_CONTROL = b"public, max-age=31536000, immutable"
+CONTENT_TYPE = b"application/javascript; charset=utf-8"
+
+
+class Bundle(NamedTuple):
+  """a built javascript bundle
+
+     content: bytes, minified javascript
+     digest: str, content hash used in the filename and etag
+  """
+  content: bytes
+  digest: str
+
+  @property
+  def filename(self) -> str:
+    return "pydform.%s.js" % self.digest
+
+  @property
+  def etag(self) -> str:
+    return '"%s"' % self.digest
+
+
+# strings and regular expression literals are kept as they are, comments are dropped
+# NB: a regular expression is only recognised after a punctuator, not after `return`
+TOKENS = re.compile(r"""
+    (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+  | (?<=[(,=:\[!&|?{};])(?P<regex>[ \t]*/(?![/*])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*)
+  | (?P<block>/\*.*?\*/)
+  | (?P<line>//[^\n]*)
+""", re.VERBOSE | re.DOTALL)
+
+KEPT = re.compile(r"\0(\d+)\0")
+CONSOLE_CALL = re.compile(r"^\s*console\.\w+\([^;\n]*\);\s*$", re.MULTILINE)
+
+
+def minify(source: str) -> str:
+  """conservative javascript minifier
+
+     removes comments, whole-line `console` calls (a single statement on its
+     line), indentation and blank lines. line breaks are kept so automatic
+     semicolon insertion is unaffected; strings, template literals and regular
+     expressions are left untouched.
+  """
+  kept = []
+
+  def token(m):
+    if m.lastgroup in ("string", "regex"):
+      kept.append(m.group())
+      return "\0%d\0" % (len(kept) - 1)
+
+    # NB: a block comment spanning lines still separates them
+    return "\n" if "\n" in m.group() else " " if m.lastgroup == "block" else ""
+
+  source = TOKENS.sub(token, source)
+  source = CONSOLE_CALL.sub("", source)
+  source = "\n".join([line.strip() for line in source.splitlines() if line.strip()]) + "\n"
+
+  return KEPT.sub(lambda m: kept[int(m.group(1))], source)
+
+
+def build_bundle(files=JS_FILES, minified=True) -> Bundle:
+  """join (and minify) the scripts in `pydform/js` into a Bundle"""
+  source = "\n".join([read_script(name) for name in files])
+
+  if minified:
+    source = minify(source)
+
+  content = source.encode("utf-8")
+  digest = hashlib.sha256(content).hexdigest()[:16]
+
+  logger.info("built '%s' [%d bytes]", digest, len(content))
+  return Bundle(content, digest)
+
+
+@functools.lru_cache(maxsize=None)
+def get_bundle() -> Bundle:
+  """return the minified bundle, built once per process"""
+  return build_bundle()
+
+
+def script_tag(prefix: str = "/static/pydform") -> str:
+  """return the `<script src>` tag for the bundle served by `app` mounted at prefix"""
+  return '<script type="text/javascript" src="%s/%s"></script>' % (prefix.rstrip("/"), get_bundle().filename)
+
+
+async def app(scope, receive, send):
+  """ASGI application serving the bundle with immutable cache headers
+
+     GET/HEAD `<mount>/pydform.<digest>.js` returns the bundle, or 304 when
+     If-None-Match has its etag; other names are 404.
+  """
+  assert scope["type"] == "http"
+
+  bundle = get_bundle()
+  headers = [(b"etag", bundle.etag.encode("ascii")), (b"cache-control", CACHE_CONTROL)]
+
+  if scope["method"] not in ("GET", "HEAD"):
+    status, body, headers = 405, b"", [(b"allow", b"GET, HEAD")]
+  elif scope["path"].rsplit("/", 1)[-1] != bundle.filename:
+    status, body, headers = 404, b"", []
+  elif bundle.etag.encode("ascii") in dict(scope.get("headers", [])).get(b"if-none-match", b""):
+    status, body = 304, b""
+  else:
+    status, body = 200, bundle.content
+    headers.append((b"content-type", CONTENT_TYPE))
+
+  headers.append((b"content-length", str(len(body)).encode("ascii")))
+
+  await send({"type": "http.response.start", "status": status, "headers": headers})
+  await send({"type": "http.response.body", "body": body if scope["method"] != "HEAD" else b""})
@@ -0,0 +1,133 @@
+import logging
+import threading
+
+from collections import OrderedDict, namedtuple
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class FormCache:
+  """bounded LRU cache for compiled forms
+
+     keys are tuples whose first element is the model class, so all entries
+     for a model can be dropped with `invalidate(model)` when it changes.
+
+     maxsize: int, number of entries to keep; 0 disables caching, None is unbounded
+  """
+  def __init__(self, maxsize=128):
+    self.maxsize = maxsize
+    self.hits = 0
+    self.misses = 0
+    self._data = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key, default=None):
+    """return the cached value for key, or default, and count the hit/miss"""
+    with self._lock:
+      try:
+        value = self._data[key]
+      except KeyError:
+        self.misses += 1
+        return default
+
+      self._data.move_to_end(key)
+      self.hits += 1
+      return value
+
+  def put(self, key, value):
+    """store value under key, evicting the least recently used entries"""
+    if self.maxsize == 0:
+      return value
+
+    with self._lock:
+      self._data[key] = value
+      self._data.move_to_end(key)
+
+      while self.maxsize is not None and len(self._data) > self.maxsize:
+        evicted, _ = self._data.popitem(last=False)
+        logger.debug("evicted '%s'", str(evicted))
+
+    return value
+
+  def get_or_build(self, key, builder):
+    """return the cached value for key, calling `builder()` to create it on a miss
+
+       NB: the builder runs outside the lock, so two threads missing on the
+       same key at once may both build; the last one stored wins.
+    """
+    sentinel = object()
+    value = self.get(key, sentinel)
+
+    if value is sentinel:
+      value = self.put(key, builder())
+
+    return value
+
+  def invalidate(self, model=None):
+    """drop all entries for model, or everything if model is None
+
+       returns: int, number of entries removed
+    """
+    with self._lock:
+      if model is None:
+        count = len(self._data)
+        self._data.clear()
+        return count
+
+      keys = [k for k in self._data if k[0] is model]
+
+      for k in keys:
+        del self._data[k]
+
+      return len(keys)
+
+  def clear(self):
+    """drop all entries and reset the counters"""
+    with self._lock:
+      self._data.clear()
+      self.hits = 0
+      self.misses = 0
+
+  def info(self):
+    """return hit/miss counters and sizes, like `functools.lru_cache.cache_info`"""
+    with self._lock:
+      return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+  def __len__(self):
+    return len(self._data)
+
+  def __contains__(self, key):
+    return key in self._data
+
+
+def make_key(model, uri, options=None):
+  """build a hashable cache key from a model class, submission uri and options dict"""
+  return (model, uri, tuple(sorted((options or {}).items())))
+
+
+# process-wide cache of rendered forms used by `asform`
+form_cache = FormCache()
+
+# optional second tier shared between processes, see `use_disk_cache`
+disk_cache = None
+
+
+def use_disk_cache(path):
+  """read and write rendered forms in the directory path, None to stop
+
+     returns: DiskFormCache or None
+  """
+  global disk_cache
+
+  from .diskcache import DiskFormCache
+
+  if disk_cache is not None:
+    disk_cache.close()
+
+  disk_cache = DiskFormCache(path) if path is not None else None
+  return disk_cache
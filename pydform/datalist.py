@@ -0,0 +1,197 @@
+"""searchable inputs for large enums, with the members in a datalist or behind an endpoint
+
+an enum field with at least `pydform.plan.LARGE_ENUM_SIZE` members, or with
+`enum_search=True` in the field extra (`enum_search=False` keeps the select),
+is planned as a text input whose `list` names a `<datalist>` of the members.
+the datalists are written once per enum at the end of the form, so a page
+carries each large enum once however many fields and dict entries use it.
+
+with the `enum_search` option set to an options uri the datalists are written
+empty, and datalist.js fills them as the user types with the members starting
+with the typed text, fetched from `OptionsApp`; the page carries no members:
+
+    app.mount("/options", pydform.datalist.OptionsApp([Country, Currency]))
+
+    pydform.asform({"model": User, "uri": "/users", "options": {"enum_search": "/options"}})
+
+the endpoint answers from a sorted index of each enum's values built once per
+enum, a prefix search is a bisection and one page slice.
+"""
+import bisect
+import hashlib
+import json
+import logging
+import weakref
+
+from html import escape
+from typing import NamedTuple, Tuple
+from urllib.parse import parse_qs, quote
+
+from .cache import FormCache
+from .html import enum_options
+from .plan import FormPlan, enum_values, text_node
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+DATALIST = """
+<datalist id='{id}'>{options}</datalist>
+"""
+
+REMOTE_DATALIST = """
+<datalist id='{id}' data-options='{uri}'></datalist>
+"""
+
+# options per response of OptionsApp, `size` may ask for up to MAX_PAGE_SIZE
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+CONTENT_TYPE = b"application/json"
+
+
+def options_uri(uri: str, enum_type) -> str:
+  """return the uri of the options of an Enum class served by `OptionsApp` mounted at uri"""
+  return "%s/%s" % (uri.rstrip("/"), quote(enum_type.__name__))
+
+
+# (plan, result) keyed by (model, id(plan), uri), the plan is kept so its id is not reused
+# NB: plans are tuples, they cannot be weakly referenced
+_datalist_plans = FormCache(maxsize=256)
+
+
+def datalist_plan(plan: FormPlan, uri: str = None) -> FormPlan:
+  """return plan with the datalists of its searchable enum inputs appended
+
+     uri: str, options endpoint (see `OptionsApp`), None writes the members
+          into the datalists
+
+     returns plan itself when it has no searchable inputs; computed once per
+     plan and uri
+  """
+  key = (plan.model, id(plan), uri)
+  cached, result = _datalist_plans.get(key, (None, None))
+
+  if cached is plan:
+    return result
+
+  datalists = {}
+  stack = list(reversed(plan.nodes))
+
+  while stack:
+    node = stack.pop()
+
+    if node.handler == "enum_search" and node.text not in datalists:
+      if uri is None:
+        datalists[node.text] = DATALIST.format(id=node.text, options=enum_options(node.options).html)
+      else:
+        datalists[node.text] = REMOTE_DATALIST.format(
+          id=node.text, uri=escape(options_uri(uri, node.desc.inner_type), quote=True)
+        )
+
+    stack.extend(reversed(node.children))
+
+  result = plan
+
+  if datalists:
+    logger.info("[%s] %d datalists", plan.model.__name__, len(datalists))
+    result = FormPlan(plan.model, plan.nodes + (text_node("_datalists", "".join(datalists.values())),))
+
+  _datalist_plans.put(key, (plan, result))
+  return result
+
+
+class EnumIndex(NamedTuple):
+  """the values of an enum sorted for case insensitive prefix search
+
+     keys: casefolded values in sorted order
+     values: the values, in the order of keys
+  """
+  keys: Tuple[str, ...]
+  values: Tuple[str, ...]
+
+  def search(self, prefix: str = "", page: int = 0, size: int = PAGE_SIZE) -> Tuple[Tuple[str, ...], bool]:
+    """return (values starting with prefix on page, true if there are more pages)"""
+    prefix = prefix.casefold()
+
+    # NB: the matches are contiguous from the first key >= prefix
+    start = bisect.bisect_left(self.keys, prefix) + page * size
+    stop = start
+
+    while stop < len(self.keys) and stop - start <= size and self.keys[stop].startswith(prefix):
+      stop += 1
+
+    return self.values[start:min(stop, start + size)], stop - start > size
+
+
+# EnumIndex keyed by Enum class, weak so the classes of reloaded models are freed
+_enum_indexes = weakref.WeakKeyDictionary()
+
+
+def enum_index(enum_type) -> EnumIndex:
+  """return the EnumIndex of an Enum class, built once per class"""
+  try:
+    return _enum_indexes[enum_type]
+  except KeyError:
+    pass
+
+  pairs = sorted((v.casefold(), v) for v in enum_values(enum_type))
+
+  index = _enum_indexes[enum_type] = EnumIndex(tuple([k for k, _ in pairs]), tuple([v for _, v in pairs]))
+  return index
+
+
+class OptionsApp:
+  """ASGI application serving the members of large enums for searchable inputs
+
+     GET `<mount>/<enum name>?prefix=<text>&page=<n>&size=<n>` returns
+     `{"options": [...], "more": bool}` with the values starting with prefix
+     (case insensitive) in sorted order, a page of `size` (default PAGE_SIZE)
+     at a time, with an etag; other enums are 404, a bad page or size is 400.
+
+     enums: iterable of Enum classes, served by `__name__`
+  """
+  def __init__(self, enums=()):
+    self.enums = {enum_type.__name__: enum_type for enum_type in enums}
+
+  def add(self, enum_type):
+    """serve the options of enum_type, returns enum_type so it can decorate the class"""
+    self.enums[enum_type.__name__] = enum_type
+    return enum_type
+
+  async def __call__(self, scope, receive, send):
+    assert scope["type"] == "http"
+
+    status, body, headers = 404, b"", []
+    name = scope["path"].rsplit("/", 1)[-1]
+
+    if scope["method"] not in ("GET", "HEAD"):
+      status, headers = 405, [(b"allow", b"GET, HEAD")]
+    elif name in self.enums:
+      query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+
+      try:
+        page = int(query.get("page", ["0"])[0])
+        size = int(query.get("size", [str(PAGE_SIZE)])[0])
+      except ValueError:
+        page = size = -1
+
+      if page < 0 or not 0 < size <= MAX_PAGE_SIZE:
+        status = 400
+      else:
+        options, more = enum_index(self.enums[name]).search(query.get("prefix", [""])[0], page, size)
+        body = json.dumps({"options": options, "more": more}).encode("utf-8")
+        etag = ('"%s"' % hashlib.sha256(body).hexdigest()[:16]).encode("ascii")
+        headers = [(b"etag", etag), (b"cache-control", b"no-cache")]
+
+        if etag in dict(scope.get("headers", [])).get(b"if-none-match", b""):
+          status, body = 304, b""
+        else:
+          status = 200
+          headers.append((b"content-type", CONTENT_TYPE))
+
+    headers.append((b"content-length", str(len(body)).encode("ascii")))
+
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body if scope["method"] != "HEAD" else b""})
@@ -0,0 +1,185 @@
+"""on-disk cache of rendered forms shared by worker processes
+
+entries are files named by a hash of the model schema, the submission uri,
+the rendering options, the compile settings (`MAX_DEPTH`, `LARGE_ENUM_SIZE`)
+and the renderer version (a digest of the pydform sources), so a changed
+model or renderer misses instead of serving a stale form. files are read
+through read-only memory maps, so every worker on a host shares one copy of
+the pages and a new worker starts warm.
+
+    pydform.cache.use_disk_cache("/var/cache/pydform")
+"""
+import functools
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+from . import plan
+from .backend import model_schema
+from .cache import FormCache
+
+
+SUFFIX = ".html"
+
+# number of entry hashes and of open memory maps kept by a DiskFormCache
+HASHES_SIZE = 4096
+MAPS_SIZE = 256
+
+
+@functools.lru_cache(maxsize=None)
+def renderer_version() -> str:
+  """return a digest of the pydform sources, which changes whenever the rendered html can
+
+     NB: computed once per process, the files are read on the first disk cache lookup
+  """
+  h = hashlib.sha256()
+  root = os.path.dirname(os.path.abspath(__file__))
+
+  for name in sorted(os.listdir(root)):
+    if name.endswith(".py"):
+      with open(os.path.join(root, name), "rb") as f:
+        h.update(name.encode())
+        h.update(b"\0")
+        h.update(f.read())
+
+  return h.hexdigest()[:12]
+
+
+def compile_settings(model) -> tuple:
+  """return the module settings the plan for model is compiled with"""
+  max_depth = getattr(getattr(model, "__config__", None), "pydform_max_depth", plan.MAX_DEPTH)
+  return (max_depth, plan.LARGE_ENUM_SIZE)
+
+
+def schema_hash(model, uri, options=None):
+  """return a stable hex digest of the model schema, uri, options, compile settings and renderer version"""
+  h = hashlib.sha256()
+  h.update(renderer_version().encode())
+  h.update(b"\0")
+  h.update(repr(compile_settings(model)).encode())
+  h.update(b"\0")
+  h.update(json.dumps(model_schema(model), sort_keys=True, default=str).encode())
+  h.update(b"\0")
+  h.update(str(uri).encode())
+  h.update(b"\0")
+  h.update(repr(sorted((options or {}).items())).encode())
+  return h.hexdigest()
+
+
+class DiskFormCache:
+  """directory of rendered forms keyed by `schema_hash`
+
+     path: str, directory for the cache files, created if missing
+
+     NB: the entry hashes and the memory maps are bounded LRUs; an evicted map
+     is closed when the last buffer returned for it is released
+  """
+  def __init__(self, path):
+    self.path = path
+    self._maps = OrderedDict()
+    self._hashes = FormCache(maxsize=HASHES_SIZE)
+    self._lock = threading.Lock()
+
+    os.makedirs(path, exist_ok=True)
+
+  def key(self, model, uri, options=None):
+    """return the entry hash, computed once per (model, uri, options, settings) in this process"""
+    k = (model, uri, tuple(sorted((options or {}).items())), compile_settings(model))
+    return self._hashes.get_or_build(k, lambda: schema_hash(model, uri, options))
+
+  def filename(self, digest):
+    return os.path.join(self.path, "%s-%s%s" % (renderer_version(), digest, SUFFIX))
+
+  def get_buffer(self, model, uri, options=None):
+    """return the entry as a read-only mmap (bytes-like), or None"""
+    digest = self.key(model, uri, options)
+
+    with self._lock:
+      try:
+        self._maps.move_to_end(digest)
+        return self._maps[digest]
+      except KeyError:
+        pass
+
+      try:
+        with open(self.filename(digest), "rb") as f:
+          m = self._maps[digest] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+      except (FileNotFoundError, ValueError):
+        # NB: ValueError is raised for an empty file
+        return None
+
+      # NB: not closed here, a caller may still hold it; the map is closed when released
+      while len(self._maps) > MAPS_SIZE:
+        self._maps.popitem(last=False)
+
+      return m
+
+  def get(self, model, uri, options=None):
+    """return the entry as a str, or None
+
+       NB: decoded on every call, keep the str only as long as the response;
+       `get_buffer` serves the shared pages without a copy
+    """
+    m = self.get_buffer(model, uri, options)
+    return m[:].decode("utf-8") if m is not None else None
+
+  def put(self, model, uri, html, options=None):
+    """write an entry atomically, so readers never see a partial file"""
+    target = self.filename(self.key(model, uri, options))
+    fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+
+    try:
+      with os.fdopen(fd, "wb") as f:
+        f.write(html.encode("utf-8"))
+      os.replace(tmp, target)
+    except BaseException:
+      os.unlink(tmp)
+      raise
+
+    return html
+
+  def prune(self, max_age=None):
+    """delete entries from other renderer versions and, if max_age is set,
+       entries not modified for max_age seconds
+
+       returns: int, number of files removed
+    """
+    now = time.time()
+    removed = 0
+
+    for name in os.listdir(self.path):
+      if not name.endswith(SUFFIX):
+        continue
+
+      filepath = os.path.join(self.path, name)
+      stale = not name.startswith("%s-" % renderer_version())
+
+      if not stale and max_age is not None:
+        stale = now - os.path.getmtime(filepath) > max_age
+
+      if stale:
+        os.unlink(filepath)
+        removed += 1
+
+    return removed
+
+  def close(self):
+    """release the memory maps"""
+    with self._lock:
+      for m in self._maps.values():
+        m.close()
+      self._maps.clear()
+
+    self._hashes.clear()
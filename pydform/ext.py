@@ -0,0 +1,340 @@
+"""jinja2 extension which precompiles forms into jinja templates
+
+each form is converted once into the source of a jinja template with a slot
+for the value, `required` flag and error message of every input, so
+rendering a form with per-request values is plain template execution:
+
+    env = jinja2.Environment(loader=..., extensions=["pydform.ext.FormExtension"])
+
+    {{ {"model": User, "uri": "/users", "defaults": user, "errors": errors} | asform | safe }}
+
+the template source is served by a loader the extension puts in front of the
+environment's own, so compiled templates are kept in the environment's
+template cache and in its `bytecode_cache` if one is configured.
+
+NB: requires jinja2, which is not a dependency of pydform
+"""
+import hashlib
+import logging
+
+import jinja2
+
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .cache import FormCache, make_key
+from .diskcache import compile_settings, schema_hash
+from .html import HANDLERS, iter_plan, render_node, value_string, write_enum_options, write_plan
+from .jinja import FORM_ATTRS, defaults_values, form_handlers, form_plan, form_value, write_form_tail
+from .plan import FieldNode, FormPlan
+from .writer import FragmentWriter, format_attrs
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+TEMPLATE_PREFIX = "pydform:"
+
+
+class TemplateWriter(FragmentWriter):
+  """FragmentWriter for jinja template source
+
+     html is escaped for jinja by `write`, template code is written by `code`
+  """
+  __slots__ = ()
+
+  def write(self, text: str):
+    """append html, any `{` is emitted by an expression so it cannot start a jinja tag"""
+    if "{" in text:
+      text = text.replace("{", "{{ '{' }}")
+
+    super().write(text)
+
+  def code(self, text: str):
+    """append jinja template code"""
+    super().write(text)
+
+
+def literal(value) -> str:
+  """return value as a jinja literal"""
+  return repr(value)
+
+
+#
+# template handlers, write slots where the html handlers write values
+#
+def write_input_slots(w: TemplateWriter, key: str, required: bool):
+  """write the `required` and error class slots inside an opening tag"""
+  w.code("{%% if required.get(%s, %s) %%} required{%% endif %%}" % (key, required))
+  w.code("{%% if %s in errors %%} class='error'{%% endif %%}" % key)
+
+
+def write_error_slot(w: TemplateWriter, key: str):
+  """write the error message slot after an input"""
+  w.code("{%% if %s in errors %%}<span class='error'>{{ errors[%s]|e }}</span>{%% endif %%}" % (key, key))
+
+
+def template_for_single_type(w: TemplateWriter, node: FieldNode, values: dict = None):
+  """template handler for basic types (int, float, str, etc)"""
+  attrs = dict(node.attrs)
+  default = attrs.pop("value", None)
+  required = attrs.pop("required", None) is not None
+  placeholder = attrs.pop("placeholder", None)
+  key = literal(node.qualname)
+
+  w.tag("label", attrs={"for": node.qualname}, content=node.label)
+  w.write("<input %s" % format_attrs(attrs))
+
+  # NB: in the order of `html_for_single_type`, a value without default follows the other attributes
+  if default is not None:
+    write_value_slot(w, key, default)
+
+  write_input_slots(w, key, required)
+
+  if placeholder is not None:
+    w.write(" placeholder='%s'" % placeholder)
+
+  if default is None:
+    write_value_slot(w, key, None)
+
+  w.write("></input>")
+  write_error_slot(w, key)
+
+
+def write_value_slot(w: TemplateWriter, key: str, default):
+  """write the value slot inside an opening tag, falling back to default"""
+  w.code("{%% if %s in values %%} value='{{ values[%s]|e }}'" % (key, key))
+
+  if default is not None:
+    w.code("{% else %}")
+    w.write(" value='%s'" % default)
+
+  w.code("{% endif %}")
+
+
+def template_select_for_enum_type(w: TemplateWriter, node: FieldNode, values: dict = None):
+  """template handler for enums, the options are spliced in by `select_options`"""
+  key = literal(node.qualname)
+  default = dict(node.attrs).get("value")
+
+  w.tag("label", attrs={"for": node.qualname}, content=node.label)
+  w.write("<select %s" % format_attrs({"name": node.qualname, "id": node.qualname}))
+  write_input_slots(w, key, False)
+  w.write(">")
+  w.code("{{ pydform_select_options(%s, values.get(%s, %s)) }}" % (
+      literal(register_options(node.options)), key, literal(default)))
+  w.close("select")
+  write_error_slot(w, key)
+
+
+def template_for_value_node(w: TemplateWriter, node: FieldNode, handlers: dict):
+  """template handler for nodes rendered from structured values (dict entries, recursion points)
+
+     the node is written without values, and rendered per request with
+     `render_node_slot` when the template has a value for it
+  """
+  key = literal(node.qualname)
+  static = TemplateWriter()
+  write_plan(static, (node,), None, handlers)
+  static = static.getvalue()
+
+  w.code("{%% if values.get(%s) %%}{{ pydform_render_node(%s, values) }}{%% else %%}" % (
+      key, literal(register_node(node, handlers, static))))
+  w.code(static)
+  w.code("{% endif %}")
+
+
+def template_handlers(handlers: dict = None) -> dict:
+  """return the template handler table over a html handler table (default HANDLERS)"""
+  handlers = handlers or HANDLERS
+
+  return {
+    **handlers,
+    "bool": lambda w, node, values: template_for_single_type(w, node, values),
+    "datetime": lambda w, node, values: template_for_single_type(w, node, values),
+    "float": lambda w, node, values: template_for_single_type(w, node, values),
+    "int": lambda w, node, values: template_for_single_type(w, node, values),
+    "str": lambda w, node, values: template_for_single_type(w, node, values),
+    "enum": lambda w, node, values: template_select_for_enum_type(w, node, values),
+    "enum_search": lambda w, node, values: template_for_single_type(w, node, values),
+    "ConstrainedFloatValue": lambda w, node, values: template_for_single_type(w, node, values),
+    "ConstrainedIntValue": lambda w, node, values: template_for_single_type(w, node, values),
+    "dict": lambda w, node, values: template_for_value_node(w, node, handlers),
+    "recursive": lambda w, node, values: template_for_value_node(w, node, handlers),
+  }
+
+
+TEMPLATE_HANDLERS = template_handlers()
+
+
+#
+# enum options are shared with the html handlers and looked up by hash
+#
+_options = {}
+
+
+def register_options(options) -> str:
+  """keep the option values of an enum for `select_options`, return their key
+
+     NB: the key is stable between processes so it can be stored in the bytecode cache
+  """
+  key = hashlib.sha1("\0".join(options).encode("utf-8")).hexdigest()
+  _options[key] = options
+  return key
+
+
+def select_options(key: str, selected=None) -> Markup:
+  """return the options registered under key with selected spliced in"""
+  w = FragmentWriter()
+  write_enum_options(w, _options[key], None if selected is None else value_string(selected))
+  return Markup(w.getvalue())
+
+
+_nodes = {}
+
+
+def register_node(node: FieldNode, handlers: dict, static: str) -> str:
+  """keep node and its handler table for `render_node_slot`, return their key
+
+     static: str, the template source of node without values, stable between processes
+  """
+  key = hashlib.sha1(("%s\0%s" % (node.qualname, static)).encode("utf-8")).hexdigest()
+  _nodes[key] = (node, handlers)
+  return key
+
+
+def render_node_slot(key: str, values: dict) -> Markup:
+  """return the html of the node registered under key with the per-request values"""
+  node, handlers = _nodes[key]
+  return Markup(render_node(node, values, handlers))
+
+
+#
+# template source
+#
+def compile_template(plan: FormPlan, uri, handlers: dict = None) -> str:
+  """return the source of a jinja template rendering plan as a html form
+
+     the template takes `values` (per-request values keyed by input name, as
+     strings), `required` (input name to bool, overriding the model) and
+     `errors` (input name to message).
+
+     handlers: dict, html handler table, see `pydform.jinja.form_handlers`
+  """
+  w = TemplateWriter()
+  w.open("form", attrs=FORM_ATTRS)
+
+  for _ in iter_plan(w, plan.nodes, None, handlers=template_handlers(handlers)):
+    pass
+
+  write_form_tail(w, uri)
+  return w.getvalue()
+
+
+def template_values(values: dict) -> dict:
+  """convert per-request values to the strings used in the template slots
+
+     NB: dict values (dict entries, recursion points) are kept for `render_node_slot`
+  """
+  return {k: v if isinstance(v, dict) else value_string(v) for k, v in values.items() if v is not None}
+
+
+def template_name(model, uri, options=None) -> str:
+  """return the template name of a form, stable between processes
+
+     NB: ends with the digest of the model schema (as for the disk cache), so
+     models sharing a name (schema documents, `create_model`, reloaded
+     classes) get their own template unless their forms are the same
+  """
+  return "%s%s.%s:%s:%s:%s" % (
+    TEMPLATE_PREFIX, model.__module__, model.__qualname__, uri,
+    ",".join(["%s=%s" % (k, v) for k, v in sorted((options or {}).items())]),
+    schema_hash(model, uri, options)[:16],
+  )
+
+
+# number of forms an extension keeps, like the environment's template cache
+FORMS_SIZE = 1024
+
+
+class FormLoader(jinja2.BaseLoader):
+  """loads the template source of the forms registered with a FormExtension"""
+  def __init__(self, extension):
+    self.extension = extension
+
+  def get_source(self, environment, template):
+    if not template.startswith(TEMPLATE_PREFIX):
+      raise jinja2.TemplateNotFound(template)
+
+    form = self.extension.forms.get(template)
+
+    if form is None:
+      raise jinja2.TemplateNotFound(template)
+
+    model, uri, options = form
+
+    logger.info("compiling template '%s'", template)
+    return compile_template(form_plan(model, options), uri, form_handlers(options)), None, lambda: True
+
+
+class FormExtension(Extension):
+  """jinja2 extension adding an `asform` filter backed by precompiled templates
+
+     value must contain keys:
+     + model (or schema): as for `pydform.asform`, an instance renders an edit form
+     + uri: target uri for submission
+
+     value may contain keys:
+     + defaults: model instance or (nested) dict of initial values
+     + values: dict, per-request values keyed by input name, override defaults
+     + errors: dict, input name to error message
+     + required: dict, input name to bool, override the model's required fields
+     + options: dict of hashable rendering options
+  """
+  def __init__(self, environment):
+    super().__init__(environment)
+
+    # template names by form key, and the forms by template name
+    self.names = FormCache(maxsize=FORMS_SIZE)
+    self.forms = FormCache(maxsize=FORMS_SIZE)
+
+    loader = FormLoader(self)
+
+    if environment.loader is not None:
+      loader = jinja2.ChoiceLoader([loader, environment.loader])
+
+    environment.loader = loader
+    environment.filters["asform"] = self.asform
+    environment.globals["pydform_select_options"] = select_options
+    environment.globals["pydform_render_node"] = render_node_slot
+
+  def get_form_template(self, model, uri, options=None) -> jinja2.Template:
+    """return the compiled template for a form"""
+    key = make_key(model, uri, options) + compile_settings(model)
+    name = self.names.get(key)
+
+    if name is None:
+      name = self.names.put(key, template_name(model, uri, options))
+
+    if name not in self.forms:
+      self.forms.put(name, (model, uri, options))
+
+    return self.environment.get_template(name)
+
+  def asform(self, value) -> str:
+    model, uri, options, defaults, _ = form_value(value)
+    template = self.get_form_template(model, uri, options)
+
+    values = {}
+
+    if defaults:
+      values = defaults_values(form_plan(model, options), defaults)
+
+    values.update(value.get("values") or {})
+
+    return template.render(
+      values=template_values(values),
+      errors=value.get("errors") or {},
+      required=value.get("required") or {},
+    )
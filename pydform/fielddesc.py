@@ -1,39 +1,136 @@
 import logging
-import pydantic
+import re
+import sys
 
-from typing import Optional, Any
-from enum import Enum
+from typing import Any, NamedTuple, Optional
 
 
 logger = logging.getLogger(__name__)
 logger.propagate = True
 
 
+from .backend import ModelField, get_origin
 from .rtti import get_type_string, get_type_inner_info
 
 
-class FieldDesc:
-  """simple model to encapsulat the field info extracted from pydantic.typing
+class FieldAttributes(tuple):
+  """immutable (key, value) pairs of field attributes, read with `get`"""
+  __slots__ = ()
+
+  def get(self, key, default=None):
+    for k, v in self:
+      if k == key:
+        return v
+
+    return default
+
+  def asdict(self) -> dict:
+    return dict(self)
+
+
+# interned FieldAttributes and FieldDesc, shared by every model with the same fields
+# NB: the tables hold the field types, they are emptied when they reach INTERN_SIZE;
+# descriptors interned before are still valid, they are only no longer shared
+INTERN_SIZE = 65536
+
+_attributes = {}
+_descs = {}
+
+
+def clear_interned():
+  """forget the interned attributes and descriptors, see `pydform.rtti.clear_type_cache`"""
+  _attributes.clear()
+  _descs.clear()
+
+
+def field_attributes(attributes) -> FieldAttributes:
+  """return attributes (a dict or pairs) as the shared FieldAttributes with the same items
+
+     NB: values are compared with their type, so `1` and `True` (equal in
+     python) are kept apart; unhashable values are compared by repr
   """
-  __slots__ = (
-      "fieldname",
-      "parent",
-      "handler",
-      "inner_name",
-      "outer_type",
-      "inner_type",
-      "attributes"
-  )
+  if attributes.__class__ is FieldAttributes:
+    return attributes
+
+  items = tuple(attributes.items()) if isinstance(attributes, dict) else tuple(attributes)
+  key = tuple([(k, v.__class__, v) for k, v in items])
+
+  try:
+    return _attributes[key]
+  except KeyError:
+    pass
+  except TypeError:
+    key = tuple([(k, v.__class__, repr(v)) for k, v in items])
+
+    if key in _attributes:
+      return _attributes[key]
+
+  if len(_attributes) >= INTERN_SIZE:
+    _attributes.clear()
+
+  value = _attributes[key] = FieldAttributes(items)
+  return value
+
+
+class _FieldDesc(NamedTuple):
+  fieldname: str
+  parent: Optional[str] = None
+  handler: Optional[str] = None
+  inner_name: Any = None
+  outer_type: Any = None
+  inner_type: Any = None
+  attributes: FieldAttributes = FieldAttributes()
+
 
-  def __init__(self, **kwargs):
-    for k,v in kwargs.items():
-      setattr(self, k, v)
+class FieldDesc(_FieldDesc):
+  """immutable description of a field extracted from the model
 
-    if not hasattr(self, "attributes"):
-      setattr(self, "attributes", {})
+     fieldname: str, name of the field (or the dict/list placeholder)
+     parent: str, qualified name of the enclosing field
+     handler: str, key into `pydform.plan.PLANNERS`
+     inner_name, inner_type: container arguments, see `pydform.rtti.get_type_inner_info`
+     outer_type: the field type, or the container origin
+     attributes: FieldAttributes, e.g. `default`, `required`, `alias`, `placeholder`
+
+     equal descriptors are interned: constructing one returns the instance
+     already shared by other models when there is one
+  """
+  __slots__ = ()
+
+  def __new__(cls, fieldname, parent=None, handler=None, inner_name=None, outer_type=None, inner_type=None, attributes=()):
+    attributes = field_attributes(attributes)
+
+    # NB: the interned attributes are compared by identity, see `field_attributes`
+    key = (fieldname, parent, handler, inner_name, outer_type, inner_type, id(attributes))
+
+    try:
+      return _descs[key]
+    except KeyError:
+      pass
+    except TypeError:
+      key = None
+
+    desc = super().__new__(
+      cls,
+      sys.intern(fieldname),
+      sys.intern(parent) if parent is not None else None,
+      sys.intern(handler) if handler is not None else None,
+      inner_name,
+      outer_type,
+      inner_type,
+      attributes,
+    )
+
+    if key is not None:
+      if len(_descs) >= INTERN_SIZE:
+        _descs.clear()
+
+      _descs[key] = desc
+
+    return desc
 
   def asdict(self):
-    return {k:getattr(self, k) for k in self.__slots__ if hasattr(self, k)}
+    return self._asdict()
 
   def qualified_name(self):
     return ".".join([x for x in [self.parent, self.fieldname] if x is not None])
@@ -43,7 +140,24 @@ class FieldDesc:
     return "FieldDesc(%s)" % ",".join(["%s=%s" % (k,v) for k,v in self.asdict().items() if k not in ignore])
 
 
-def build_field_description(data: pydantic.fields.ModelField, parent=None) -> Optional[FieldDesc]:
+# v1 names union members after the unresolved annotation, e.g. `alt_ForwardRef('Node')`
+FORWARD_REF = re.compile(r"ForwardRef\((['\"])(.*?)\1\)")
+
+
+def field_name(data: ModelField) -> str:
+  """return the name of a field for element ids, with forward references named by their type
+
+     NB: quotes are dropped, the name is put in quoted html attributes and js strings
+  """
+  name = data.name
+
+  if "'" not in name and '"' not in name:
+    return name
+
+  return FORWARD_REF.sub(r"\2", name).replace("'", "").replace('"', "")
+
+
+def build_field_description(data: ModelField, parent=None) -> Optional[FieldDesc]:
   """build a dict which describes a field with all the stuff we need
 
      data: ModelField, pydantic model field datatype with annotations
@@ -54,18 +168,7 @@ def build_field_description(data: pydantic.fields.ModelField, parent=None) -> Op
   """
   # outer type is the container, or primitive
   # NB: get_origin returns None for BaseModel, so do `or getattr`
-  outer_type=pydantic.typing.get_origin(data.outer_type_) or getattr(data, "outer_type_")
-  outer_name=pydantic.typing.display_as_type(outer_type)
-  # inner type is the container arg or primitive.
-  inner_type=pydantic.typing.get_origin(data.type_) or getattr(data, "type_")
-  inner_name=pydantic.typing.display_as_type(inner_type)
-
-  sub_field_types = [x for x in data.sub_fields or []]
-  sub_field_names = [pydantic.typing.display_as_type(x) for x in data.sub_fields or []]
-
-#  logger.debug("[%s] data.outer_type_: '%s', data.type_: '%s'", data.name, str(data.outer_type_), str(data.type_))
-#  logger.debug("[%s] outer_type: '%s', inner_type: '%s', sub_fields: '%s'", data.name, str(outer_type), str(inner_type), str(sub_field_types))
-#  logger.debug("[%s] outer_name: '%s', inner_name: '%s', sub_names: '%s'", data.name, str(outer_name), str(inner_name), str(sub_field_names))
+  outer_type=get_origin(data.outer_type_) or getattr(data, "outer_type_")
 
   handler = get_type_string(outer_type)
   inner_type, inner_name = get_type_inner_info(data, handler)
@@ -89,14 +192,18 @@ def build_field_description(data: pydantic.fields.ModelField, parent=None) -> Op
 #  logger.debug("[%s] finfo.repr: '%s'", data.name, str(data.field_info.extra))
 #  logger.debug("[%s] meta: '%s'", data.name, str(data.metadata))
 
+  # NB: `enum_search` forces (or with False prevents) the searchable input for enums
+  if "enum_search" in data.field_info.extra:
+    attributes.update({"enum_search": bool(data.field_info.extra["enum_search"])})
+
   if "no_html" in data.field_info.extra:
     logger.warning("[%s] hidden by no_html attribute", data.name)
     return None
 
   return FieldDesc(
-    fieldname = data.name,
+    fieldname = field_name(data),
     parent = parent,
-    handler = get_type_string(outer_type),
+    handler = handler,
     inner_name = inner_name,
     outer_type = outer_type,
     inner_type = inner_type,
@@ -1,53 +1,72 @@
 import logging
-import pydantic
+
+from html import escape
+from typing import Dict, NamedTuple, Tuple
 
 
 logger = logging.getLogger(__name__)
 logger.propagate = True
 
 
-from .fielddesc import FieldDesc, build_field_description
-from .rtti import INPUT_TYPE_MAP, is_primitive_type, is_dict_type, get_type_string, is_basemodel_type
+from . import stats
+from .backend import ModelField
+from .cache import FormCache
+from .plan import FieldNode, PYDUnhandledTypeError, compile_property, expand_recursive_type, node_values, plan_values
+from .writer import FragmentWriter, HTMLConversionException, HTMLAttributeCreationError, format_attrs
 
 
+# handlers write into a FragmentWriter. container handlers write their opening
+# html and return (children, values, closing html) for `iter_plan` to continue with
 HANDLERS = {
   # primitive types
-  "bool": lambda name, d: html_for_single_type(name, d),
-  "datetime": lambda name, d: html_for_single_type(name, d),
-  "float": lambda name, d: html_for_single_type(name, d),
-  "int": lambda name, d: html_for_single_type(name, d),
-  "str": lambda name, d: html_for_single_type(name, d),
+  "bool": lambda w, node, values: html_for_single_type(w, node, values),
+  "datetime": lambda w, node, values: html_for_single_type(w, node, values),
+  "float": lambda w, node, values: html_for_single_type(w, node, values),
+  "int": lambda w, node, values: html_for_single_type(w, node, values),
+  "str": lambda w, node, values: html_for_single_type(w, node, values),
 
   # option types
-#  "enum": lambda name, d: html_for_enum_type(name, d),
-  "enum": lambda name, d: html_select_for_enum_type(name, d),
+#  "enum": lambda w, node, values: html_radio_group_for_enum_type(w, node, values),
+  "enum": lambda w, node, values: html_select_for_enum_type(w, node, values),
+  "enum_search": lambda w, node, values: html_for_single_type(w, node, values),
 
   # constrained values
-  "ConstrainedFloatValue": lambda name, d: html_for_constrained_type(name, d),
-  "ConstrainedIntValue": lambda name, d: html_for_constrained_type(name, d),
+  "ConstrainedFloatValue": lambda w, node, values: html_for_single_type(w, node, values),
+  "ConstrainedIntValue": lambda w, node, values: html_for_single_type(w, node, values),
 
   # nested types
-  "basemodel": lambda name, d: html_for_basemodel_type(name, d),
-  "dict": lambda name, d: html_for_dict_type(name, d),
-  "list": lambda name, d: html_for_list_type(name, d),
-  "Union": lambda name, d: html_for_union_type(name, d),
-  "tuple": lambda name, d: html_for_list_type(name, d),
+  "basemodel": lambda w, node, values: html_for_basemodel_type(w, node, values),
+  "dict": lambda w, node, values: html_for_dict_type(w, node, values),
+  "list": lambda w, node, values: html_for_list_type(w, node, values),
+  "Union": lambda w, node, values: html_for_union_type(w, node, values),
+  "tuple": lambda w, node, values: html_for_list_type(w, node, values),
+
+  # recursive models, see `pydform.plan.compile_type`
+  "recursive": lambda w, node, values: html_for_recursive_type(w, node, values),
+  "template": lambda w, node, values: html_for_type_template(w, node, values),
+
+  # literal html from the planner (errors, placeholders)
+  "text": lambda w, node, values: w.write(node.text),
 }
 
 
-class HTMLConversionException(Exception):
-  pass
-
-class HTMLAttributeCreationError(HTMLConversionException):
-  pass
 
-class PYDUnhandledTypeError(Exception):
-  pass
 
 
 #
 # html string emission
 #
+def open_tag(name: str, attrs: dict = None) -> str:
+  """build the opening half of a html tag"""
+  # FIXME: if attrs is empty we have a trailing space after the tag name
+  return "<%s %s>" % (name, format_attrs(attrs) if attrs is not None else "")
+
+
+def close_tag(name: str) -> str:
+  """build the closing half of a html tag"""
+  return "</%s>" % name
+
+
 def make_tag(name: str, attrs: dict = None, content: str = None) -> str:
   """build a html tag with attributes and content
 
@@ -56,129 +75,251 @@ def make_tag(name: str, attrs: dict = None, content: str = None) -> str:
      content: string to include between the tag
 
      returns string containing a html fragment
+
+     NB: handlers use `FragmentWriter.tag` to avoid building the intermediate string
   """
   # FIXME: if the content is None, emit a self-closing tag
-  if attrs is not None:
+  return "".join((open_tag(name, attrs), content or "", close_tag(name)))
+
+
+#
+# compiled plan rendering
+#
+# marks the end of a container on the `iter_plan` stack
+END = object()
+
+
+def iter_plan(w: FragmentWriter, nodes, values: dict = None, handlers: dict = None):
+  """render a sequence of compiled nodes (e.g. `FormPlan.nodes`) into w depth-first
+
+     w: FragmentWriter, receives the html
+     nodes: sequence of FieldNode from `pydform.plan`
+     values: dict[str, Any], per-request values keyed by input name
+     handlers: dict, handler table to use instead of HANDLERS
+
+     yields None after each node is written, so callers can drain w
+
+     NB: an explicit stack is used so the cost per node does not grow with depth
+  """
+  stack = [(node, values) for node in reversed(nodes)]
+  handlers = handlers or HANDLERS
+  instrument = stats.active
+
+  while stack:
+    node, node_values = stack.pop()
+
+    # closing html of a container
+    if isinstance(node, str):
+      w.write(node)
+      continue
+
+    # end of a container when instrumented, node_values holds the node
+    if node is END:
+      instrument.end("render", node_values.handler, node_values.qualname or node_values.name)
+      continue
+
     try:
-      attr_list =["%s='%s'" % (k, v) for k,v in attrs.items() if len(str(v)) > 1]
-      attr_list+=[k for k,v in attrs.items() if len(str(v)) == 0]
-    except TypeError as e:
-      #logger.exception("failed to build attributes from '%s' [%s]", str(attrs), str(e))
-      raise HTMLAttributeCreationError from e
+      handler = handlers[node.handler]
+    except KeyError as e:
+      logger.error("[%s] no handler for type '%s' [%s]", node.name, node.handler, str(e))
+      continue
 
-    # NB: add a leading space to separate from the tagname
-    attrs = " ".join(attr_list)
+    if instrument is not None:
+      instrument.begin()
 
-  # FIXME: if attrs is empty we have a trailing space after the tag name
-  return """<{tag} {attrs}>{content}</{tag}>""".format(
-      tag=name,
-      attrs=attrs or "",
-      content=content or ""
-  )
+    container = handler(w, node, node_values)
 
+    if container is not None:
+      children, children_values, tail = container
 
-def html_for_single_type(name, d: FieldDesc, *, id=None, label_content=None):
-  """handler for basic types (int, float, str, etc)
+      if instrument is not None:
+        stack.append((END, node))
 
-     name: str, text to display for this form element
-     d: datatype information to render the element
+      if tail:
+        stack.append((tail, None))
 
-     returns str html fragment
+      stack.extend([(child, children_values) for child in reversed(children)])
+    elif instrument is not None:
+      instrument.end("render", node.handler, node.qualname or node.name)
 
-     TODO: name and form-id should be different
+    yield
+
+
+def write_plan(w: FragmentWriter, nodes, values: dict = None, handlers: dict = None):
+  """render a sequence of compiled nodes into w"""
+  for _ in iter_plan(w, nodes, values, handlers):
+    pass
+
+
+def render_node(node: FieldNode, values: dict = None, handlers: dict = None) -> str:
+  """render a compiled node to a html string"""
+  return render_plan((node,), values, handlers)
+
+
+def render_plan(nodes, values: dict = None, handlers: dict = None) -> str:
+  """render a sequence of compiled nodes to a html string"""
+  w = FragmentWriter()
+  write_plan(w, nodes, values, handlers)
+  return w.getvalue()
+
+
+def lookup_value(node: FieldNode, values: dict = None, *, escaped=True):
+  """return the per-request value for node as a string, or None
+
+     lists are joined with `,` like the `_<field>-list` inputs, enum members
+     are replaced by their value and the result is html escaped unless escaped=False
   """
-  el_id = d.qualified_name()
-  el_name = el_id
-  el_content = label_content or d.attributes.get("alias") or name
+  if not values or node.qualname not in values:
+    return None
 
-  attrs = dict(
-    type=INPUT_TYPE_MAP[d.handler],
-    id=el_id,
-    name=el_name,
-  )
+  value = value_string(values[node.qualname])
 
-  if d.attributes.get("default"):
-    attrs.update({"value": d.attributes.get("default")})
+  return escape(value, quote=True) if escaped else value
 
-  if d.attributes.get("required"):
-    attrs.update({"required": ""})
 
-  if d.attributes.get("placeholder"):
-    attrs.update({"placeholder": d.attributes["placeholder"]})
+def value_string(value) -> str:
+  """return a per-request value as the string put in an input"""
+  if isinstance(value, (list, tuple)):
+    value = ",".join([str(v) for v in value])
 
-  return "".join((
-      make_tag("label", attrs={"for": el_id}, content=el_content),
-      make_tag("input", attrs)
-  ))
+  return str(getattr(value, "value", value))
 
 
-def html_select_for_enum_type(name, d: FieldDesc):
-  """convert an enum type to a html select dropdown"""
-#  id = ".".join([x for x in (d["parent"], d["fieldname"]) if x is not None])
-  el_id = d.qualified_name()
-  el_name = el_id
+class EnumOptions(NamedTuple):
+  """rendered `<option>` elements for a set of enum values
 
-  print(d.inner_type)
-  print(",".join([e.value for e in d.inner_type]))
+     html: str, all options with nothing selected
+     spans: dict[str, (int, int)], position of each value's option in html
+  """
+  html: str
+  spans: Dict[str, Tuple[int, int]]
 
-  # FIXME: add required to select
-  # FIXME: default value
-  select_group = "".join([make_tag("option", attrs=dict(value=e.value), content=e.value) for e in d.inner_type])
 
-  print(select_group)
+# EnumOptions keyed by option values, shared by every select for the same enum
+_enum_options = {}
 
-  return "".join((
-      make_tag("label", attrs={"for": el_name}, content=name),
-      make_tag("select", attrs={"name": el_name, "id": el_id}, content=select_group)
-  ))
 
+def enum_options(options: Tuple[str, ...]) -> EnumOptions:
+  """return the rendered options for a tuple of enum values, built once per enum"""
+  try:
+    return _enum_options[options]
+  except KeyError:
+    pass
 
-def html_radio_group_for_enum_type(name, d: FieldDesc, *, required=False):
-  """convert an enum type to a html radio group"""
-  radio_group = "".join([
-      html_for_single_type(name,
-          FieldDesc(fieldname=name, handler="enum"),
-          id=e.value
-      ) for e in d.inner_type
-  ])
+  fragments = [make_tag("option", attrs=dict(value=v), content=v) for v in options]
+  spans, offset = {}, 0
 
-  return """<fieldset><legend>{name}</legend>{inputs}</fieldset>""".format(
-    name=name,
-    inputs=radio_group
-  )
+  for v, fragment in zip(options, fragments):
+    spans.setdefault(v, (offset, offset + len(fragment)))
+    offset += len(fragment)
 
+  result = _enum_options[options] = EnumOptions("".join(fragments), spans)
+  return result
 
-def html_for_constrained_type(name, d):
-  """handler for constrained types which adds range bounds to the html controls
 
-     TODO
+def html_for_single_type(w: FragmentWriter, node: FieldNode, values: dict = None):
+  """handler for basic types (int, float, str, etc)
+
+     w: FragmentWriter, receives the html
+     node: compiled node with the input attributes
+     values: per-request values keyed by input name
+
+     TODO: name and form-id should be different
   """
-  logger.warning("Constrained*Value converted to HTML with no range values")
-  return html_for_single_type(name, d)
+  attrs = dict(node.attrs)
+
+  value = lookup_value(node, values)
 
+  if value is not None:
+    attrs["value"] = value
 
-def html_for_primitive_type(name, d: FieldDesc, **kwargs):
-  """convert a primitive type (str, int, etc) to HTML
+  w.tag("label", attrs={"for": node.qualname}, content=node.label)
+  w.tag("input", attrs)
 
-     name: str, name of the type
 
-     # FIXME: remove
+def html_select_for_enum_type(w: FragmentWriter, node: FieldNode, values: dict = None):
+  """convert an enum type to a html select dropdown
+
+     the options come from `enum_options` and the selected value (per-request
+     or default) is spliced in, so the options are only built once per enum
   """
-  if d.handler == "enum":
-    return html_select_for_enum_type(name, d)
-  elif d.handler in ("str", "int", "datetime", "bool", "float"):
-    return html_for_single_type(name, d, **kwargs)
-  elif d.handler in ("ConstrainedIntValue", "ConstrainedFloatValue"):
-    return html_for_constrained_type(name, d)
+  el_id = node.qualname
+  el_name = el_id
+
+  selected = lookup_value(node, values, escaped=False)
+
+  if selected is None:
+    selected = dict(node.attrs).get("value")
+
+  w.tag("label", attrs={"for": el_name}, content=node.label)
+  # FIXME: add required to select
+  w.open("select", attrs={"name": el_name, "id": el_id})
+
+  write_enum_options(w, node.options, selected)
+  w.close("select")
+
+
+def write_enum_options(w: FragmentWriter, options: Tuple[str, ...], selected: str = None):
+  """write the shared options for an enum with selected spliced in"""
+  options = enum_options(options)
+  span = options.spans.get(selected) if selected is not None else None
+
+  if span is None:
+    w.write(options.html)
   else:
-    logger.warning("[%s] unhandled primitve type '%s'", name, str(d.handler))
-    raise PYDUnhandledTypeError
+    w.write(options.html[:span[0]])
+    w.tag("option", attrs=dict(value=selected, selected=""), content=selected)
+    w.write(options.html[span[1]:])
+
+
+def html_radio_group_for_enum_type(w: FragmentWriter, node: FieldNode, values: dict = None):
+  """convert an enum type to a html radio group"""
+  selected = lookup_value(node, values, escaped=False)
+
+  if selected is None:
+    selected = dict(node.attrs).get("value")
+
+  w.write("<fieldset><legend>%s</legend>" % node.name)
+
+  for v in node.options:
+    w.tag("label", attrs={"for": "%s-%s" % (node.qualname, v)}, content=v)
+    w.tag("input", attrs={
+        "type": "radio",
+        "id": "%s-%s" % (node.qualname, v),
+        "name": node.qualname,
+        "value": v,
+        **({"checked": ""} if v == selected else {})
+    })
+
+  w.write("</fieldset>")
 
 
 #
 # convert types to html
 #
-def html_for_dict_type(name, d: FieldDesc):
+DICT_ENTRY_HEAD = """
+<fieldset name='{name}-items' class='collapsible'>
+"""
+
+DICT_ENTRY_TAIL = """
+<a id='{name}-remove-button' href='#' onclick='remove_item("{fieldname}", "{name}-template", "{name}-section"); return false;'>remove</a>
+</fieldset>
+"""
+
+DICT_SECTION_HEAD = """
+<section id='{name}-section'>
+<h3 onclick="collapsible('{name}-items'); return false;">{name}</h3>
+<div>
+<a id='{name}-add-button' href='#' onclick='duplicate_item("{fieldname}", "{name}-template", "{name}-section"); return false;'>add</a>
+</div>
+<template id='{name}-template'>""" + DICT_ENTRY_HEAD
+
+DICT_SECTION_TAIL = DICT_ENTRY_TAIL + """</template>
+</section>
+"""
+
+
+def html_for_dict_type(w: FragmentWriter, node: FieldNode, values: dict = None):
   """convert a dict to HTML
 
      this type requires an editable key-value pair
@@ -190,198 +331,298 @@ def html_for_dict_type(name, d: FieldDesc):
      the `value` name string with the value of the `_<fieldname>-key` element
      so we can construct dicts with key values entered by users. difficult.
   """
-  fieldname = "_%s-key" % d.fieldname
-  parentname = d.fieldname
-  attrs = d.attributes
-
-  # create the key type placeholder
-  if is_primitive_type(d.inner_name["key"]):
-    f = FieldDesc(
-      fieldname=fieldname,
-      parent=d.fieldname,
-      inner_type=d.inner_type["key"],
-      inner_name=d.inner_name["key"],
-      handler = get_type_string(d.inner_type["key"]),
-      attributes={**{"default": "01"}, **attrs},
-    )
-    # NB: using d.inner_name[value] here means dict types will use the inner name
-    # as the reference (usually this is a nice mnemoic "address" for "addresses" container)
-    # but it might look shit at other times.
-    if is_primitive_type(d.inner_name["value"]) or is_dict_type(d.inner_type["value"]):
-      label_content="reference"
-    elif is_basemodel_type(d.inner_type["value"]):
-      label_content=d.inner_name["value"]
+  fmt = dict(name=node.name, fieldname="_%s-key" % node.desc.fieldname)
+
+  w.write(DICT_SECTION_HEAD.format(**fmt))
+
+  # NB: the template entry is a placeholder so per-request values are not applied
+  entries = values.get(node.qualname) if values else None
+
+  if not entries:
+    return node.children, None, DICT_SECTION_TAIL.format(**fmt)
+
+  tail = FragmentWriter()
+  tail.write(DICT_ENTRY_TAIL.format(**fmt))
+  tail.write("</template>\n")
+  write_dict_entries(tail, node, entries)
+  tail.write("</section>\n")
+
+  return node.children, None, tail.getvalue()
+
+
+#
+# prefilled dict entries
+#
+class DictEntrySlot(NamedTuple):
+  """a hole in a precompiled dict entry
+
+     kind: "name" (entry placeholder), "value" (input value attribute), "options"
+           (enum), "recursive" (recursion point) or "dict" (nested dict section)
+     key: str, format for the entry index (e.g. `_<fieldname>-%d-key`), the
+          input name, or the format of the numbered entry name for "recursive"
+          and "dict"
+     node: FieldNode, the input for "value" and "options" slots, the recursion point
+           or the dict section
+     default: str, the value when the entry has none, the entry name for "recursive"
+              and "dict"
+  """
+  kind: str
+  key: str
+  node: FieldNode = None
+  default: str = None
+
+
+class DictEntryWriter(FragmentWriter):
+  """FragmentWriter which also records slots, for `compile_dict_entry`"""
+  __slots__ = ()
+
+  def slot(self, slot: DictEntrySlot):
+    self.parts.append(slot)
+
+
+def entry_for_single_type(w: DictEntryWriter, node: FieldNode, values: dict = None):
+  """write an input with a slot for its value"""
+  attrs = dict(node.attrs)
+  default = attrs.pop("value", None)
+
+  w.tag("label", attrs={"for": node.qualname}, content=node.label)
+  w.write("<input %s" % format_attrs(attrs))
+  w.slot(DictEntrySlot("value", node.qualname, node, default))
+  w.write("></input>")
+
+
+def entry_for_recursive_type(w: DictEntryWriter, node: FieldNode, values: dict = None):
+  """write a slot for a recursion point, expanded when the entry has values for it"""
+  w.slot(DictEntrySlot("recursive", None, node))
+
+
+def entry_for_dict_type(w: DictEntryWriter, node: FieldNode, values: dict = None):
+  """write a slot for a nested dict section, filled when the entry has values for it"""
+  w.slot(DictEntrySlot("dict", None, node))
+
+
+def entry_select_for_enum_type(w: DictEntryWriter, node: FieldNode, values: dict = None):
+  """write a select with a slot for its options"""
+  w.tag("label", attrs={"for": node.qualname}, content=node.label)
+  w.open("select", attrs={"name": node.qualname, "id": node.qualname})
+  w.slot(DictEntrySlot("options", node.qualname, node, dict(node.attrs).get("value")))
+  w.close("select")
+
+
+ENTRY_HANDLERS = {
+  **HANDLERS,
+  "bool": lambda w, node, values: entry_for_single_type(w, node, values),
+  "datetime": lambda w, node, values: entry_for_single_type(w, node, values),
+  "float": lambda w, node, values: entry_for_single_type(w, node, values),
+  "int": lambda w, node, values: entry_for_single_type(w, node, values),
+  "str": lambda w, node, values: entry_for_single_type(w, node, values),
+  "enum": lambda w, node, values: entry_select_for_enum_type(w, node, values),
+  "enum_search": lambda w, node, values: entry_for_single_type(w, node, values),
+  "recursive": lambda w, node, values: entry_for_recursive_type(w, node, values),
+  "dict": lambda w, node, values: entry_for_dict_type(w, node, values),
+  "ConstrainedFloatValue": lambda w, node, values: entry_for_single_type(w, node, values),
+  "ConstrainedIntValue": lambda w, node, values: entry_for_single_type(w, node, values),
+}
+
+
+# compiled entries keyed by id(node), with the node so its id is not reused while cached
+# NB: nodes are tuples, they cannot be weakly referenced; bounded like `pydform.plan.plan_cache`
+_dict_entries = FormCache(maxsize=1024)
+
+
+def compile_dict_entry(node: FieldNode):
+  """return the parts of a dict entry for node as a list of str and DictEntrySlot
+
+     the entry is the template entry of the dict section with the key/value
+     placeholders (`_<fieldname>-key`, `_<fieldname>-value`) and input values
+     left as slots, compiled once per node.
+  """
+  cached, parts = _dict_entries.get(id(node), (None, None))
+
+  if cached is node:
+    return parts
+
+  fmt = dict(name=node.name, fieldname="_%s-key" % node.desc.fieldname)
+  placeholders = ("_%s-key" % node.desc.fieldname, "_%s-value" % node.desc.fieldname)
+
+  w = DictEntryWriter()
+  w.write(DICT_ENTRY_HEAD.format(**fmt))
+
+  for _ in iter_plan(w, node.children, None, handlers=ENTRY_HANDLERS):
+    pass
+
+  w.write(DICT_ENTRY_TAIL.format(**fmt))
+
+  # join the html between slots and cut out the placeholders
+  parts, text = [], []
+
+  def flush():
+    html = "".join(text)
+    text.clear()
+
+    for placeholder in placeholders:
+      html = html.replace(placeholder, "\0%s\0" % placeholder)
+
+    for i, piece in enumerate(html.split("\0")):
+      if i % 2:
+        parts.append(DictEntrySlot("name", "%s-%%d-%s" % tuple(piece.rsplit("-", 1))))
+      elif piece:
+        parts.append(piece)
+
+  # NB: the fields of an entry are named under its key input
+  entry = "%s._%s-key" % (node.qualname, node.desc.fieldname)
+  numbered = "%s._%s-%%d-key" % (node.qualname, node.desc.fieldname)
+
+  for part in w.parts:
+    if isinstance(part, DictEntrySlot):
+      flush()
+
+      if part.kind in ("recursive", "dict"):
+        part = part._replace(key=numbered, default=entry)
+
+      parts.append(part)
     else:
-      label_content=None
+      text.append(part)
 
-    keys_html = html_for_primitive_type(f"{name}-key", f, label_content=label_content)
-  else:
-    logger.warning("[%s] no input for dict fields", name)
-    keys_html = """<div>KEYTYPE</div>"""
-
-  # create the value type form
-  if is_primitive_type(d.inner_name["value"]):
-    f = FieldDesc(
-      fieldname="_%s-value" % d.fieldname,
-      parent=d.fieldname,
-      inner_type=d.inner_type["value"],
-      inner_name=d.inner_name["value"],
-      handler=d.inner_name["value"],
-      attributes=attrs,
-    )
-
-    print("f: %s" % str(f))
-    values_html = html_for_primitive_type(f"{name}-value", f, label_content="value")
-  elif is_basemodel_type(d.inner_type["value"]):
-    f = FieldDesc(
-      fieldname=fieldname,
-      parent=d.fieldname,
-      inner_type=d.inner_type["value"],
-      inner_name=d.inner_name["value"],
-      handler="basemodel",
-      attributes = attrs,
-    )
-    values_html = html_for_basemodel_type(name, f)
-  elif is_dict_type(d.inner_type["value"]):
-    logger.debug("[%s] %s", name, str(d))
-
-    f = FieldDesc(
-      fieldname=fieldname,
-      parent=d.fieldname,
-      inner_type=d.inner_type["value"],
-      inner_name=d.inner_name["value"],
-      handler="basemodel",
-#      handler="dict",
-      attributes = attrs,
-    )
-    values_html = html_for_dict_type(name, d)
-  else:
-    logger.warning("unhandled inner-name: '%s'", str(d.inner_type["value"]))
-    return "[%s]ERROR[%s]" % (name, "dict")
+  flush()
 
-  return """
-<section id='{name}-section'>
-<h3 onclick="collapsible('{name}-items'); return false;">{name}</h3>
-<div>
-<a id='{name}-add-button' href='#' onclick='duplicate_item("{fieldname}", "{name}-template", "{name}-section"); return false;'>add</a>
-</div>
-<template id='{name}-template'>
-<fieldset name='{name}-items' class='collapsible'>
-{keys}{values}
-<a id='{name}-remove-button' href='#' onclick='remove_item("{fieldname}", "{name}-template", "{name}-section"); return false;'>remove</a>
-</fieldset>
-</template>
-</section>
-""".format(
-    fieldname=fieldname,
-    name=name,
-    keys=keys_html,
-    values=values_html
-  )
+  _dict_entries.put(id(node), (node, parts))
+  return parts
 
 
-def html_for_list_type(name, d: FieldDesc):
-  """convert a list to HTML
+def write_dict_entries(w: FragmentWriter, node: FieldNode, entries: dict):
+  """write a prefilled entry of the dict section node for each item of entries
 
-     name: str, reference name to use in the form id
-     d: type object, type info
+     the entries are named like the ones added by `duplicate_item` in append.js,
+     with the entry index in place of the random suffix, e.g. `_<fieldname>-0-key`;
+     nested dict sections and recursion points are rendered with their values
+  """
+  parts = compile_dict_entry(node)
+  keys_node, values_node = node.children
+
+  # NB: the entries are joined into one write, they can be many and small
+  out = []
+  append = out.append
+
+  for n, (k, v) in enumerate(entries.items()):
+    entry_values = {}
+    node_values(values_node, v, entry_values)
+
+    # NB: a recursion point value is named like the key input, which overwrites it
+    point = entry_values.get(values_node.qualname) if values_node.handler == "recursive" else None
+
+    node_values(keys_node, k, entry_values)
+
+    for part in parts:
+      if part.__class__ is str:
+        append(part)
+      elif part.kind == "name":
+        append(part.key % n)
+      elif part.kind == "value":
+        value = lookup_value(part.node, entry_values)
+
+        if value is None:
+          value = part.default
+
+        if value is not None:
+          append(" value='%s'" % value)
+      elif part.kind == "recursive":
+        # NB: renamed like the other inputs of the entry, before its values are looked up
+        qualname = part.key % n + part.node.qualname[len(part.default):]
+        data = point if part.node is values_node else entry_values.get(part.node.qualname)
+        append(render_node(part.node._replace(qualname=qualname), {qualname: data} if data else None))
+      elif part.kind == "dict":
+        # NB: rendered under the entry name, its inputs are named under it and renamed after
+        data = entry_values.get(part.node.qualname)
+        html = render_node(part.node, {part.node.qualname: data} if data else None)
+        append(html.replace(part.default + ".", part.key % n + "."))
+      else:
+        selected = lookup_value(part.node, entry_values, escaped=False)
+        options = FragmentWriter()
+        write_enum_options(options, part.node.options, part.default if selected is None else selected)
+        append(options.getvalue())
+
+  w.write("".join(out))
+
+
+def html_for_list_type(w: FragmentWriter, node: FieldNode, values: dict = None):
+  """convert a list to HTML
 
-     return: str, html fragment for list entry
+     w: FragmentWriter, receives the html
+     node: compiled list node, the child is the item input
+     values: per-request values keyed by input name
 
      # FIXME: this item is a placeholder for items appended to a list
      # FIXME: set the id as `new-value` and on edit commit that change to the form
   """
-#  logger.info("d: '%s'", str(d))
-  fieldname = "_%s-list" % d.fieldname
-
-  # FIXME: check the list values are primitive
-  if is_primitive_type(d.inner_name):
-    # FIXME: use HANDLERS
-    f=FieldDesc(
-      fieldname = fieldname,
-      parent = d.qualified_name(),
-      handler = "str", #d.inner_name,
-      outer_type = type(str), #d.inner_type,
-      inner_name = "str", #d.inner_name,
-      inner_type = type(str), #d.inner_type,
-      attributes = {},
-    )
-    values_html = html_for_primitive_type(fieldname, f)
-  else:
-    logger.warning("unhandled inner-name: [%s] '%s'", d.inner_name, str(d.inner_type))
-    return "[%s]ERROR[%s]" % (name, "list")
-
-  return """<section><h3>{name}</h3></section>{values}""".format(
-    name=name,
-    values=values_html
-  )
+  w.write("<section><h3>%s</h3></section>" % node.name)
+  return node.children, values, None
 
 
-def html_for_basemodel_type(name, d: FieldDesc):
+def html_for_basemodel_type(w: FragmentWriter, node: FieldNode, values: dict = None):
   """output html for a basemodel
   """
-  p = d.qualified_name()
+# NB: the header is off-putting in this format
+#  w.write("<section><h3>%s</h3></section>" % node.desc.inner_name)
 
-  try:
-    values_html = "".join([convert_property(field, parent=p) for _, field in d.inner_type.__fields__.items()])
-  except (AttributeError, TypeError) as e:
-    logger.exception("%s [%s]", str(d), str(e))
-    values_html = "NONE"
+  return node.children, values, None
 
-# NB: the header is off-putting in this format
-#  return """<section><h3>{name}</h3></section>{values}""".format(
-#    name=d.inner_name,
-#    values=values_html
-#  )
 
-  return values_html
+RECURSIVE_PLACEHOLDER = """
+<section id='{qualname}-recursive' class='pydform-recursive'>
+<h3 onclick="expand_recursive('{qualname}-recursive', '{template}', '{qualname}'); return false;">{name}</h3>
+</section>
+"""
+
+
+def html_for_recursive_type(w: FragmentWriter, node: FieldNode, values: dict = None):
+  """output the placeholder of a recursion point, expanded from its template by append.js
+
+     a recursion point with prefilled values is expanded here instead, so the
+     values below it are in the form
+  """
+  data = values.get(node.qualname) if values else None
+
+  if data:
+    expanded = expand_recursive_type(node)
+    return (expanded,), plan_values(expanded.children, data), None
+
+  w.write(RECURSIVE_PLACEHOLDER.format(qualname=node.qualname, template=node.text, name=node.name))
 
 
-def html_for_union_type(name: str, d: FieldDesc):
+def html_for_type_template(w: FragmentWriter, node: FieldNode, values: dict = None):
+  """output the recursion template of a model, the fields are named under `__path__`
+
+     NB: per-request values do not apply to the template
+  """
+  w.write("\n<template id='%s'>" % node.qualname)
+  return node.children, None, "</template>\n"
+
+
+def html_for_union_type(w: FragmentWriter, node: FieldNode, values: dict = None):
   """convert a union to HTML
 
-     name: name of the field
-     d: type info object
+     w: FragmentWriter, receives the html
+     node: compiled union node
+     values: per-request values keyed by input name
 
      FIXME: I have no idea how to handle a union in the UI; we should have a tabbed element
             with each tab having the different type in the union, but this requires some js
             and makes form submission difficult. For now we just take the first element.
   """
-  assert isinstance(d.inner_type, list)
-
-  p = d.qualified_name()
-
-  vals = [convert_property(alt, parent=p) for idx, alt in enumerate(d.inner_type)]
-
-  return """<section><h3>{name}</h3></section>{values}""".format(
-    name=name,
-    values=vals[0]
-  )
+  w.write("<section><h3>%s</h3></section>" % node.name)
+  return node.children, values, None
 
 
-def convert_property(data: pydantic.fields.ModelField, parent=None):
+def convert_property(data: ModelField, parent=None, values: dict = None):
   """convert a pydantic ModelField type to HTML
 
-     this is different to the python type handlers because it emits
-     a `fieldset` tag with the name of the field in the legend.
-     python type handlers simply emit the form elements
+     compiles the field with `pydform.plan.compile_property` and renders the result;
+     prefer `pydform.plan.get_plan` and `render_plan` to reuse the compiled form
   """
-  assert isinstance(data, pydantic.fields.ModelField)
+  node = compile_property(data, parent=parent)
 
-  # identify the type of the field
-  try:
-    field_desc = build_field_description(data, parent=parent)
-  except TypeError as e:
-    logger.error("[%s] bad type: '%s' [%s]", data.name, str(data), str(e))
-    return "[%s]ERROR[%s]" % (data.name, str(data))
-
-#  logger.debug("[%s]: %s", data.name, str(field_desc))
-
-  if field_desc is None:
+  if node is None:
     return ""
 
-  # process the type we discovered
-  try:
-    return HANDLERS[field_desc.handler](data.name, field_desc)
-  except KeyError as e:
-    logger.error("[%s] no handler for type '%s' [%s]", data.name, field_desc.handler, str(e))
+  return render_node(node, values)
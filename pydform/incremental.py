@@ -0,0 +1,308 @@
+"""incremental re-rendering of forms whose models change, for reloading servers and schema editors
+
+a form rendered with `render_update` is cut into fragments, one per plan node,
+cached by the node's qualified name and a digest of its compiled subtree
+(handler, names, attributes, options and the digests of its children). when
+the model changes (a module re-imported by `uvicorn --reload`, a schema
+document edited in an admin tool) the new plan is digested and only the nodes
+whose digest changed are rendered again, everything else is spliced from the
+cache. the update also lists the fragments to replace in a page showing the
+previous version, for `patch_fragments` in incremental.js:
+
+    update = pydform.incremental.render_update(User, "/users")
+    ... # User is reloaded with a changed nested model
+    update = pydform.incremental.render_update(User, "/users")
+    update.changed  # {fragment key: html} for `patch_fragments(form, changed)`
+
+forms are told apart by model name (module and qualified name), uri and
+options, so a reloaded class replaces the previous version of its form.
+fragments are delimited by `<!--pydform:<key>-->` comments, keyed by the
+node's qualified name (`FORM_KEY` for the whole form).
+
+NB: forms are rendered without per-request values; a node whose handler
+renders other children than its plan children (e.g. lazy dict sections) is
+replaced as a whole. digests are python hashes, they are only meaningful
+within the process, like the cache
+"""
+import logging
+import threading
+
+from typing import Dict, List, NamedTuple
+
+from .cache import FormCache
+from .html import HANDLERS, write_plan
+from .jinja import FORM_ATTRS, form_handlers, form_plan, write_form_tail
+from .plan import FieldNode, FormPlan
+from .writer import FragmentWriter
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+FRAGMENT_OPEN = "<!--pydform:%s-->"
+FRAGMENT_CLOSE = "<!--/pydform:%s-->"
+
+# key of the fragment holding all the fields of the form
+FORM_KEY = ""
+
+
+class NodeDigest(NamedTuple):
+  """the digests of a node in a plan, in depth-first order
+
+     key: str, fragment key, the qualified name (made unique in the plan)
+     digest: int, digest of the node and its subtree
+     shell: int, digest of the node without its children, but with their keys
+     size: int, number of nodes in the subtree, including the node
+  """
+  key: str
+  digest: int
+  shell: int
+  size: int
+
+
+class FormUpdate(NamedTuple):
+  """result of `render_update`
+
+     html: str, the form
+     changed: dict[str, str], fragment key to html for the fragments which
+              differ from the previous render of the form, empty if none did
+     rendered: int, number of nodes rendered, the others were spliced
+  """
+  html: str
+  changed: Dict[str, str]
+  rendered: int
+
+
+def digest_plan(plan: FormPlan) -> List[NodeDigest]:
+  """return the NodeDigest of the form and of every node of plan, depth-first"""
+  digests = [None]
+  seen = {}
+  keys, children = _digest_nodes(plan.nodes, digests, seen)
+
+  shell = _digest("form", plan.model.__name__, tuple(keys))
+  digests[0] = NodeDigest(FORM_KEY, _digest(shell, tuple(children)), shell, len(digests))
+  return digests
+
+
+def _digest(*parts) -> int:
+  """hash of parts, NB: in-process like the cache, falls back to repr for unhashable values"""
+  try:
+    return hash(parts)
+  except TypeError:
+    return hash(repr(parts))
+
+
+def _digest_nodes(nodes, digests: list, seen: dict):
+  """append the NodeDigest of nodes and their subtrees to digests
+
+     returns the keys and digests of nodes
+  """
+  keys, values = [], []
+
+  for node in nodes:
+    key = node.qualname or node.name
+
+    # NB: keys are unique in a plan, a repeated one gets its occurrence appended
+    if key in seen:
+      seen[key] += 1
+      key = "%s~%d" % (key, seen[key])
+    else:
+      seen[key] = 0
+
+    position = len(digests)
+    digests.append(None)
+    children_keys, children_digests = _digest_nodes(node.children, digests, seen)
+
+    # NB: attributes are digested as rendered, `1`, `True` and `1.0` are equal but render apart
+    shell = _digest(
+      node.handler, node.name, node.qualname, node.desc.fieldname if node.desc is not None else None,
+      tuple([(k, str(v)) for k, v in node.attrs]), node.label, node.options, node.text, tuple(children_keys),
+    )
+    digest = _digest(shell, tuple(children_digests))
+    digests[position] = NodeDigest(key, digest, shell, len(digests) - position)
+
+    keys.append(key)
+    values.append(digest)
+
+  return keys, values
+
+
+# rendered fragments keyed by (options, fragment key, digest)
+fragment_cache = FormCache(maxsize=4096)
+
+
+class FormState(NamedTuple):
+  """the last render of a form
+
+     plan: FormPlan rendered
+     digests: dict[str, NodeDigest] by fragment key
+     html: str, the form
+  """
+  plan: FormPlan
+  digests: Dict[str, NodeDigest]
+  html: str
+
+
+class FragmentRenderer:
+  """renders forms splicing cached fragments, and remembers the last render of each form
+
+     cache: FormCache of fragments, default `fragment_cache`
+  """
+  def __init__(self, cache: FormCache = None):
+    self.cache = fragment_cache if cache is None else cache
+    self.forms = {}
+    self._lock = threading.Lock()
+
+  def render(self, model, uri, options=None) -> FormUpdate:
+    """render the form for model, listing the fragments changed since its last render
+
+       model: pydantic.BaseModel derived class
+       uri: str, target uri for submission
+       options: dict, rendering options, see `pydform.jinja.form_handlers`
+    """
+    options = options or {}
+    name = form_name(model, uri, options)
+    plan = form_plan(model, options)
+
+    with self._lock:
+      previous = self.forms.get(name)
+
+    if previous is not None and previous.plan is plan:
+      return FormUpdate(previous.html, {}, 0)
+
+    digests = digest_plan(plan)
+    render = _Render(self.cache, tuple(sorted(options.items())), form_handlers(options) or HANDLERS, digests)
+
+    w = FragmentWriter()
+    w.open("form", attrs=FORM_ATTRS)
+    render.write_form(w, plan.nodes)
+    write_form_tail(w, uri)
+    html = w.getvalue()
+
+    if previous is None:
+      changed = {}
+    else:
+      changed = changed_fragments(digests, previous.digests, render)
+
+    logger.info("[%s] rendered %d of %d nodes, %d changed fragments",
+                model.__name__, render.rendered, len(digests), len(changed))
+
+    with self._lock:
+      self.forms[name] = FormState(plan, {d.key: d for d in digests}, html)
+
+    return FormUpdate(html, changed, render.rendered)
+
+  def forget(self, model, uri, options=None):
+    """drop the last render of a form, its next render has no changes"""
+    with self._lock:
+      self.forms.pop(form_name(model, uri, options or {}), None)
+
+
+class _Render:
+  """state of one render: walks the plan with its digests, depth-first"""
+  def __init__(self, cache: FormCache, options: tuple, handlers: dict, digests: List[NodeDigest]):
+    self.cache = cache
+    self.options = options
+    self.handlers = handlers
+    self.digests = digests
+    self.position = 0
+    self.rendered = 0
+
+    # html of the fragments written, by key
+    self.fragments = {}
+
+    # keys of the fragments whose children were written as fragments
+    self.expanded = set()
+
+  def write_form(self, w: FragmentWriter, nodes):
+    self.write_fragment(w, None, nodes)
+
+  def write_fragment(self, w: FragmentWriter, node: FieldNode, children=None):
+    """write the fragment of node (the form if node is None) from the cache, or render it"""
+    d = self.digests[self.position]
+    key = (self.options, d.key, d.digest)
+    html = self.cache.get(key)
+
+    if html is not None:
+      self.position += d.size
+    else:
+      html = self.cache.put(key, self.render_fragment(d, node, children))
+
+    self.fragments[d.key] = html
+    w.write(html)
+
+  def render_fragment(self, d: NodeDigest, node: FieldNode, children=None) -> str:
+    """render the fragment of node, the children in the plan as fragments"""
+    w = FragmentWriter()
+    w.write(FRAGMENT_OPEN % d.key)
+
+    self.position += 1
+    self.rendered += 1
+    end = self.position - 1 + d.size
+    values, tail = None, None
+
+    if node is not None:
+      container = self.handlers[node.handler](w, node, None)
+
+      if container is not None:
+        children, values, tail = container
+
+    if children is not None and node is not None and children is not node.children:
+      write_plan(w, children, values, self.handlers)
+    elif children:
+      for child in children:
+        self.write_fragment(w, child)
+
+      self.expanded.add(d.key)
+
+    # NB: skips the subtree when the handler did not render the plan children
+    self.position = end
+
+    if tail:
+      w.write(tail)
+
+    w.write(FRAGMENT_CLOSE % d.key)
+    return w.getvalue()
+
+
+def changed_fragments(digests: List[NodeDigest], previous: Dict[str, NodeDigest], render: _Render) -> Dict[str, str]:
+  """return the fragments of a render which replace the previous version of the form
+
+     unchanged subtrees are skipped; a node whose own html and children keys
+     are unchanged is descended into when its children were written as
+     fragments, any other changed node is replaced as a whole
+  """
+  changed = {}
+  i = 0
+
+  while i < len(digests):
+    d = digests[i]
+    before = previous.get(d.key)
+
+    if before is not None and before.digest == d.digest:
+      i += d.size
+    elif before is not None and before.shell == d.shell and d.key in render.expanded:
+      i += 1
+    else:
+      changed[d.key] = render.fragments[d.key]
+      i += d.size
+
+  return changed
+
+
+def form_name(model, uri, options: dict) -> str:
+  """return the name of a form, the same for a reloaded model class"""
+  return "%s.%s:%s:%s" % (
+    model.__module__, model.__qualname__, uri,
+    ",".join(["%s=%s" % (k, v) for k, v in sorted(options.items())])
+  )
+
+
+# the renderer used by `render_update`
+fragment_renderer = FragmentRenderer()
+
+
+def render_update(model, uri, options=None) -> FormUpdate:
+  """render a form with `fragment_renderer`, see `FragmentRenderer.render`"""
+  return fragment_renderer.render(model, uri, options)
@@ -1,12 +1,23 @@
 import logging
+import os
 import pydantic
 
+from typing import NamedTuple
+
 
 logger = logging.getLogger(__name__)
 logger.propagate = True
 
-from .fielddesc import build_field_description
-from pydform.html import HANDLERS, convert_property, make_tag
+from . import cache
+from .backend import is_model_class, model_dict
+from .cache import form_cache, make_key
+from .datalist import datalist_plan
+from .lazy import lazy_handlers
+from .plan import FormPlan, get_plan, plan_values
+from .schema import schema_model
+from .shared import SHARED_HANDLERS, shared_plan
+from .writer import FragmentWriter
+from pydform.html import iter_plan, render_plan
 
 #
 # jinja entry point
@@ -15,31 +26,296 @@ def asform(value):
   """jinja compatible method to convert a pydantic.BaseModel derived class to HTML
 
      value must contain keys:
-     + model: pydantic model for conversion
+     + model: pydantic model for conversion, or a model instance for an edit
+       form prefilled from the instance (including dict entries)
      + uri: target uri for submission (POST as JSON object)
-     + defaults: initial values to put in the form
+
+     or instead of model:
+     + schema: JSON schema document of the model, see `pydform.schema`; the
+       model is looked up by the identity of the document, pass
+       `pydform.schema_model(document)` as model to skip the lookup
+
+     value may contain keys:
+     + defaults: initial values to put in the form, a model instance or a
+       (nested) dict of field names to values
+     + options: dict of hashable rendering options, part of the cache key,
+       see `form_handlers`
+     + cache: bool, set False to bypass the cache; forms are kept in
+       `pydform.cache.form_cache`, or read from `pydform.cache.disk_cache` on
+       every call when one is configured
+
+     forms with defaults are rendered from the cached plan on every call,
+     see `pydform.ext.FormExtension` to precompile them into jinja templates
+  """
+  model, uri, options, defaults, use_cache = form_value(value)
+
+  logger.info("posting to '%s'", uri)
+
+  if defaults:
+    plan = form_plan(model, options)
+    return render_form(plan, uri, defaults_values(plan, defaults), form_handlers(options))
+
+  if not use_cache:
+    return build_form(model, uri, options)
+
+  # NB: disk entries are not copied into form_cache, the mapped pages are shared by the workers
+  if cache.disk_cache is not None:
+    return load_form(model, uri, options)
+
+  return form_cache.get_or_build(make_key(model, uri, options), lambda: build_form(model, uri, options))
+
+
+class FormValue(NamedTuple):
+  """the value of `asform` and `asform_async` with the model resolved
+
+     model: pydantic.BaseModel derived class
+     uri: str, target uri for submission
+     options: dict, rendering options
+     defaults: dict, field names to initial values (nested), None for a blank form
+     cache: bool, False to bypass the cache
   """
-  assert isinstance(value["model"], pydantic.main.ModelMetaclass)
+  model: type
+  uri: str
+  options: dict
+  defaults: dict
+  cache: bool
+
+
+def form_value(value) -> FormValue:
+  """resolve the schema document or model instance of an `asform` value, see `asform` for the keys"""
+  model = schema_model(value["schema"]) if "schema" in value else value["model"]
+  defaults = value.get("defaults")
+
+  if isinstance(model, pydantic.BaseModel):
+    model, defaults = model.__class__, model
+
+  assert is_model_class(model)
   assert isinstance(value["uri"], str)
 
-  uri = value["uri"]
+  # NB: a plain dict, so it can be sent to process workers
+  if isinstance(defaults, pydantic.BaseModel):
+    defaults = model_dict(defaults)
+
+  return FormValue(model, value["uri"], value.get("options") or {}, defaults or None, value.get("cache", True) is not False)
+
+
+def defaults_values(plan: FormPlan, defaults):
+  """convert the `defaults` of asform to per-request values keyed by input name"""
+  if isinstance(defaults, pydantic.BaseModel):
+    defaults = model_dict(defaults)
+
+  return plan_values(plan.nodes, defaults)
+
+
+def load_form(model, uri, options=None):
+  """return the form from `pydform.cache.disk_cache` if configured, otherwise
+     build it and store it there
+  """
+  disk_cache = cache.disk_cache
+
+  if disk_cache is None:
+    return build_form(model, uri, options)
+
+  html = disk_cache.get(model, uri, options)
+
+  if html is None:
+    html = disk_cache.put(model, uri, build_form(model, uri, options), options)
+
+  return html
+
+
+def build_form(model, uri, options=None):
+  """convert a model to a html form without consulting the cache
+
+     model: pydantic.BaseModel derived class
+     uri: str, target uri for submission
+     options: dict, rendering options
+
+     returns: str, html form
+  """
+  return render_form(form_plan(model, options), uri, handlers=form_handlers(options))
+
+
+def form_plan(model, options=None) -> FormPlan:
+  """return the plan to render for model with the rendering options"""
+  plan = get_plan(model)
+
+  if options and options.get("shared_templates") and not options.get("lazy"):
+    plan = shared_plan(plan)
+
+  return datalist_plan(plan, options.get("enum_search") if options else None)
+
+
+def form_handlers(options=None):
+  """return the handler table for the rendering options, None for the default
+
+     options may contain keys:
+     + lazy: str, fragment uri for lazy nested sections, see `pydform.lazy`
+     + shared_templates: bool, one template per distinct dict entry, see
+       `pydform.shared`; ignored with `lazy`
+     + enum_search: str, options uri for the datalists of large enums, see
+       `pydform.datalist` (applied by `form_plan`)
+  """
+  if options and options.get("lazy"):
+    return lazy_handlers(options["lazy"])
+
+  if options and options.get("shared_templates"):
+    return SHARED_HANDLERS
+
+  return None
+
+
+FORM_ATTRS = {
+  "onsubmit": "return submit_form(event)",
+  "name": "myform"
+}
+
+
+def iter_form_plan(w: FragmentWriter, plan: FormPlan, uri, values=None, handlers=None):
+  """render a compiled plan to a html form into w depth-first
+
+     w: FragmentWriter, receives the html
+     plan: FormPlan, from `pydform.plan.get_plan`
+     uri: str, target uri for submission
+     values: dict[str, Any], per-request values keyed by input name
+     handlers: dict, handler table, see `form_handlers`
+
+     yields None after each field is written, so callers can drain w
+  """
+  w.open("form", attrs=FORM_ATTRS)
+  yield from iter_plan(w, plan.nodes, values, handlers)
+  write_form_tail(w, uri)
+
+
+def write_form_tail(w: FragmentWriter, uri):
+  """write the submit button, the hidden uri input and close the form"""
+  w.tag("label", attrs={"for": "_submit"}, content="submit")
+  w.tag("input", attrs={"type": "submit", "id": "_submit"})
+  w.tag("input", attrs={"type": "hidden", "id": "_uri", "name": "_uri", "value": uri})
+  w.close("form")
+
+
+def render_form(plan: FormPlan, uri, values=None, handlers=None):
+  """render a compiled plan to a html form
+
+     plan: FormPlan, from `pydform.plan.get_plan`
+     uri: str, target uri for submission
+     values: dict[str, Any], per-request values keyed by input name
+     handlers: dict, handler table, see `form_handlers`
+
+     returns: str, html form
+  """
+  w = FragmentWriter()
+
+  for _ in iter_form_plan(w, plan, uri, values, handlers):
+    pass
+
+  return w.getvalue()
+
+
+def iter_form(model, uri, values=None, chunk_size=16384, options=None):
+  """generate a html form for model in chunks, for streaming responses
+
+     e.g. `StreamingResponse(pydform.iter_form(User, "/users"), media_type="text/html")`
+
+     model: pydantic.BaseModel derived class
+     uri: str, target uri for submission
+     values: dict[str, Any], per-request values keyed by input name
+     chunk_size: int, output is held back until it reaches this many characters
+     options: dict, rendering options, see `form_handlers`
+
+     yields str html chunks
+  """
+  w = FragmentWriter()
+
+  for _ in iter_form_plan(w, form_plan(model, options), uri, values, form_handlers(options)):
+    if w.size >= chunk_size:
+      yield w.drain()
+
+  if w.size:
+    yield w.drain()
+
+
+#
+# async entry point
+#
+def plan_size(model, options=None):
+  """return the number of top-level nodes in the plan for model"""
+  return len(form_plan(model, options).nodes)
+
+
+def render_plan_slice(model, start, stop, options=None, defaults=None):
+  """render top-level nodes [start:stop) of the plan for model
+
+     defaults: dict, field names to initial values, see `form_value`
+
+     NB: runs in executor workers; process workers compile and cache their own plan
+  """
+  nodes = form_plan(model, options).nodes[start:stop]
+  values = plan_values(nodes, defaults) if defaults else None
+  return render_plan(nodes, values, handlers=form_handlers(options))
+
+
+async def asform_async(value, executor=None, chunks=None):
+  """asyncio version of `asform` which converts the model in an executor
+
+     the top-level fields are split into contiguous chunks which render
+     concurrently and are joined in field order, so a large form does not
+     block the event loop. usable as a jinja filter in an async environment
+     (e.g. with `functools.partial` to set the executor).
+
+     value: dict, as for `asform`, resolved the same way by `form_value`
+     executor: concurrent.futures.Executor, None uses the loop's default thread pool;
+               models must be importable (module-level) for a ProcessPoolExecutor,
+               which rules out `schema` models
+     chunks: int, number of concurrent tasks, default the executor's worker count
+
+     returns: str, html form
+  """
+  model, uri, options, defaults, use_cache = form_value(value)
+
+  # NB: forms with defaults are rendered on every call, as by `asform`
+  use_cache = use_cache and not defaults
+  key = make_key(model, uri, options)
 
   logger.info("posting to '%s'", uri)
 
-  form_content = "".join([
-      convert_property(v)
-      for _,v in value["model"].__fields__.items()
-  ]+[
-      make_tag("label", attrs={"for": "_submit"}, content="submit"),
-      make_tag("input", attrs={"type": "submit", "id": "_submit"}),
-      make_tag("input", attrs={"type": "hidden", "id": "_uri", "name": "_uri", "value": uri})
+  if use_cache:
+    if cache.disk_cache is not None:
+      html = cache.disk_cache.get(model, uri, options)
+    else:
+      html = form_cache.get(key)
+
+    if html is not None:
+      return html
+
+  # NB: imported here, asyncio is slow to import and only needed by this entry point
+  import asyncio
+
+  loop = asyncio.get_running_loop()
+
+  count = await loop.run_in_executor(executor, plan_size, model, options)
+  chunks = max(1, min(count, chunks or getattr(executor, "_max_workers", None) or os.cpu_count() or 1))
+  bounds = [(count * i // chunks, count * (i + 1) // chunks) for i in range(chunks)]
+
+  parts = await asyncio.gather(*[
+      loop.run_in_executor(executor, render_plan_slice, model, start, stop, options, defaults)
+      for start, stop in bounds
   ])
 
-  return make_tag(
-      "form",
-      attrs={
-        "onsubmit": "return submit_form(event)",
-        "name": "myform"
-      },
-      content=form_content
-  )
+  w = FragmentWriter()
+  w.open("form", attrs=FORM_ATTRS)
+
+  for part in parts:
+    w.write(part)
+
+  write_form_tail(w, uri)
+  html = w.getvalue()
+
+  if use_cache:
+    if cache.disk_cache is not None:
+      cache.disk_cache.put(model, uri, html, options)
+    else:
+      form_cache.put(key, html)
+
+  return html
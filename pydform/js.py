@@ -1,38 +1,45 @@
 """javascript code to be embedded in the html output
 
-TODO: use importlib https://importlib-resources.readthedocs.io/en/latest/using.html
+the scripts are read from the package with `importlib.resources` on first use
+of `common_funcs`, `form_submission_script`, `form_appendable_script`,
+`collapsible_elements_script`, `lazy_sections_script`,
+`enum_search_script` or `fragment_patch_script`; see `pydform.bundle` to
+serve them as one file.
 """
-import os
+import functools
 
-pkg_dir = os.path.dirname(__file__)
 
-common_js_filepath = os.path.join(pkg_dir, "js", "common.js")
-submit_js_filepath = os.path.join(pkg_dir, "js", "submission.js")
-append_js_filepath = os.path.join(pkg_dir, "js", "append.js")
-collapse_js_filepath = os.path.join(pkg_dir, "js", "collapsible.js")
+# module attribute -> script in pydform/js
+SCRIPTS = {
+  "common_funcs": "common.js",
+  "form_submission_script": "submission.js",
+  "form_appendable_script": "append.js",
+  "collapsible_elements_script": "collapsible.js",
+  "lazy_sections_script": "lazy.js",
+  "enum_search_script": "datalist.js",
+  "fragment_patch_script": "incremental.js",
+}
 
-common_funcs="""
+SCRIPT_TAG = """
 <script type="text/javascript">
 {file_contents}
 </script>
-""".format(file_contents=open(common_js_filepath, mode="r").read())
+"""
 
-form_submission_script="""
-<script type="text/javascript">
-{file_contents}
-</script>
-""".format(file_contents=open(submit_js_filepath, mode="r").read())
 
+@functools.lru_cache(maxsize=None)
+def read_script(filename: str) -> str:
+  """return the source of a script in pydform/js"""
+  import importlib.resources
 
-form_appendable_script="""
-<script type="text/javascript">
-{file_contents}
-</script>
-""".format(file_contents=open(append_js_filepath, mode="r").read())
+  return importlib.resources.files(__package__).joinpath("js", filename).read_text(encoding="utf-8")
 
 
-collapsible_elements_script="""
-<script type="text/javascript">
-{file_contents}
-</script>
-""".format(file_contents=open(collapse_js_filepath, mode="r").read())
+def __getattr__(name):
+  try:
+    filename = SCRIPTS[name]
+  except KeyError:
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+  value = globals()[name] = SCRIPT_TAG.format(file_contents=read_script(filename))
+  return value
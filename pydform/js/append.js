@@ -10,13 +10,36 @@
  * key values.
  * object-id/name format is important: $object-$rnd-(key|value)
  *
+ * shared templates (see pydform/shared.py) are written once for
+ * all the dict fields with the same entry form, with `__field__`
+ * in place of the field name; `prefix` is the field name to put back.
+ *
+ * recursive models (see `compile_type` in pydform/plan.py) are written
+ * once as a template with `__path__` in place of the qualified name and
+ * expanded where they are used by `expand_recursive`.
+ *
  */
-function duplicate_item(button_id, template_id, section_id) {
+const FIELD_TOKEN = "__field__";
+const PATH_TOKEN = "__path__";
+
+function duplicate_item(button_id, template_id, section_id, prefix) {
   // get the template
   let template = document.getElementById(template_id);
 
+  // a lazy template is fetched before its first clone, see lazy.js
+  if (typeof lazy_placeholder === "function" && lazy_placeholder(template) !== null) {
+    load_fragment(template)
+      .then(() => duplicate_item(button_id, template_id, section_id, prefix))
+      .catch((error) => console.log("error:", error));
+    return;
+  }
+
   let ns = template.content.cloneNode(true);
 
+  if (prefix !== undefined) {
+    replace_token(ns, FIELD_TOKEN, prefix);
+  }
+
   // get a random suffix
   // FIXME: get a count of previous keys
   let random_suffix = Math.random().toString(36).substr(2, 5);
@@ -63,11 +86,53 @@ function duplicate_item(button_id, template_id, section_id) {
     }
   }
 
+  // recursion points in the entry are expanded under the new key
+  let points = ns.querySelectorAll(".pydform-recursive, .pydform-recursive > h3");
+  for (let i=0; i<points.length; i++) {
+    for (let attr of ["id", "onclick"]) {
+      let value = points[i].getAttribute(attr);
+
+      if (value !== null) {
+        points[i].setAttribute(attr, value.split(src_key).join(new_key));
+      }
+    }
+  }
+
   // update the parent html
   let section = document.getElementById(section_id);
   section.appendChild(ns);
 }
 
+function replace_token(ns, token, prefix) {
+  // put the field name (or path) in the attributes of a template clone
+  let elements = ns.querySelectorAll("*");
+
+  for (let i=0; i<elements.length; i++) {
+    for (let attr of ["id", "name", "for", "onclick"]) {
+      let value = elements[i].getAttribute(attr);
+
+      if (value !== null && value.indexOf(token) !== -1) {
+        elements[i].setAttribute(attr, value.split(token).join(prefix));
+      }
+    }
+  }
+}
+
+function expand_recursive(section_id, template_id, path) {
+  // expand a recursion point once, from the template of its model
+  let section = document.getElementById(section_id);
+
+  if (section.dataset.expanded) {
+    return;
+  }
+
+  let ns = document.getElementById(template_id).content.cloneNode(true);
+  replace_token(ns, PATH_TOKEN, path);
+
+  section.appendChild(ns);
+  section.dataset.expanded = "1";
+}
+
 function remove_item(e) {
   // delete a list item
   alert(e);
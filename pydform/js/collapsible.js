@@ -4,6 +4,11 @@
  * no interaction with the backend.
  */
 function collapsible(element_name) {
+  // fetch the nested form of a lazy section on first expand, see lazy.js
+  if (typeof load_section === "function") {
+    load_section(element_name);
+  }
+
   // FIXME: get the maxheight setting of the first child, and make all subsequent the same
   let elements = document.getElementsByName(element_name);
 
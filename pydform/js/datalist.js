@@ -0,0 +1,61 @@
+/*
+ * searchable enum inputs, see pydform/datalist.py
+ *
+ * the datalist of a large enum input either holds the members or names an
+ * options endpoint in `data-options`. for the latter the members starting
+ * with the typed text are fetched as the user types (after a short pause)
+ * and replace the datalist options; a response for text which has changed
+ * since is dropped. inputs cloned from templates share their datalist.
+ */
+const OPTIONS_DELAY = 150;
+
+function search_options(datalist, prefix) {
+  // fill datalist with the options starting with prefix from its endpoint
+  if (datalist._prefix === prefix) {
+    return;
+  }
+
+  datalist._prefix = prefix;
+
+  fetch(datalist.dataset.options + "?prefix=" + encodeURIComponent(prefix))
+    .then((response) => response.json())
+    .then((result) => {
+      if (datalist._prefix !== prefix) {
+        return;
+      }
+
+      datalist.replaceChildren(...result.options.map((value) => {
+        let option = document.createElement("option");
+        option.value = value;
+        return option;
+      }));
+    })
+    .catch((error) => {
+      // allow a retry for the same text
+      datalist._prefix = null;
+      console.log("error:", error);
+    });
+}
+
+function remote_datalist(input) {
+  // the datalist of input if it is filled from an endpoint, else null
+  let datalist = input.list;
+  return datalist && datalist.dataset.options ? datalist : null;
+}
+
+document.addEventListener("input", (event) => {
+  let datalist = remote_datalist(event.target);
+
+  if (datalist !== null) {
+    clearTimeout(datalist._timer);
+    datalist._timer = setTimeout(() => search_options(datalist, event.target.value), OPTIONS_DELAY);
+  }
+});
+
+document.addEventListener("focusin", (event) => {
+  let datalist = remote_datalist(event.target);
+
+  if (datalist !== null) {
+    search_options(datalist, event.target.value);
+  }
+});
@@ -0,0 +1,59 @@
+/*
+ * patch a form in place with the changed fragments, see pydform/incremental.py
+ *
+ * a fragment is the html between `<!--pydform:key-->` and `<!--/pydform:key-->`
+ * comments, nested fragments are inside their parent's comments. dict entry
+ * templates hold fragments too, they are searched before the entries cloned
+ * from them.
+ */
+const FRAGMENT_OPEN = "pydform:";
+const FRAGMENT_CLOSE = "/pydform:";
+
+function find_comment(root, text) {
+  // the first comment with text under root, including template contents
+  let walker = document.createTreeWalker(root, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_COMMENT);
+
+  while (walker.nextNode()) {
+    let node = walker.currentNode;
+
+    if (node.nodeType === Node.COMMENT_NODE) {
+      if (node.data === text) {
+        return node;
+      }
+    } else if (node.tagName === "TEMPLATE") {
+      let found = find_comment(node.content, text);
+
+      if (found !== null) {
+        return found;
+      }
+    }
+  }
+
+  return null;
+}
+
+function patch_fragments(form, changed) {
+  // replace the fragments of form by the html of changed (key -> html)
+  for (const [key, html] of Object.entries(changed)) {
+    let start = find_comment(form, FRAGMENT_OPEN + key);
+    let end = start;
+
+    while (end !== null && !(end.nodeType === Node.COMMENT_NODE && end.data === FRAGMENT_CLOSE + key)) {
+      end = end.nextSibling;
+    }
+
+    if (end === null) {
+      console.log("error: no fragment", key);
+      continue;
+    }
+
+    let template = document.createElement("template");
+    template.innerHTML = html;
+
+    let range = document.createRange();
+    range.setStartBefore(start);
+    range.setEndAfter(end);
+    range.deleteContents();
+    range.insertNode(template.content);
+  }
+}
@@ -0,0 +1,42 @@
+/*
+ * lazy sections, see pydform/lazy.py
+ *
+ * the template of a lazy dict section holds a placeholder with the uri of its
+ * fragment instead of the nested form. the fragment is fetched once, when the
+ * section is first expanded or an entry is first added, and replaces the
+ * placeholder in the template.
+ */
+function lazy_placeholder(template) {
+  // the placeholder in a template, null once loaded
+  return template ? template.content.querySelector("[data-fragment]") : null;
+}
+
+function load_fragment(template) {
+  // fetch the fragment for a template, returns a promise shared by all callers
+  if (!template._fragment) {
+    let placeholder = lazy_placeholder(template);
+
+    template._fragment = placeholder === null ? Promise.resolve() : fetch(placeholder.dataset.fragment)
+      .then((response) => response.text())
+      .then((html) => {
+        placeholder.insertAdjacentHTML("afterend", html);
+        placeholder.remove();
+      })
+      .catch((error) => {
+        // allow a retry on the next expand
+        template._fragment = null;
+        throw error;
+      });
+  }
+
+  return template._fragment;
+}
+
+function load_section(element_name) {
+  // load the template of the section with items element_name ("<name>-items")
+  let template = document.getElementById(element_name.replace(/-items$/, "-template"));
+
+  if (lazy_placeholder(template) !== null) {
+    load_fragment(template).catch((error) => console.log("error:", error));
+  }
+}
@@ -0,0 +1,187 @@
+"""lazy nested sections, fetched from a fragment endpoint when first expanded
+
+with the `lazy` option set to a fragment uri, the template entry of a dict
+section with nested model (or dict) values is replaced by a placeholder naming
+the section by its qualified name. lazy.js fetches `<uri>?name=<section>`
+when the section is first expanded (or an entry first added) and puts the
+fragment in the template, so the initial page only carries the top level:
+
+    app.mount("/fragments", pydform.lazy.FragmentApp([User]))
+
+    pydform.asform({"model": User, "uri": "/users", "options": {"lazy": "/fragments/User"}})
+
+fragments are rendered in lazy mode too, so each level is fetched on demand.
+a nested section is named by the qualified names of the lazy sections down to
+it joined by `/`, since qualified names repeat inside nested dict entries.
+fragments are kept in their own bounded `fragment_cache`, keyed by model,
+section and the fragment uri of the mount.
+"""
+import functools
+import hashlib
+import logging
+
+from html import escape
+from urllib.parse import parse_qs, quote
+
+from .cache import FormCache
+from .html import HANDLERS, html_for_dict_type, render_plan
+from .plan import FieldNode, get_plan
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+LAZY_PLACEHOLDER = """<div class='pydform-lazy' data-fragment='{uri}'></div>"""
+
+# dict sections with these value handlers are lazy, primitive values are small
+LAZY_VALUES = ("basemodel", "dict")
+
+SECTION_SEP = "/"
+
+# number of (uri, section) handler tables kept by `lazy_handlers`
+HANDLERS_SIZE = 1024
+
+
+def is_lazy(node: FieldNode) -> bool:
+  """true if node is rendered as a lazy section"""
+  return node.handler == "dict" and node.children[-1].handler in LAZY_VALUES
+
+
+def fragment_uri(uri: str, section: str) -> str:
+  """return the uri of the fragment for a section"""
+  return "%s?name=%s" % (uri, quote(section))
+
+
+def lazy_dict_type(w, node: FieldNode, values: dict, uri: str, parent: str):
+  """dict handler which writes a placeholder in place of the template entry"""
+  children, children_values, tail = html_for_dict_type(w, node, values)
+
+  if not is_lazy(node):
+    return children, children_values, tail
+
+  section = parent + SECTION_SEP + node.qualname if parent else node.qualname
+
+  w.write(LAZY_PLACEHOLDER.format(uri=escape(fragment_uri(uri, section), quote=True)))
+  return (), None, tail
+
+
+@functools.lru_cache(maxsize=HANDLERS_SIZE)
+def lazy_handlers(uri: str, parent: str = "") -> dict:
+  """return a handler table rendering lazy sections with fragments under uri
+
+     parent: str, the section being rendered, for fragments
+  """
+  return {
+    **HANDLERS,
+    "dict": lambda w, node, values: lazy_dict_type(w, node, values, uri, parent),
+  }
+
+
+def find_section(model, section: str) -> FieldNode:
+  """return the dict node of a lazy section in the plan for model, or None"""
+  nodes = get_plan(model).nodes
+
+  for qualname in section.split(SECTION_SEP):
+    node = _find_lazy(nodes, qualname)
+
+    if node is None:
+      return None
+
+    nodes = node.children
+
+  return node
+
+
+def _find_lazy(nodes, qualname):
+  """return the first lazy section named qualname rendered with nodes"""
+  stack = list(reversed(nodes))
+
+  while stack:
+    node = stack.pop()
+
+    if is_lazy(node):
+      if node.qualname == qualname:
+        return node
+    else:
+      stack.extend(reversed(node.children))
+
+  return None
+
+
+# rendered fragments keyed by (model, section, uri)
+fragment_cache = FormCache(maxsize=1024)
+
+
+def render_fragment(model, section: str, uri: str) -> str:
+  """render the template entry of a lazy section, or None if unknown
+
+     model: pydantic.BaseModel derived class
+     section: str, the section name from the placeholder
+     uri: str, the fragment uri for nested lazy sections
+  """
+  key = (model, section, uri)
+  html = fragment_cache.get(key)
+
+  if html is None:
+    node = find_section(model, section)
+
+    # NB: unknown names are not cached, they come from the request
+    if node is None:
+      return None
+
+    html = fragment_cache.put(key, render_plan(node.children, handlers=lazy_handlers(uri, section)))
+
+  return html
+
+
+class FragmentApp:
+  """ASGI application serving lazy fragments
+
+     GET `<mount>/<model name>?name=<section>` returns the fragment html with
+     an etag; other models, names or paths are 404.
+
+     models: iterable of pydantic.BaseModel derived classes, served by `__name__`
+  """
+  def __init__(self, models=()):
+    self.models = {model.__name__: model for model in models}
+
+  def add(self, model):
+    """serve fragments for model, returns model so it can decorate the class"""
+    self.models[model.__name__] = model
+    return model
+
+  async def __call__(self, scope, receive, send):
+    assert scope["type"] == "http"
+
+    # NB: depending on the server, a mount's prefix is in path or only in root_path
+    root_path, path = scope.get("root_path", ""), scope["path"]
+
+    if root_path and path.startswith(root_path + "/"):
+      path = path[len(root_path):]
+
+    # NB: only `/<model name>` right under the mount, so there is one uri per model
+    name = path[1:] if path.startswith("/") else None
+    status, body, headers = 404, b"", []
+
+    if scope["method"] not in ("GET", "HEAD"):
+      status, headers = 405, [(b"allow", b"GET, HEAD")]
+    elif name in self.models:
+      section = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("name", [""])[0]
+      html = render_fragment(self.models[name], section, root_path + "/" + name)
+
+      if html is not None:
+        body = html.encode("utf-8")
+        etag = ('"%s"' % hashlib.sha256(body).hexdigest()[:16]).encode("ascii")
+        headers = [(b"etag", etag), (b"cache-control", b"no-cache")]
+
+        if etag in dict(scope.get("headers", [])).get(b"if-none-match", b""):
+          status, body = 304, b""
+        else:
+          status = 200
+          headers.append((b"content-type", b"text/html; charset=utf-8"))
+
+    headers.append((b"content-length", str(len(body)).encode("ascii")))
+
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body if scope["method"] != "HEAD" else b""})
@@ -0,0 +1,624 @@
+"""compile pydantic models into an immutable tree of field nodes
+
+the plan holds everything the html renderer needs (handler keys, qualified
+names, input types, attributes, enum options) so rendering never touches
+pydantic or typing again and a plan can be reused across requests which
+differ only in the values put into the form.
+"""
+import hashlib
+import logging
+import pydantic
+import weakref
+
+from typing import NamedTuple, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+from . import stats
+from .backend import FIELD_TYPES, ModelField, model_dict, model_fields
+from .cache import FormCache
+from .fielddesc import FieldDesc, build_field_description, field_name
+from .rtti import INPUT_TYPE_MAP, is_primitive_type, is_dict_type, get_type_string, is_basemodel_type
+
+
+class PYDUnhandledTypeError(Exception):
+  pass
+
+
+class FieldNode(NamedTuple):
+  """a compiled form element
+
+     handler: key into `pydform.html.HANDLERS` used to render this node
+     name: display name of the element
+     qualname: dotted name used for the element id and name attributes
+     desc: FieldDesc the node was compiled from, None for literal text
+     children: child nodes of container types
+     attrs: (key, value) pairs for the input element of primitive types, `value` is the default
+     label: text of the element label
+     options: enum values for select elements
+     text: literal html emitted by `text` nodes, the template id of `recursive`
+           nodes, the datalist id of `enum_search` nodes
+  """
+  handler: str
+  name: str
+  qualname: str = ""
+  desc: Optional[FieldDesc] = None
+  children: Tuple["FieldNode", ...] = ()
+  attrs: Tuple[Tuple[str, str], ...] = ()
+  label: Optional[str] = None
+  options: Tuple[str, ...] = ()
+  text: Optional[str] = None
+
+
+class FormPlan(NamedTuple):
+  """compiled form for a model; nodes are the top-level fields in order"""
+  model: type
+  nodes: Tuple[FieldNode, ...]
+
+
+PLANNERS = {
+  # primitive types
+  "bool": lambda name, d, **kw: plan_for_single_type(name, d),
+  "datetime": lambda name, d, **kw: plan_for_single_type(name, d),
+  "float": lambda name, d, **kw: plan_for_single_type(name, d),
+  "int": lambda name, d, **kw: plan_for_single_type(name, d),
+  "str": lambda name, d, **kw: plan_for_single_type(name, d),
+
+  # option types
+  "enum": lambda name, d, **kw: plan_for_enum_type(name, d),
+
+  # constrained values
+  "ConstrainedFloatValue": lambda name, d, **kw: plan_for_constrained_type(name, d),
+  "ConstrainedIntValue": lambda name, d, **kw: plan_for_constrained_type(name, d),
+
+  # nested types, kw carries the recursion state (stack, max_depth)
+  "basemodel": lambda name, d, **kw: plan_for_basemodel_type(name, d, **kw),
+  "dict": lambda name, d, **kw: plan_for_dict_type(name, d, **kw),
+  "list": lambda name, d, **kw: plan_for_list_type(name, d),
+  "Union": lambda name, d, **kw: plan_for_union_type(name, d, **kw),
+  "tuple": lambda name, d, **kw: plan_for_list_type(name, d),
+}
+
+
+# nesting limit of basemodel fields, deeper fields become recursion points.
+# None (the default) only cuts models which repeat on the path, set it (or
+# `pydform_max_depth` in a model's Config) to also cut deep acyclic models
+MAX_DEPTH = None
+
+# qualified name prefix of the nodes in a recursion template, see `compile_type`
+PATH_TOKEN = "__path__"
+
+
+# compiled plans keyed by (model,)
+plan_cache = FormCache()
+
+# option values keyed by Enum class, shared by every field using the enum;
+# weak so the classes of reloaded models are freed
+_enum_values = weakref.WeakKeyDictionary()
+
+# enums with at least this many members are planned as a searchable input with
+# a datalist instead of a select, see `pydform.datalist`
+LARGE_ENUM_SIZE = 100
+
+# datalist element ids keyed by Enum class, weak so the classes of reloaded models are freed
+_enum_lists = weakref.WeakKeyDictionary()
+
+# recursion template nodes keyed by (model, max_depth), see `compile_type`
+# NB: bounded, the nodes hold the model; a weak key on it would never be released
+_type_nodes = FormCache(maxsize=1024)
+
+# recursion points expanded for prefilled values keyed by (model, qualname),
+# see `expand_recursive_type`
+_expanded_nodes = FormCache(maxsize=1024)
+
+
+def text_node(name, text):
+  """a node which renders literal html"""
+  return FieldNode(handler="text", name=name, text=text)
+
+
+def plan_for_single_type(name, d: FieldDesc, *, label_content=None):
+  """plan for basic types (int, float, str, etc)"""
+  el_id = d.qualified_name()
+
+  attrs = dict(
+    type=INPUT_TYPE_MAP[d.handler],
+    id=el_id,
+    name=el_id,
+  )
+
+  if d.attributes.get("default"):
+    attrs.update({"value": d.attributes.get("default")})
+
+  if d.attributes.get("required"):
+    attrs.update({"required": ""})
+
+  if d.attributes.get("placeholder"):
+    attrs.update({"placeholder": d.attributes.get("placeholder")})
+
+  return FieldNode(
+    handler=d.handler,
+    name=name,
+    qualname=el_id,
+    desc=d,
+    attrs=tuple(attrs.items()),
+    label=label_content or d.attributes.get("alias") or name,
+  )
+
+
+def enum_values(enum_type):
+  """return the option values of an Enum class, computed once per class"""
+  try:
+    return _enum_values[enum_type]
+  except KeyError:
+    values = _enum_values[enum_type] = tuple(str(e.value) for e in enum_type)
+    return values
+
+
+def enum_list_id(enum_type) -> str:
+  """return the element id of the datalist of an Enum class"""
+  try:
+    return _enum_lists[enum_type]
+  except KeyError:
+    digest = hashlib.sha1("\0".join(enum_values(enum_type)).encode("utf-8")).hexdigest()[:12]
+    value = _enum_lists[enum_type] = "pydform-enum-%s" % digest
+    return value
+
+
+def is_large_enum(d: FieldDesc) -> bool:
+  """true if the enum field is planned as a searchable input
+
+     the `enum_search` field extra overrides the LARGE_ENUM_SIZE member count
+  """
+  search = d.attributes.get("enum_search")
+
+  if search is None:
+    return len(enum_values(d.inner_type)) >= LARGE_ENUM_SIZE
+
+  return bool(search)
+
+
+def plan_for_enum_type(name, d: FieldDesc):
+  """plan for an enum rendered as a select, the default is kept as the `value` attr"""
+  if is_large_enum(d):
+    return plan_for_enum_search_type(name, d)
+
+  default = d.attributes.get("default")
+
+  return FieldNode(
+    handler="enum",
+    name=name,
+    qualname=d.qualified_name(),
+    desc=d,
+    attrs=(("value", str(getattr(default, "value", default))),) if default is not None else (),
+    label=name,
+    options=enum_values(d.inner_type),
+  )
+
+
+def plan_for_enum_search_type(name, d: FieldDesc):
+  """plan for a large enum rendered as a text input with a datalist of the members
+
+     the datalist id is kept in `text`, the datalists are written once per
+     form by `pydform.datalist.datalist_plan`
+  """
+  el_id = d.qualified_name()
+  default = d.attributes.get("default")
+
+  attrs = dict(
+    type="text",
+    id=el_id,
+    name=el_id,
+    list=enum_list_id(d.inner_type),
+    autocomplete="off",
+  )
+
+  if default is not None:
+    attrs.update({"value": str(getattr(default, "value", default))})
+
+  if d.attributes.get("required"):
+    attrs.update({"required": ""})
+
+  if d.attributes.get("placeholder"):
+    attrs.update({"placeholder": d.attributes.get("placeholder")})
+
+  return FieldNode(
+    handler="enum_search",
+    name=name,
+    qualname=el_id,
+    desc=d,
+    attrs=tuple(attrs.items()),
+    label=name,
+    options=enum_values(d.inner_type),
+    text=enum_list_id(d.inner_type),
+  )
+
+
+def plan_for_constrained_type(name, d: FieldDesc):
+  """plan for constrained types
+
+     TODO: add range bounds to the html controls
+  """
+  logger.warning("Constrained*Value converted to HTML with no range values")
+  return plan_for_single_type(name, d)
+
+
+def plan_for_primitive_type(name, d: FieldDesc, **kwargs):
+  """plan for a primitive type (str, int, etc) inside a container"""
+  if d.handler == "enum":
+    return plan_for_enum_type(name, d)
+  elif d.handler in ("str", "int", "datetime", "bool", "float"):
+    return plan_for_single_type(name, d, **kwargs)
+  elif d.handler in ("ConstrainedIntValue", "ConstrainedFloatValue"):
+    return plan_for_constrained_type(name, d)
+  else:
+    logger.warning("[%s] unhandled primitve type '%s'", name, str(d.handler))
+    raise PYDUnhandledTypeError
+
+
+def plan_for_dict_type(name, d: FieldDesc, stack=(), max_depth=MAX_DEPTH):
+  """plan for a dict
+
+     NB: see `pydform.html.html_for_dict_type` for the key/value naming scheme,
+     the key/value inputs are named under the qualified name of the dict
+  """
+  fieldname = "_%s-key" % d.fieldname
+  qualname = d.qualified_name()
+  attrs = d.attributes
+
+  # create the key type placeholder
+  if is_primitive_type(d.inner_name["key"]):
+    f = FieldDesc(
+      fieldname=fieldname,
+      parent=qualname,
+      inner_type=d.inner_type["key"],
+      inner_name=d.inner_name["key"],
+      handler = get_type_string(d.inner_type["key"]),
+      attributes={"default": "01", **attrs.asdict()},
+    )
+    # NB: using d.inner_name[value] here means dict types will use the inner name
+    # as the reference (usually this is a nice mnemoic "address" for "addresses" container)
+    # but it might look shit at other times.
+    if is_primitive_type(d.inner_name["value"]) or is_dict_type(d.inner_type["value"]):
+      label_content="reference"
+    elif is_basemodel_type(d.inner_type["value"]):
+      label_content=d.inner_name["value"]
+    else:
+      label_content=None
+
+    keys_node = plan_for_primitive_type(f"{name}-key", f, label_content=label_content)
+  else:
+    logger.warning("[%s] no input for dict fields", name)
+    keys_node = text_node(name, """<div>KEYTYPE</div>""")
+
+  # create the value type form
+  if is_primitive_type(d.inner_name["value"]):
+    f = FieldDesc(
+      fieldname="_%s-value" % d.fieldname,
+      parent=qualname,
+      inner_type=d.inner_type["value"],
+      inner_name=d.inner_name["value"],
+      handler=d.inner_name["value"],
+      attributes=attrs,
+    )
+    values_node = plan_for_primitive_type(f"{name}-value", f, label_content="value")
+  elif is_basemodel_type(d.inner_type["value"]):
+    f = FieldDesc(
+      fieldname=fieldname,
+      parent=qualname,
+      inner_type=d.inner_type["value"],
+      inner_name=d.inner_name["value"],
+      handler="basemodel",
+      attributes = attrs,
+    )
+    values_node = plan_for_basemodel_type(name, f, stack, max_depth)
+  elif is_dict_type(d.inner_type["value"]):
+    # NB: a bare `dict` value has no key/value types to plan
+    logger.warning("[%s] untyped dict values: '%s'", name, str(d.inner_type["value"]))
+    return text_node(name, "[%s]ERROR[%s]" % (name, "dict"))
+  else:
+    logger.warning("unhandled inner-name: '%s'", str(d.inner_type["value"]))
+    return text_node(name, "[%s]ERROR[%s]" % (name, "dict"))
+
+  return FieldNode(
+    handler="dict",
+    name=name,
+    qualname=qualname,
+    desc=d,
+    children=(keys_node, values_node),
+  )
+
+
+def plan_for_list_type(name, d: FieldDesc):
+  """plan for a list
+
+     FIXME: the item is a placeholder for items appended to a list
+  """
+  fieldname = "_%s-list" % d.fieldname
+
+  # FIXME: check the list values are primitive
+  if is_primitive_type(d.inner_name):
+    # FIXME: use PLANNERS
+    f=FieldDesc(
+      fieldname = fieldname,
+      parent = d.qualified_name(),
+      handler = "str", #d.inner_name,
+      outer_type = type(str), #d.inner_type,
+      inner_name = "str", #d.inner_name,
+      inner_type = type(str), #d.inner_type,
+      attributes = {},
+    )
+    values_node = plan_for_primitive_type(fieldname, f)
+  else:
+    logger.warning("unhandled inner-name: [%s] '%s'", d.inner_name, str(d.inner_type))
+    return text_node(name, "[%s]ERROR[%s]" % (name, "list"))
+
+  return FieldNode(
+    handler="list",
+    name=name,
+    qualname=d.qualified_name(),
+    desc=d,
+    children=(values_node,),
+  )
+
+
+def plan_for_basemodel_type(name, d: FieldDesc, stack=(), max_depth=MAX_DEPTH):
+  """plan for a basemodel, one child per model field
+
+     stack: tuple, the model classes of the enclosing basemodel nodes
+     max_depth: int, nesting limit, None for no limit
+
+     a model already on the stack (a cycle), or nested deeper than max_depth
+     when it is set, is planned as a recursion point, see `plan_for_recursive_type`
+  """
+  p = d.qualified_name()
+
+  if d.inner_type in stack or (max_depth is not None and len(stack) >= max_depth):
+    return plan_for_recursive_type(name, d)
+
+  stack = stack + (d.inner_type,)
+
+  try:
+    children = tuple(filter(None, [
+      compile_property(field, parent=p, stack=stack, max_depth=max_depth)
+      for field in model_fields(d.inner_type)
+    ]))
+  except (AttributeError, TypeError) as e:
+    logger.exception("%s [%s]", str(d), str(e))
+    return text_node(name, "NONE")
+
+  return FieldNode(
+    handler="basemodel",
+    name=name,
+    qualname=p,
+    desc=d,
+    children=children,
+  )
+
+
+def plan_for_union_type(name: str, d: FieldDesc, stack=(), max_depth=MAX_DEPTH):
+  """plan for a union
+
+     FIXME: only the first type of the union is rendered; see `pydform.html.html_for_union_type`
+  """
+  assert isinstance(d.inner_type, tuple)
+
+  p = d.qualified_name()
+
+  first = compile_property(d.inner_type[0], parent=p, stack=stack, max_depth=max_depth) if d.inner_type else None
+
+  return FieldNode(
+    handler="Union",
+    name=name,
+    qualname=p,
+    desc=d,
+    children=(first,) if first is not None else (),
+  )
+
+
+def plan_for_recursive_type(name, d: FieldDesc):
+  """plan for a recursion point, a basemodel field which is not expanded
+
+     rendered as a placeholder which is expanded in the browser from the
+     recursion template of the model, see `compile_type`, or expanded on the
+     server when it has prefilled values, see `expand_recursive_type`
+  """
+  return FieldNode(
+    handler="recursive",
+    name=name,
+    qualname=d.qualified_name(),
+    desc=d,
+    label=name,
+    text=type_template_id(d.inner_type),
+  )
+
+
+def compile_property(data: ModelField, parent=None, stack=(), max_depth=MAX_DEPTH) -> Optional[FieldNode]:
+  """compile a pydantic ModelField (or `pydform.backend.AnnotatedField`) into a FieldNode
+
+     stack, max_depth: recursion state, see `plan_for_basemodel_type`
+
+     returns None for fields hidden with `no_html` or without a handler
+  """
+  instrument = stats.active
+
+  if instrument is None:
+    return _compile_property(data, parent, stack, max_depth)
+
+  node = None
+  instrument.begin()
+
+  try:
+    node = _compile_property(data, parent, stack, max_depth)
+    return node
+  finally:
+    if node is None:
+      instrument.end("compile", "none", data.name)
+    else:
+      instrument.end("compile", node.handler, node.qualname or data.name)
+
+
+def _compile_property(data: ModelField, parent=None, stack=(), max_depth=MAX_DEPTH) -> Optional[FieldNode]:
+  assert isinstance(data, FIELD_TYPES)
+
+  # identify the type of the field
+  try:
+    field_desc = build_field_description(data, parent=parent)
+  except TypeError as e:
+    logger.error("[%s] bad type: '%s' [%s]", data.name, str(data), str(e))
+    return text_node(data.name, "[%s]ERROR[%s]" % (data.name, str(data)))
+
+  if field_desc is None:
+    return None
+
+  # process the type we discovered
+  try:
+    return PLANNERS[field_desc.handler](field_name(data), field_desc, stack=stack, max_depth=max_depth)
+  except KeyError as e:
+    logger.error("[%s] no handler for type '%s' [%s]", data.name, field_desc.handler, str(e))
+    return None
+
+
+def compile_model(model, max_depth=None) -> FormPlan:
+  """compile all the fields of a pydantic.BaseModel derived class
+
+     max_depth: int, nesting limit, default `pydform_max_depth` from the
+                model's Config or MAX_DEPTH; None cuts cycles only
+
+     the recursion templates of the recursion points in the plan are appended
+     to the nodes, see `compile_type`
+  """
+  if max_depth is None:
+    max_depth = getattr(getattr(model, "__config__", None), "pydform_max_depth", MAX_DEPTH)
+
+  stack = (model,)
+  nodes = tuple(filter(None, [
+    compile_property(v, stack=stack, max_depth=max_depth) for v in model_fields(model)
+  ]))
+
+  return FormPlan(model=model, nodes=nodes + recursion_templates(nodes, max_depth))
+
+
+def type_template_id(model) -> str:
+  """return the element id of the recursion template of model"""
+  return "pydform-type-%s" % hashlib.sha1(
+    ("%s.%s" % (model.__module__, model.__qualname__)).encode("utf-8")
+  ).hexdigest()[:12]
+
+
+def compile_type(model, max_depth=MAX_DEPTH) -> FieldNode:
+  """return the recursion template node of model, compiled once per model
+
+     the template holds the fields of model named under PATH_TOKEN, the
+     browser replaces it with the qualified name of the recursion point it
+     expands. recursion points inside the template reference their own
+     templates, so a recursive model is written once however deep it is used.
+  """
+  node = _type_nodes.get((model, max_depth))
+
+  if node is not None:
+    return node
+
+  logger.debug("[%s] compiling recursion template", model.__name__)
+
+  d = FieldDesc(fieldname=PATH_TOKEN, parent=None, inner_type=model, inner_name=model.__name__, handler="basemodel")
+  children = plan_for_basemodel_type(model.__name__, d, (), max_depth).children
+
+  return _type_nodes.put((model, max_depth), FieldNode(
+    handler="template",
+    name=model.__name__,
+    qualname=type_template_id(model),
+    children=children,
+  ))
+
+
+def expand_recursive_type(node: FieldNode, qualname: str = None) -> FieldNode:
+  """return the basemodel node for the fields of a recursion point, one level deeper
+
+     used to render prefilled values below a recursion point; recursion
+     points inside it are expanded in turn when they have values.
+
+     qualname: str, the qualified name of the expansion, default the node's
+               (prefilled dict entries are numbered)
+  """
+  qualname = qualname or node.qualname
+  model = node.desc.inner_type
+
+  def build():
+    parent, _, fieldname = qualname.rpartition(".")
+    d = FieldDesc(fieldname=fieldname, parent=parent or None, inner_type=model, inner_name=model.__name__, handler="basemodel")
+    return plan_for_basemodel_type(node.name, d)
+
+  return _expanded_nodes.get_or_build((model, qualname), build)
+
+
+def recursion_templates(nodes, max_depth=MAX_DEPTH) -> Tuple[FieldNode, ...]:
+  """return the recursion templates needed by the recursion points in nodes"""
+  templates = {}
+  stack = list(nodes)
+
+  while stack:
+    node = stack.pop()
+
+    if node.handler == "recursive" and node.desc.inner_type not in templates:
+      template = templates[node.desc.inner_type] = compile_type(node.desc.inner_type, max_depth)
+      stack.extend(template.children)
+
+    stack.extend(node.children)
+
+  return tuple(templates.values())
+
+
+def get_plan(model) -> FormPlan:
+  """return the compiled plan for model from `plan_cache`, compiling on a miss"""
+  return plan_cache.get_or_build((model,), lambda: compile_model(model))
+
+
+
+def plan_values(nodes, data, values=None):
+  """map nested data (e.g. `model.dict()`) to per-request values keyed by input name
+
+     nodes: sequence of FieldNode, e.g. `FormPlan.nodes`
+     data: dict, field names to values, nested for basemodel fields
+     values: dict, updated in place if given
+
+     returns: dict[str, Any], for `pydform.html.render_plan` and `pydform.render_form`
+
+     NB: dict fields keep their dict under the field's qualified name, the
+     entries are filled in by `pydform.html.html_for_dict_type`; recursion
+     points keep theirs for `pydform.html.html_for_recursive_type`
+  """
+  if values is None:
+    values = {}
+
+  if not isinstance(data, dict):
+    return values
+
+  for node in nodes:
+    if node.desc is not None and node.desc.fieldname in data:
+      node_values(node, data[node.desc.fieldname], values)
+
+  return values
+
+
+def node_values(node, value, values):
+  """add the values for node and its children from the field value to values"""
+  if isinstance(value, pydantic.BaseModel):
+    value = model_dict(value)
+
+  if value is None:
+    return
+  elif node.handler == "basemodel":
+    plan_values(node.children, value, values)
+  elif node.handler in ("Union", "list", "tuple"):
+    # NB: union alternatives and list items take the value of their parent field
+    for child in node.children:
+      node_values(child, value, values)
+  elif node.handler in ("text", "template"):
+    pass
+  else:
+    # NB: dict and recursion point values are kept whole, their handlers expand them
+    values[node.qualname] = value
@@ -0,0 +1,110 @@
+"""register form models up front and convert them all before serving traffic
+
+    registry.register(User, "/users")
+    registry.register(Address, "/addresses")
+
+    @app.on_event("startup")
+    def startup():
+      registry.warm()
+"""
+import logging
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+from . import cache as _cache
+from .cache import form_cache, make_key
+from .jinja import build_form
+
+
+class FormRegistry:
+  """models and submission uris to convert at startup"""
+  def __init__(self):
+    self.entries = {}
+
+  def register(self, model, uri, options=None):
+    """add model to the registry for uri, returns model
+
+       options: dict, rendering options as for `asform`
+    """
+    self.entries[make_key(model, uri, options)] = (model, uri, options or {})
+    return model
+
+  def unregister(self, model):
+    """remove all entries for model"""
+    for key in [k for k in self.entries if k[0] is model]:
+      del self.entries[key]
+
+  def warm(self, executor=None, processes=None, cache=None):
+    """convert every registered model in parallel and load the html into cache
+
+       executor: concurrent.futures.Executor, default a ProcessPoolExecutor for this call
+       processes: int, worker count for the default executor, default the cpu count
+       cache: FormCache, default `pydform.cache.form_cache`
+
+       when `pydform.cache.disk_cache` is configured the forms go there instead
+       of cache, forms already on disk are not converted again. models which
+       fail in the executor (e.g. they cannot be pickled for a process pool)
+       are converted in this process instead.
+
+       returns: int, number of forms loaded
+    """
+    cache = form_cache if cache is None else cache
+    disk_cache = _cache.disk_cache
+    pending = {}
+
+    for key, (model, uri, options) in self.entries.items():
+      # NB: disk entries stay in the shared pages, asform reads them from there
+      if disk_cache is None or disk_cache.get_buffer(model, uri, options) is None:
+        pending[key] = (model, uri, options)
+
+    if cache.maxsize is not None and len(self.entries) > cache.maxsize:
+      logger.warning("warming %d forms into a cache of %d entries", len(self.entries), cache.maxsize)
+
+    if not pending:
+      return len(self.entries)
+
+    if executor is None:
+      with ProcessPoolExecutor(processes) as pool:
+        return self.warm(executor=pool, cache=cache)
+
+    futures = {
+      key: executor.submit(build_form, model, uri, options)
+      for key, (model, uri, options) in pending.items()
+    }
+
+    for key, future in futures.items():
+      model, uri, options = pending[key]
+
+      try:
+        html = future.result()
+      except Exception as e:
+        logger.warning("[%s] converting in process, executor failed [%s]", model.__name__, str(e))
+        html = build_form(model, uri, options)
+
+      if disk_cache is not None:
+        disk_cache.put(model, uri, html, options)
+      else:
+        cache.put(key, html)
+
+    logger.info("warmed %d forms, %d converted", len(self.entries), len(futures))
+    return len(self.entries)
+
+  def __len__(self):
+    return len(self.entries)
+
+  def __iter__(self):
+    return iter(self.entries.values())
+
+
+# process-wide registry, its methods are also module functions so
+# `pydform.registry.register(...)` works on the module or the instance
+registry = FormRegistry()
+
+register = registry.register
+unregister = registry.unregister
+warm = registry.warm
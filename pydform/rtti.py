@@ -1,5 +1,12 @@
+import enum
 import logging
 import pydantic
+import weakref
+
+from collections import namedtuple
+from typing import Any, ForwardRef, NamedTuple
+
+from .backend import FormModel, display_as_type, get_args, get_origin
 
 
 logger = logging.getLogger(__name__)
@@ -21,30 +28,95 @@ INPUT_TYPE_MAP = {
   "str": "text",
 }
 
+# classes checked with `issubclass`, in order
+TYPES = {
+  pydantic.BaseModel: "basemodel",
+  FormModel: "basemodel",
+  list: "list",
+  dict: "dict",
+  enum.Enum: "enum"
+}
+
+
+TypeInfo = namedtuple("TypeInfo", ["type_string", "display_name", "is_primitive"])
+
+
+class KeyValue(NamedTuple):
+  """key and value info of a dict, also read as `info["key"]`/`info["value"]`"""
+  key: Any
+  value: Any
+
+  def __getitem__(self, k):
+    return getattr(self, k) if isinstance(k, str) else tuple.__getitem__(self, k)
+
+
+# TypeInfo keyed by type, filled by `classify_type`; weak, so the classes of reloaded models are freed
+_type_cache = weakref.WeakKeyDictionary()
+
+# (inner_type, inner_name) keyed by (proc_type, outer_type_, type_), filled by `get_type_inner_info`;
+# NB: the entries hold the types, the table is emptied when it reaches INNER_INFO_SIZE
+INNER_INFO_SIZE = 65536
+_inner_info_cache = {}
+
+
 def is_primitive_type(typename):
   return typename in INPUT_TYPE_MAP
 
-def get_type_string(class_type_):
-  """convert a type to a string
-
-     using `issubclass` internally, if this fails, uses `pydantic.typing.display_as_type`
-  """
-  import enum
-  TYPES = {
-    pydantic.BaseModel: "basemodel",
-    list: "list",
-    dict: "dict",
-    enum.Enum: "enum"
-  }
+def _classify_type(class_type_):
+  type_string = None
 
   try:
     for t, n in TYPES.items():
       if issubclass(class_type_, t):
-        return n
+        type_string = n
+        break
   except (TypeError, KeyError):
     pass
 
-  return pydantic.typing.display_as_type(class_type_)
+  display_name = display_as_type(class_type_)
+
+  return TypeInfo(
+    type_string=type_string or display_name,
+    display_name=display_name,
+    is_primitive=is_primitive_type(display_name),
+  )
+
+def classify_type(class_type_) -> TypeInfo:
+  """classify a type once per process
+
+     returns: TypeInfo, with the handler string, display name and primitive flag
+
+     results are cached by type; unhashable (or not weakly referenceable)
+     typing constructs (e.g. `Annotated` with dict metadata) are classified on
+     every call
+  """
+  try:
+    return _type_cache[class_type_]
+  except KeyError:
+    info = _type_cache[class_type_] = _classify_type(class_type_)
+    return info
+  except TypeError:
+    return _classify_type(class_type_)
+
+def clear_type_cache():
+  """forget all classified types and interned field descriptors, e.g. after redefining models in a reload"""
+  # NB: imported here, fielddesc imports this module
+  from .fielddesc import clear_interned
+
+  _type_cache.clear()
+  _inner_info_cache.clear()
+  clear_interned()
+
+def get_type_string(class_type_):
+  """convert a type to a string
+
+     using `issubclass` internally, if this fails, uses `pydform.backend.display_as_type`
+  """
+  return classify_type(class_type_).type_string
+
+def display_name(class_type_):
+  """cached `pydform.backend.display_as_type`"""
+  return classify_type(class_type_).display_name
 
 
 def is_basemodel_type(class_type_):
@@ -63,47 +135,75 @@ def is_enum_type(class_type_):
 #  return typename.lower() == "union" # fml
 
 def get_type_inner_info(data, proc_type):
+  """get the inner type info of data, cached per (proc_type, outer type, type)
+
+     see `_get_type_inner_info`; unions are not cached because their inner
+     types are the sub-fields of each field
+  """
+  if proc_type in ("union", "Union"):
+    return _get_type_inner_info(data, proc_type)
+
+  key = (proc_type, data.outer_type_, data.type_)
+
+  try:
+    return _inner_info_cache[key]
+  except KeyError:
+    pass
+  except TypeError:
+    return _get_type_inner_info(data, proc_type)
+
+  if len(_inner_info_cache) >= INNER_INFO_SIZE:
+    _inner_info_cache.clear()
+
+  info = _inner_info_cache[key] = _get_type_inner_info(data, proc_type)
+  return info
+
+def _get_type_inner_info(data, proc_type):
   """get the inner type info of data
 
      data: modelinfo data field
      proc_type: typename of the outer type
 
-     returns: (inner_type, inner_name) a tuple with either (type, string) or (list[type], list[string]) depending on proc_type
+     returns: (inner_type, inner_name) a tuple with either (type, string) or (tuple[type], tuple[string]) depending on proc_type
 
      list, tuple return a scaler inner_type
-     dict return a dict with "key" and "value" info
-     union return a list of inner_types
+     dict return a KeyValue with "key" and "value" info
+     union return a tuple of inner_types
 
      FIXME: make this handlers for the proc_type key
   """
   # inner type is the container arg or primitive.
-  inner_type=pydantic.typing.get_origin(data.type_) or getattr(data, "type_")
-  inner_name=pydantic.typing.display_as_type(inner_type)
+  inner_type=get_origin(data.type_) or getattr(data, "type_")
+  inner_name=display_name(inner_type)
 
   try:
     if proc_type == "list":
       if is_enum_type(inner_type):
         inner_name = "enum"
     elif proc_type == "dict":
-      inner_type = {
-        "key": pydantic.typing.get_args(data.outer_type_)[0],
-        "value": pydantic.typing.get_args(data.outer_type_)[1]
-       }
-
-      inner_name = {
-        "key": pydantic.typing.display_as_type(inner_type["key"]),
-        "value": pydantic.typing.display_as_type(inner_type["value"])
-      }
+      args = get_args(data.outer_type_)
+
+      if len(args) != 2:
+        raise TypeError("dict without key and value types")
+
+      key, value = args
+
+      # NB: `update_forward_refs` resolves the value field, not the outer type's args
+      if isinstance(value, ForwardRef) and data.sub_fields:
+        value = data.sub_fields[0].outer_type_
+
+      inner_type = KeyValue(key, value)
+      inner_name = KeyValue(display_name(key), display_name(value))
     elif proc_type in ("union", "Union"):
-      inner_type = [x for x in data.sub_fields or []]
-      inner_name = [pydantic.typing.display_as_type(x) for x in data.sub_fields or []]
+      inner_type = tuple(data.sub_fields or ())
+      inner_name = tuple([display_name(x.outer_type_) for x in data.sub_fields or ()])
     elif proc_type in ("tuple", "Tuple"):
       # tuple is similar to union/list, but not sure whether we use sub-fields or inner type
       # this seems to work for now
 #      inner_type = [x for x in data.sub_fields or []]
 #      inner_name = [pydantic.typing.display_as_type(x) for x in data.sub_fields or []]
-      inner_type=pydantic.typing.get_origin(data.type_) or getattr(data, "type_")
-      inner_name=pydantic.typing.display_as_type(inner_type)
+      inner_type=get_origin(data.type_) or getattr(data, "type_")
+      inner_name=display_name(inner_type)
     else:
 #      logger.warning("[%s] inner type not processed", data.name)
       pass
@@ -0,0 +1,238 @@
+"""render forms from JSON schema documents instead of pydantic models
+
+a schema document (`Model.schema()`, `Model.model_json_schema()` or a stored
+file) is turned into `FormModel` classes which are planned and rendered like
+the pydantic models it was generated from, so a service can serve forms
+without importing the model modules:
+
+    # build step
+    pydform.schema.dump_schemas([User, Order], "forms.json")
+
+    # edge service
+    schemas = pydform.schema.load_schemas("forms.json")
+    pydform.asform({"model": schemas["User"], "uri": "/users"})
+    pydform.asform({"schema": {...}, "uri": "/users"})  # a single document
+
+`$ref`s into `definitions`/`$defs` are resolved once per document: each
+definition becomes one Enum or model class shared by every field using it.
+
+NB: properties are named by their alias in a schema, so aliased fields are
+named (and labelled) by the alias
+"""
+import datetime
+import enum
+import hashlib
+import json
+import logging
+
+from typing import Dict, List, Tuple, Union
+
+from .backend import AnnotatedField, FormModel, model_schema
+from .cache import FormCache
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+JSON_TYPES = {
+  "string": str,
+  "integer": int,
+  "number": float,
+  "boolean": bool,
+  "null": type(None),
+}
+
+STRING_FORMATS = {
+  "date-time": datetime.datetime,
+}
+
+
+class SchemaModel(FormModel):
+  """a model described by a JSON schema object, created by `SchemaResolver`
+
+     resolver: SchemaResolver of the document
+     object_schema: dict, the object schema (with `properties`)
+  """
+  resolver = None
+  object_schema = None
+
+  @classmethod
+  def form_fields(cls):
+    # NB: computed on first use, a field may refer back to this class
+    if "_fields" not in cls.__dict__:
+      cls._fields = cls.resolver.fields(cls.object_schema)
+
+    return cls._fields
+
+  @classmethod
+  def schema(cls) -> dict:
+    """the document, for `pydform.diskcache`"""
+    return cls.resolver.document
+
+
+class SchemaResolver:
+  """converts the schemas of one document into annotations for AnnotatedField
+
+     document: dict, JSON schema with `definitions` or `$defs`
+  """
+  def __init__(self, document: dict):
+    self.document = document
+    self.types = {}
+
+  def resolve(self, ref: str):
+    """return the type of a local `$ref`, created once per reference"""
+    try:
+      return self.types[ref]
+    except KeyError:
+      pass
+
+    if not ref.startswith("#/"):
+      raise ValueError("unsupported reference '%s'" % ref)
+
+    schema = self.document
+
+    for part in ref[2:].split("/"):
+      schema = schema[part.replace("~1", "/").replace("~0", "~")]
+
+    logger.debug("resolving '%s'", ref)
+
+    # NB: registered before the fields are read, for recursive definitions
+    tp = self.types[ref] = self.named_type(schema, ref.rsplit("/", 1)[-1])
+    return tp
+
+  def named_type(self, schema: dict, name: str):
+    """return an Enum or SchemaModel class for a definition, or its annotation"""
+    title = schema.get("title") or name
+
+    if "enum" in schema:
+      return enum.Enum(title, [(str(v), v) for v in schema["enum"]], module=__name__)
+
+    if "properties" in schema:
+      return type(title, (SchemaModel,), {
+        "__module__": __name__,
+        "__qualname__": title,
+        "resolver": self,
+        "object_schema": schema,
+      })
+
+    return self.annotation(schema)
+
+  def annotation(self, schema: dict):
+    """return the python annotation equivalent to a JSON schema"""
+    if "$ref" in schema:
+      return self.resolve(schema["$ref"])
+
+    if len(schema.get("allOf", ())) == 1:
+      return self.annotation(schema["allOf"][0])
+
+    members = schema.get("anyOf") or schema.get("oneOf")
+
+    if members:
+      return Union[tuple([self.annotation(s) for s in members])]
+
+    if "enum" in schema or "properties" in schema:
+      return self.named_type(schema, "Enum" if "enum" in schema else "Model")
+
+    kind = schema.get("type")
+
+    if isinstance(kind, list):
+      return Union[tuple([self.annotation({**schema, "type": k}) for k in kind])]
+
+    if kind == "object":
+      values = schema.get("additionalProperties")
+      return Dict[str, self.annotation(values)] if isinstance(values, dict) else dict
+
+    if kind == "array":
+      items = schema.get("prefixItems") or schema.get("items")
+
+      if isinstance(items, list):
+        return Tuple[tuple([self.annotation(s) for s in items])]
+
+      return List[self.annotation(items)] if isinstance(items, dict) else list
+
+    if kind == "string":
+      return STRING_FORMATS.get(schema.get("format"), str)
+
+    try:
+      return JSON_TYPES[kind]
+    except KeyError:
+      # NB: no type (`{}`) is any value, which has no input
+      logger.warning("unhandled schema '%s'", schema)
+      return object
+
+  def fields(self, schema: dict) -> List[AnnotatedField]:
+    """return the fields of an object schema in order"""
+    required = set(schema.get("required", ()))
+
+    return [
+      AnnotatedField(
+        name,
+        self.annotation(prop),
+        required=name in required,
+        default=prop.get("default"),
+        description=prop.get("description"),
+        extra=prop,
+      )
+      for name, prop in schema.get("properties", {}).items()
+    ]
+
+  def root(self):
+    """return the model class of the document"""
+    if "$ref" in self.document:
+      return self.resolve(self.document["$ref"])
+
+    # NB: v1 self-referencing models repeat the root in the definitions
+    title = self.document.get("title", "Form")
+    definition = self.document.get("definitions", {}).get(title)
+
+    if definition is not None and definition.get("properties") == self.document.get("properties"):
+      return self.resolve("#/definitions/%s" % title)
+
+    return self.named_type({**self.document, "properties": self.document.get("properties", {})}, title)
+
+
+# root model classes keyed by document digest
+# NB: bounded, a document evicted and seen again gets a new model class
+_schema_models = FormCache(maxsize=1024)
+
+# (document, model) by document id, so a document passed on every request is not serialised again
+_documents = FormCache(maxsize=1024)
+
+
+def schema_model(document: dict) -> type:
+  """return the model class for a JSON schema document, created once per document
+
+     NB: looked up by identity before the digest of the content, a document
+     changed in place is not seen again; pass a new dict (or the model itself)
+  """
+  cached, model = _documents.get(id(document), (None, None))
+
+  if cached is document:
+    return model
+
+  digest = hashlib.sha1(json.dumps(document, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+  model = _schema_models.get_or_build((digest,), lambda: SchemaResolver(document).root())
+
+  # NB: the document is kept with its model so its id is not reused while cached
+  _documents.put(id(document), (document, model))
+  return model
+
+
+def load_schema(path: str) -> type:
+  """return the model class for the JSON schema document in the file path"""
+  with open(path, encoding="utf-8") as f:
+    return schema_model(json.load(f))
+
+
+def dump_schemas(models, path: str):
+  """write the schemas of models to path as a JSON object keyed by model name, for `load_schemas`"""
+  with open(path, "w", encoding="utf-8") as f:
+    json.dump({model.__name__: model_schema(model) for model in models}, f, default=str)
+
+
+def load_schemas(path: str) -> Dict[str, type]:
+  """return the model classes for the schemas written by `dump_schemas`, by model name"""
+  with open(path, encoding="utf-8") as f:
+    return {name: schema_model(document) for name, document in json.load(f).items()}
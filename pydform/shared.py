@@ -0,0 +1,130 @@
+"""shared dict entry templates, emitted once per distinct entry form
+
+by default each dict section carries its own `<template>` with the entry form,
+so a model used as the value of many dict fields is repeated in the page for
+each of them. with the `shared_templates` option the entry forms are rendered
+with a placeholder (`__field__`) for the field name and deduplicated by
+content; each section references its template by id and append.js puts the
+field name back when an entry is cloned. the templates are written once, at
+the end of the form, so the html grows with the distinct entry types rather
+than the fields using them.
+
+    pydform.asform({"model": User, "uri": "/users", "options": {"shared_templates": True}})
+"""
+import hashlib
+import logging
+
+from .cache import FormCache
+from .html import DICT_ENTRY_HEAD, DICT_ENTRY_TAIL, HANDLERS, render_plan, write_dict_entries
+from .plan import FieldNode, FormPlan, text_node
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+FIELD_TOKEN = "__field__"
+
+SHARED_SECTION_HEAD = """
+<section id='{name}-section'>
+<h3 onclick="collapsible('{name}-items'); return false;">{name}</h3>
+<div>
+<a id='{name}-add-button' href='#' onclick='duplicate_item("{fieldname}", "{template}", "{name}-section", "{name}"); return false;'>add</a>
+</div>
+"""
+
+SHARED_TEMPLATE = """
+<template id='{template}'>{entry}</template>
+"""
+
+
+# (node, (template id, entry html)) keyed by id(node), see `pydform.html._dict_entries`
+_entry_templates = FormCache(maxsize=1024)
+
+
+def entry_template(node: FieldNode):
+  """return (template id, entry html) for the dict node, computed once per node
+
+     the entry is rendered with `FIELD_TOKEN` for the field name, nested dict
+     sections reference their own shared templates
+  """
+  cached, result = _entry_templates.get(id(node), (None, None))
+
+  if cached is node:
+    return result
+
+  fieldname = node.desc.fieldname
+  fmt = dict(name=FIELD_TOKEN, fieldname="_%s-key" % FIELD_TOKEN)
+
+  # NB: the inputs of an entry are named `<path>.<field>._<field>-key...`/`<path>.<field>._<field>-value`,
+  # the path of the dict is kept so the entry is only shared by fields under the same parent
+  parent = node.qualname[:-len(fieldname)]
+  children = render_plan(node.children, handlers=SHARED_HANDLERS)
+  children = children.replace(
+    "%s._%s-" % (node.qualname, fieldname), "%s%s._%s-" % (parent, FIELD_TOKEN, FIELD_TOKEN)
+  )
+
+  entry = DICT_ENTRY_HEAD.format(**fmt) + children + DICT_ENTRY_TAIL.format(**fmt)
+  result = ("pydform-template-%s" % hashlib.sha1(entry.encode("utf-8")).hexdigest()[:12], entry)
+
+  _entry_templates.put(id(node), (node, result))
+  return result
+
+
+def shared_dict_type(w, node: FieldNode, values: dict = None):
+  """dict handler which references the shared template for its entries"""
+  template, _ = entry_template(node)
+
+  w.write(SHARED_SECTION_HEAD.format(
+    name=node.name, fieldname="_%s-key" % node.desc.fieldname, template=template
+  ))
+
+  entries = values.get(node.qualname) if values else None
+
+  if entries:
+    write_dict_entries(w, node, entries)
+
+  w.write("</section>\n")
+  return (), None, None
+
+
+SHARED_HANDLERS = {
+  **HANDLERS,
+  "dict": lambda w, node, values: shared_dict_type(w, node, values),
+}
+
+
+# (plan, shared plan) keyed by model, the plan is the one from `pydform.plan.plan_cache`
+_shared_plans = FormCache(maxsize=256)
+
+
+def shared_plan(plan: FormPlan) -> FormPlan:
+  """return plan with the shared templates of all its dict sections appended
+
+     render it with SHARED_HANDLERS; computed once per plan
+  """
+  cached, result = _shared_plans.get((plan.model,), (None, None))
+
+  if cached is plan:
+    return result
+
+  templates = {}
+  stack = list(reversed(plan.nodes))
+
+  while stack:
+    node = stack.pop()
+
+    if node.handler == "dict":
+      template, entry = entry_template(node)
+      templates.setdefault(template, entry)
+
+    stack.extend(reversed(node.children))
+
+  logger.info("[%s] %d shared templates", plan.model.__name__, len(templates))
+
+  result = FormPlan(plan.model, plan.nodes + (text_node("_templates", "".join([
+    SHARED_TEMPLATE.format(template=template, entry=entry) for template, entry in templates.items()
+  ])),))
+
+  _shared_plans.put((plan.model,), (plan, result))
+  return result
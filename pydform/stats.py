@@ -0,0 +1,141 @@
+"""optional per-handler timing for compiling and rendering forms
+
+instrumentation is off by default and costs one `is None` check per field.
+enable it to record call counts, cumulative and self time per handler key
+(`basemodel`, `dict`, `enum`, ...) and the slowest qualified field names:
+
+    stats = pydform.stats.enable()
+    pydform.asform(...)
+    stats.asdict()   # export to a metrics system
+    pydform.stats.disable()
+"""
+import contextlib
+import heapq
+import logging
+import threading
+import time
+
+from collections import defaultdict
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+# the HandlerStats receiving measurements, None when disabled
+active = None
+
+
+class HandlerStats:
+  """call counts and timings per (phase, handler key)
+
+     phase is "compile" (pydform.plan) or "render" (pydform.html); times are seconds.
+     self time excludes the time spent in nested fields.
+
+     slowest: int, number of slowest fields to keep
+  """
+  def __init__(self, slowest=10):
+    self.slowest_count = slowest
+    self._lock = threading.Lock()
+    self._local = threading.local()
+    self.reset()
+
+  def reset(self):
+    """forget all measurements"""
+    with self._lock:
+      self.calls = defaultdict(int)
+      self.cumulative = defaultdict(float)
+      self.self_time = defaultdict(float)
+      self._slowest = []
+
+  def _stack(self):
+    try:
+      return self._local.stack
+    except AttributeError:
+      stack = self._local.stack = []
+      return stack
+
+  def begin(self):
+    """start timing a field, must be paired with `end`"""
+    self._stack().append([time.perf_counter(), 0.0])
+
+  def end(self, phase, key, qualname):
+    """stop timing the innermost field and record it under (phase, key)"""
+    stack = self._stack()
+    start, nested = stack.pop()
+    elapsed = time.perf_counter() - start
+
+    if stack:
+      stack[-1][1] += elapsed
+
+    with self._lock:
+      k = (phase, key)
+      self.calls[k] += 1
+      self.cumulative[k] += elapsed
+      self.self_time[k] += elapsed - nested
+
+      entry = (elapsed, phase, qualname)
+
+      if len(self._slowest) < self.slowest_count:
+        heapq.heappush(self._slowest, entry)
+      elif entry > self._slowest[0]:
+        heapq.heapreplace(self._slowest, entry)
+
+  def slowest(self):
+    """return [(seconds, phase, qualname)] for the slowest fields, slowest first"""
+    with self._lock:
+      return sorted(self._slowest, reverse=True)
+
+  def asdict(self):
+    """return the measurements as plain data
+
+       {phase: {key: {"calls", "cumulative", "self"}}, "slowest": [{"phase", "field", "seconds"}]}
+    """
+    with self._lock:
+      result = {"compile": {}, "render": {}}
+
+      for (phase, key), calls in self.calls.items():
+        result.setdefault(phase, {})[key] = {
+          "calls": calls,
+          "cumulative": self.cumulative[(phase, key)],
+          "self": self.self_time[(phase, key)],
+        }
+
+    result["slowest"] = [
+      {"phase": phase, "field": qualname, "seconds": elapsed}
+      for elapsed, phase, qualname in self.slowest()
+    ]
+
+    return result
+
+  def __repr__(self):
+    return "HandlerStats(%s)" % ",".join([
+      "%s.%s=%d" % (phase, key, calls) for (phase, key), calls in sorted(self.calls.items())
+    ])
+
+
+def enable(stats: HandlerStats = None) -> HandlerStats:
+  """start recording into stats (or a new HandlerStats) and return it"""
+  global active
+  active = stats or HandlerStats()
+  return active
+
+
+def disable() -> HandlerStats:
+  """stop recording and return the stats which were active"""
+  global active
+  stats, active = active, None
+  return stats
+
+
+@contextlib.contextmanager
+def instrumented(stats: HandlerStats = None):
+  """record into stats for the duration of a with block"""
+  previous = active
+  try:
+    yield enable(stats)
+  finally:
+    if previous is not None:
+      enable(previous)
+    else:
+      disable()
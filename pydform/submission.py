@@ -0,0 +1,174 @@
+"""decode submitted forms on the server, the python side of submission.js
+
+the form inputs are named with the qualified field names from `pydform.plan`
+plus the placeholder fragments for containers:
+
++ `_<field>-key`: user-entered dict key (`_<field>-<n>-key` for added entries)
++ `_<field>-value`: primitive dict value, belongs to the key with the same prefix
++ `_<field>-list`: comma-separated list values
+
+`decode_form` resolves these in one pass over the inputs (after collecting the
+dict keys) and inflates the dotted names into nested dicts, like `submit_form`:
+
+    @app.post("/users")
+    async def post_user(request: Request):
+      user = pydform.decode_model(User, await request.body(), request.headers["content-type"])
+"""
+import email.parser
+import email.policy
+import logging
+
+from typing import Any, Iterable, Tuple
+from urllib.parse import parse_qsl
+
+from .backend import validate_model
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+URI_INPUT = "_uri"
+
+
+def iskey(a: str) -> bool:
+  """predicate for deciding if a name fragment is a dict key"""
+  return a.startswith("_") and a.endswith("-key")
+
+
+def isvalue(a: str) -> bool:
+  """predicate for deciding if a name fragment is a dict value"""
+  return a.startswith("_") and a.endswith("-value")
+
+
+def islist(a: str) -> bool:
+  """predicate for deciding if a name fragment is a list"""
+  return a.startswith("_") and a.endswith("-list")
+
+
+def decode_form(items) -> dict:
+  """convert submitted (name, value) pairs into the nested dict for the model
+
+     items: iterable of (name, value), or a mapping (e.g. starlette FormData,
+            `multi_items()` is used if present)
+
+     returns: dict, nested field values ready for `pydform.backend.validate_model`
+
+     NB: like `submit_form`, the last value for a name wins, then empty values
+     and the `_uri` input are dropped (an empty last value drops the name), and
+     list values are split on `,`
+  """
+  if hasattr(items, "multi_items"):
+    items = items.multi_items()
+  elif hasattr(items, "items"):
+    items = items.items()
+
+  # NB: dict() keeps the first position and the last value of repeated names,
+  # empties are dropped after, as `encode_form_data` does
+  form = {k: v for k, v in items}
+  form = {k: v for k, v in form.items() if k != URI_INPUT and len(v) > 0}
+
+  # user-entered dict keys by the name of their key input
+  keys = {}
+
+  for name, value in form.items():
+    if iskey(name.rpartition(".")[2]):
+      keys[name] = value
+
+  result = {}
+
+  for name, value in form.items():
+    fragments = name.split(".")
+    last = fragments[-1]
+
+    if iskey(last):
+      # the key input itself, it only names its entry
+      continue
+
+    path = []
+
+    for i, fragment in enumerate(fragments):
+      if iskey(fragment):
+        fragment = keys.get(".".join(fragments[:i + 1]), fragment)
+      elif isvalue(fragment) and i == len(fragments) - 1:
+        # NB: the value of a primitive entry is keyed by its sibling key input
+        fragment = keys.get(".".join(fragments[:i] + [fragment[:-len("-value")] + "-key"]), fragment)
+      elif islist(fragment):
+        if i == len(fragments) - 1:
+          value = value.split(",") if isinstance(value, str) else [value]
+          break
+
+      path.append(fragment)
+
+    inflate(result, path, value, name)
+
+  return result
+
+
+def inflate(result: dict, path, value, name: str = None):
+  """set value at path in the nested dict result, the first value at a path wins"""
+  node = result
+
+  for fragment in path[:-1]:
+    node = node.setdefault(fragment, {})
+
+    if not isinstance(node, dict):
+      logger.warning("[%s] '%s' is not a container, ignored", name, fragment)
+      return
+
+  node.setdefault(path[-1], value)
+
+
+def parse_body(body: bytes, content_type: str) -> Iterable[Tuple[str, Any]]:
+  """parse a urlencoded or multipart/form-data request body into (name, value) pairs
+
+     multipart files are returned as bytes, other values as str
+  """
+  mimetype = content_type.partition(";")[0].strip().lower()
+
+  if mimetype == "application/x-www-form-urlencoded":
+    if isinstance(body, bytes):
+      body = body.decode("utf-8")
+
+    return parse_qsl(body, keep_blank_values=True)
+  elif mimetype == "multipart/form-data":
+    return parse_multipart(body, content_type)
+
+  raise ValueError("unsupported content type '%s'" % content_type)
+
+
+def parse_multipart(body: bytes, content_type: str):
+  """parse a multipart/form-data body with the stdlib email parser"""
+  message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+    b"content-type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+  )
+
+  items = []
+
+  for part in message.iter_parts():
+    name = part.get_param("name", header="content-disposition")
+
+    if name is None:
+      continue
+
+    value = part.get_payload(decode=True) or b""
+
+    if part.get_filename() is None:
+      value = value.decode(part.get_content_charset() or "utf-8")
+
+    items.append((name, value))
+
+  return items
+
+
+def decode_body(body: bytes, content_type: str) -> dict:
+  """decode a submitted request body into the nested dict for the model"""
+  return decode_form(parse_body(body, content_type))
+
+
+def decode_model(model, body: bytes, content_type: str):
+  """decode a submitted request body and validate it as model
+
+     raises: pydantic.ValidationError
+  """
+  return validate_model(model, decode_body(body, content_type))
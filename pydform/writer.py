@@ -0,0 +1,80 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+logger.propagate = True
+
+
+class HTMLConversionException(Exception):
+  pass
+
+class HTMLAttributeCreationError(HTMLConversionException):
+  pass
+
+
+def format_attrs(attrs: dict) -> str:
+  """format a dict of attributes for an opening tag
+
+     attributes with empty string values are emitted without a value (e.g. `required`)
+  """
+  try:
+    attr_list =["%s='%s'" % (k, v) for k,v in attrs.items() if len(str(v)) > 0]
+    attr_list+=[k for k,v in attrs.items() if len(str(v)) == 0]
+  except TypeError as e:
+    #logger.exception("failed to build attributes from '%s' [%s]", str(attrs), str(e))
+    raise HTMLAttributeCreationError from e
+
+  return " ".join(attr_list)
+
+
+class FragmentWriter:
+  """append-only html buffer
+
+     handlers append tags and text to the writer and the output is joined once
+     by `getvalue`, so nested content is never copied into its parent. `drain`
+     hands out what has been written so far for streaming.
+
+     NB: text and attribute values are written as given, like `pydform.html.make_tag`
+  """
+  __slots__ = ("parts", "size")
+
+  def __init__(self):
+    self.parts = []
+    self.size = 0
+
+  def write(self, text: str):
+    """append text to the buffer"""
+    self.parts.append(text)
+    self.size += len(text)
+
+  def open(self, name: str, attrs: dict = None):
+    """append the opening half of a tag with its attributes"""
+    self.write("<%s %s>" % (name, format_attrs(attrs) if attrs is not None else ""))
+
+  def attrs(self, attrs: dict):
+    """append attributes inside an opening tag, see `format_attrs`"""
+    self.write(format_attrs(attrs))
+
+  def text(self, text: str):
+    """append the content of a tag"""
+    if text:
+      self.write(text)
+
+  def close(self, name: str):
+    """append the closing half of a tag"""
+    self.write("</%s>" % name)
+
+  def tag(self, name: str, attrs: dict = None, content: str = None):
+    """append a complete tag, the writer equivalent of `pydform.html.make_tag`"""
+    self.write("<%s %s>%s</%s>" % (name, format_attrs(attrs) if attrs is not None else "", content or "", name))
+
+  def drain(self) -> str:
+    """return everything written since the last drain and empty the buffer"""
+    value = "".join(self.parts)
+    self.parts.clear()
+    self.size = 0
+    return value
+
+  def getvalue(self) -> str:
+    """return everything in the buffer"""
+    return "".join(self.parts)
@@ -20,7 +20,7 @@ setuptools.setup(
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",
     ],
-    python_requires=">=3.7",
+    python_requires=">=3.9",
     install_requires=[
       "pydantic",
     ],
@@ -30,6 +30,9 @@ setuptools.setup(
         "mock",
         "pytest",
       ],
+      "jinja": [
+        "jinja2",
+      ],
       "examples": [
         "fastapi",
         "jinja2",
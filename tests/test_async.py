@@ -0,0 +1,60 @@
+"""`asform_async` renders the same forms as `asform`"""
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import pydantic
+import pytest
+
+import pydform
+
+
+class Address(pydantic.BaseModel):
+  street: str = "s"
+  number: int = 1
+
+
+class User(pydantic.BaseModel):
+  name: str
+  age: int = 3
+  home: Address = None
+  addrs: Dict[str, Address] = {}
+
+
+USER = User(name="x", home=Address(street="h"), addrs={"work": Address(street="w", number=2)})
+
+SCHEMA = {
+  "title": "Person",
+  "type": "object",
+  "properties": {"name": {"type": "string"}, "age": {"type": "integer", "default": 7}},
+  "required": ["name"],
+}
+
+VALUES = [
+  {"model": User},
+  {"model": USER},
+  {"model": User, "defaults": {"name": "y", "home": {"street": "z"}}},
+  {"model": User, "defaults": USER, "options": {"shared_templates": True}},
+  {"model": User, "options": {"lazy": "/fragments"}},
+  {"schema": SCHEMA},
+  {"schema": SCHEMA, "defaults": {"name": "n"}},
+]
+
+
+@pytest.mark.parametrize("chunks", [None, 1, 3])
+@pytest.mark.parametrize("value", VALUES)
+def test_async_matches_asform(value, chunks):
+  value = {**value, "uri": "/x"}
+
+  with ThreadPoolExecutor(2) as executor:
+    html = asyncio.run(pydform.asform_async(value, executor, chunks))
+
+  assert html == pydform.asform(value)
+
+
+def test_defaults_are_not_cached():
+  blank = pydform.asform({"model": User, "uri": "/x"})
+  asyncio.run(pydform.asform_async({"model": USER, "uri": "/x"}))
+
+  assert asyncio.run(pydform.asform_async({"model": User, "uri": "/x"})) == blank
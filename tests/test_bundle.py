@@ -0,0 +1,106 @@
+"""the minified javascript bundle and its ASGI application, see `pydform.bundle`"""
+import asyncio
+import shutil
+import subprocess
+
+import pytest
+
+from pydform import bundle
+
+
+def test_minify_drops_comments_and_indentation():
+  source = """
+/*
+ * header
+ */
+function f(a) {
+  // a comment
+  let b = a + 1;  // trailing
+  return b; /* inline */
+}
+"""
+  assert bundle.minify(source) == "function f(a) {\nlet b = a + 1;\nreturn b;\n}\n"
+
+
+@pytest.mark.parametrize("line", [
+  'let url = "http://example.com/*x";',
+  "let s = 'a // b';",
+  'let t = `line // one\n  /* two */ line`;',
+  r'let q = "say \"//\" twice";',
+  "let r = /\\/\\/|\\/\\*/g;",
+  "let parts = name.split(/[/*]/);",
+  "if (/^a\\/\\/b$/.test(s)) {",
+])
+def test_minify_keeps_strings_and_regular_expressions(line):
+  assert bundle.minify("  %s\n  // comment\n" % line) == line + "\n"
+
+
+def test_minify_drops_console_statements():
+  source = 'console.log("a");\n  console.log("b"); next();\nfoo(console.log);\n'
+
+  assert bundle.minify(source) == 'console.log("b"); next();\nfoo(console.log);\n'
+
+
+def test_block_comment_keeps_lines_apart():
+  assert bundle.minify("a = 1 /* x\n */ b = 2\n") == "a = 1\nb = 2\n"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_bundle_parses(tmp_path):
+  path = tmp_path / "bundle.js"
+  path.write_bytes(bundle.get_bundle().content)
+
+  subprocess.run(["node", "--check", str(path)], check=True)
+
+
+def test_script_tag():
+  filename = bundle.get_bundle().filename
+
+  assert filename.startswith("pydform.") and filename.endswith(".js")
+  assert bundle.script_tag("/static/js/") == '<script type="text/javascript" src="/static/js/%s"></script>' % filename
+  assert bundle.script_tag() == '<script type="text/javascript" src="/static/pydform/%s"></script>' % filename
+
+
+def request(path, method="GET", headers=()):
+  """return (status, headers, body) of a request to the bundle app"""
+  messages = []
+
+  async def send(message):
+    messages.append(message)
+
+  scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+  asyncio.run(bundle.app(scope, None, send))
+  return messages[0]["status"], dict(messages[0]["headers"]), messages[1]["body"]
+
+
+def test_app_serves_the_bundle():
+  b = bundle.get_bundle()
+  status, headers, body = request("/static/pydform/" + b.filename)
+
+  assert status == 200
+  assert body == b.content
+  assert headers[b"etag"] == b.etag.encode("ascii")
+  assert headers[b"cache-control"] == bundle.CACHE_CONTROL
+  assert headers[b"content-type"] == bundle.CONTENT_TYPE
+  assert headers[b"content-length"] == str(len(b.content)).encode("ascii")
+
+
+def test_app_not_modified():
+  b = bundle.get_bundle()
+  status, headers, body = request("/" + b.filename, headers=[(b"if-none-match", b.etag.encode("ascii"))])
+
+  assert (status, body) == (304, b"")
+  assert headers[b"etag"] == b.etag.encode("ascii")
+
+  assert request("/" + b.filename, headers=[(b"if-none-match", b'"other"')])[0] == 200
+
+
+def test_app_head_and_errors():
+  b = bundle.get_bundle()
+  status, headers, body = request("/" + b.filename, method="HEAD")
+
+  assert (status, body) == (200, b"")
+  assert headers[b"content-length"] == str(len(b.content)).encode("ascii")
+
+  assert request("/pydform.0000.js")[0] == 404
+  assert request("/" + b.filename, method="POST")[:2] == (405, {b"allow": b"GET, HEAD", b"content-length": b"0"})
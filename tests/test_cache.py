@@ -0,0 +1,115 @@
+"""the LRU cache of rendered forms, see `pydform.cache.FormCache`"""
+import pydantic
+
+import pydform
+
+from pydform.cache import FormCache, make_key
+
+
+class User(pydantic.BaseModel):
+  name: str = "u"
+
+
+class Address(pydantic.BaseModel):
+  street: str = "s"
+
+
+def test_get_and_put():
+  cache = FormCache()
+
+  assert cache.get("a") is None
+  assert cache.get("a", 1) == 1
+  assert cache.put("a", "html") == "html"
+  assert cache.get("a") == "html"
+  assert "a" in cache
+  assert cache.info() == (1, 2, 128, 1)
+
+
+def test_least_recently_used_is_evicted():
+  cache = FormCache(maxsize=3)
+
+  for key in "abc":
+    cache.put(key, key)
+
+  cache.get("a")
+  cache.put("d", "d")
+
+  assert len(cache) == 3
+  assert "b" not in cache
+  assert all(key in cache for key in "acd")
+
+  cache.put("c", "c2")
+  cache.put("e", "e")
+
+  assert "a" not in cache
+  assert cache.get("c") == "c2"
+
+
+def test_maxsize_zero_and_none():
+  disabled = FormCache(maxsize=0)
+  assert disabled.put("a", 1) == 1
+  assert len(disabled) == 0
+
+  unbounded = FormCache(maxsize=None)
+
+  for i in range(1000):
+    unbounded.put(i, i)
+
+  assert len(unbounded) == 1000
+
+
+def test_get_or_build():
+  cache = FormCache()
+  built = []
+
+  def build():
+    built.append(1)
+    return None
+
+  # NB: None is a value, it is not built again
+  assert cache.get_or_build("a", build) is None
+  assert cache.get_or_build("a", build) is None
+  assert len(built) == 1
+
+
+def test_invalidate():
+  cache = FormCache()
+  cache.put(make_key(User, "/a"), "a")
+  cache.put(make_key(User, "/b", {"lazy": "/f"}), "b")
+  cache.put(make_key(Address, "/a"), "c")
+
+  assert cache.invalidate(User) == 2
+  assert len(cache) == 1
+  assert make_key(Address, "/a") in cache
+  assert cache.invalidate() == 1
+  assert len(cache) == 0
+
+
+def test_clear_resets_counters():
+  cache = FormCache()
+  cache.put("a", 1)
+  cache.get("a")
+  cache.get("b")
+  cache.clear()
+
+  assert cache.info() == (0, 0, 128, 0)
+
+
+def test_empty_cache_is_falsy():
+  # NB: callers compare with None rather than relying on truth, see `FormRegistry.warm`
+  assert not FormCache()
+
+
+def test_make_key_sorts_options():
+  assert make_key(User, "/x", {"a": 1, "b": 2}) == make_key(User, "/x", {"b": 2, "a": 1})
+  assert make_key(User, "/x") == make_key(User, "/x", {})
+
+
+def test_asform_uses_form_cache():
+  pydform.form_cache.clear()
+  html = pydform.asform({"model": User, "uri": "/x"})
+
+  assert pydform.asform({"model": User, "uri": "/x"}) == html
+  assert pydform.asform({"model": User, "uri": "/x", "cache": False}) == html
+  assert pydform.form_cache.info()[:2] == (1, 1)
+  assert len(pydform.form_cache) == 1
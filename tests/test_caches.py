@@ -0,0 +1,88 @@
+"""the caches of compiled fragments are bounded, they are keyed by nodes and plans which cannot be weakly referenced"""
+import enum
+import gc
+import weakref
+
+from typing import Dict
+
+import pydantic
+
+import pydform
+
+from pydform import datalist, html, plan, schema, shared
+from pydform.cache import FormCache
+
+
+def dict_model(i):
+  item = pydantic.create_model("Item%d" % i, x=(int, i))
+  return pydantic.create_model("Items%d" % i, items=(Dict[str, item], {}))
+
+
+def edit_form(model):
+  return pydform.asform({"model": model, "uri": "/x", "defaults": {"items": {"k": {"x": 1}}}})
+
+
+def test_dict_entries_are_bounded(monkeypatch):
+  monkeypatch.setattr(html, "_dict_entries", FormCache(maxsize=4))
+
+  for i in range(10):
+    assert "name='items._items-0-key'" in edit_form(dict_model(i))
+
+  assert len(html._dict_entries) == 4
+
+
+def test_shared_templates_are_bounded(monkeypatch):
+  monkeypatch.setattr(shared, "_entry_templates", FormCache(maxsize=4))
+  monkeypatch.setattr(shared, "_shared_plans", FormCache(maxsize=4))
+
+  for i in range(10):
+    html = pydform.asform({"model": dict_model(i), "uri": "/x", "options": {"shared_templates": True}})
+    assert "<template id='pydform-template-" in html
+
+  assert len(shared._entry_templates) == 4
+  assert len(shared._shared_plans) == 4
+
+
+def test_datalist_plans_are_bounded(monkeypatch):
+  monkeypatch.setattr(datalist, "_datalist_plans", FormCache(maxsize=4))
+
+  for i in range(10):
+    colour = enum.Enum("Colour%d" % i, {"c%d" % j: "colour-%d" % j for j in range(200)})
+    model = pydantic.create_model("Paint%d" % i, colour=(colour, None))
+    assert "<datalist id='pydform-enum-" in pydform.asform({"model": model, "uri": "/x"})
+
+  assert len(datalist._datalist_plans) == 4
+
+
+
+def test_recursion_templates_are_bounded(monkeypatch):
+  monkeypatch.setattr(plan, "_type_nodes", FormCache(maxsize=4))
+
+  for i in range(10):
+    assert plan.compile_type(pydantic.create_model("Node%d" % i, label=(str, "n"))).handler == "template"
+
+  assert len(plan._type_nodes) == 4
+
+
+def test_schema_models_are_bounded(monkeypatch):
+  monkeypatch.setattr(schema, "_schema_models", FormCache(maxsize=4))
+  documents = [{"title": "User", "type": "object", "properties": {"f%d" % i: {"type": "string"}}} for i in range(10)]
+
+  for document in documents:
+    assert "name='f" in pydform.asform({"schema": document, "uri": "/x"})
+
+  assert len(schema._schema_models) == 4
+  assert schema.schema_model(dict(documents[-1])) is schema.schema_model(documents[-1])
+
+
+def test_enum_tables_release_enum_classes():
+  colour = enum.Enum("Transient", {"c%d" % j: "colour-%d" % j for j in range(200)})
+  plan.enum_values(colour)
+  datalist.enum_index(colour)
+  plan.enum_list_id(colour)
+  ref = weakref.ref(colour)
+
+  del colour
+  gc.collect()
+
+  assert ref() is None
@@ -0,0 +1,77 @@
+"""the on-disk form cache, see `pydform.cache.use_disk_cache`"""
+import enum
+import os
+
+import pydantic
+import pytest
+
+import pydform
+
+from pydform import cache, diskcache, plan
+from pydform.diskcache import renderer_version
+
+
+Colour = enum.Enum("Colour", {"c%d" % i: "colour-%d" % i for i in range(40)})
+
+
+class User(pydantic.BaseModel):
+  name: str
+  colour: Colour = Colour.c0
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+  yield cache.use_disk_cache(str(tmp_path))
+  cache.use_disk_cache(None)
+  cache.form_cache.clear()
+
+
+def test_disk_hits_are_not_copied_into_the_process_cache(disk_cache):
+  cache.form_cache.clear()
+  html = pydform.asform({"model": User, "uri": "/x"})
+
+  assert pydform.asform({"model": User, "uri": "/x"}) == html
+  assert len(cache.form_cache) == 0
+  assert bytes(disk_cache.get_buffer(User, "/x")) == html.encode("utf-8")
+
+
+def test_key_changes_with_compile_settings(disk_cache, monkeypatch):
+  key = disk_cache.key(User, "/x")
+  monkeypatch.setattr(plan, "LARGE_ENUM_SIZE", plan.LARGE_ENUM_SIZE + 1)
+
+  assert disk_cache.key(User, "/x") != key
+
+
+def test_prune_removes_other_renderer_versions(disk_cache):
+  pydform.asform({"model": User, "uri": "/x"})
+  stale = os.path.join(disk_cache.path, "000000000000-stale.html")
+
+  with open(stale, "w") as f:
+    f.write("<form></form>")
+
+  assert disk_cache.prune() == 1
+  assert [name.split("-")[0] for name in os.listdir(disk_cache.path)] == [renderer_version()]
+
+
+def test_hashes_and_maps_are_bounded(tmp_path, monkeypatch):
+  monkeypatch.setattr(diskcache, "HASHES_SIZE", 3)
+  monkeypatch.setattr(diskcache, "MAPS_SIZE", 2)
+  disk_cache = diskcache.DiskFormCache(str(tmp_path))
+  models = [pydantic.create_model("Model%d" % i, f=(str, "v%d" % i)) for i in range(5)]
+
+  for model in models:
+    disk_cache.put(model, "/x", pydform.asform({"model": model, "uri": "/x", "cache": False}))
+
+  first = disk_cache.get_buffer(models[0], "/x")
+  buffers = [disk_cache.get_buffer(model, "/x") for model in models[1:]]
+
+  assert len(disk_cache._hashes) == 3
+  assert len(disk_cache._maps) == 2
+
+  # NB: an evicted map stays readable while it is held
+  assert not first.closed
+  assert b"value='v0'" in first[:]
+  assert [b"value='v%d'" % (i + 1) in m[:] for i, m in enumerate(buffers)] == [True] * 4
+
+  disk_cache.close()
+  assert all(m.closed for m in buffers[-2:])
@@ -0,0 +1,90 @@
+"""the jinja extension renders the same forms as `pydform.asform`"""
+import enum
+
+from typing import Dict, List, Optional
+
+import pydantic
+import pytest
+
+import pydform
+
+jinja2 = pytest.importorskip("jinja2")
+
+
+Colour = enum.Enum("Colour", {"c%d" % i: "colour-%d" % i for i in range(100)})
+
+
+class Size(str, enum.Enum):
+  small = "small"
+  large = "large"
+
+
+class Address(pydantic.BaseModel):
+  street: str = "s"
+  number: int = 1
+  size: Size = Size.small
+
+
+class User(pydantic.BaseModel):
+  name: str = pydantic.Field(..., description="full name")
+  nick: str = pydantic.Field("n", description="short name")
+  age: int = 3
+  colour: Colour = Colour.c0
+  tags: List[str] = []
+  addrs: Dict[str, Address] = {}
+  scores: Dict[str, int] = {}
+
+
+class Tree(pydantic.BaseModel):
+  name: str = "t"
+  children: Dict[str, "Tree"] = {}
+  parent: Optional["Tree"] = None
+
+
+Tree.update_forward_refs()
+
+
+USER = User(
+  name="x", colour=Colour.c7, tags=["a", "b"],
+  addrs={"home": Address(street="a"), "work": Address(street="b", number=2, size=Size.large)},
+  scores={"maths": 3},
+)
+
+TREE = Tree(name="root", children={"k": Tree(name="c", children={"j": Tree(name="d")})}, parent=Tree(name="p"))
+
+OPTIONS = [{}, {"shared_templates": True}, {"lazy": "/fragments"}, {"enum_search": "/options"}]
+
+
+@pytest.fixture
+def template():
+  env = jinja2.Environment(extensions=["pydform.ext.FormExtension"])
+  return env.from_string("{{ value | asform | safe }}")
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+@pytest.mark.parametrize("model, defaults", [(User, None), (User, USER), (Tree, None), (Tree, TREE)])
+def test_extension_matches_asform(template, model, defaults, options):
+  value = {"model": model, "uri": "/x", "defaults": defaults, "options": options}
+
+  assert template.render(value=value) == pydform.asform(value)
+
+
+def test_dict_entries_are_prefilled(template):
+  html = template.render(value={"model": User, "uri": "/x", "defaults": USER})
+
+  assert "name='addrs._addrs-0-key'" in html
+  assert "value='home'" in html
+  assert "value='maths'" in html
+
+
+def test_models_sharing_a_name(template):
+  first = {"title": "User", "type": "object", "properties": {"name": {"type": "string"}}}
+  second = {"title": "User", "type": "object", "properties": {"email": {"type": "string"}}}
+
+  for schema in (first, second, first):
+    value = {"schema": schema, "uri": "/x"}
+    assert template.render(value=value) == pydform.asform(value)
+
+  for fields in ({"name": (str, "a")}, {"email": (str, "b")}):
+    value = {"model": pydantic.create_model("Created", **fields), "uri": "/x"}
+    assert template.render(value=value) == pydform.asform(value)
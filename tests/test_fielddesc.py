@@ -0,0 +1,36 @@
+"""interned field descriptors, see `pydform.fielddesc.FieldDesc`"""
+import pydantic
+
+from pydform import fielddesc
+from pydform.fielddesc import FieldDesc, field_attributes
+from pydform.plan import compile_model
+from pydform.rtti import clear_type_cache
+
+
+def test_equal_descriptors_are_shared():
+  a = FieldDesc("x", handler="int", attributes={"default": 1})
+
+  assert FieldDesc("x", handler="int", attributes={"default": 1}) is a
+  assert FieldDesc("x", handler="int", attributes={"default": True}) is not a
+
+
+def test_clear_type_cache_forgets_interned_descriptors():
+  model = pydantic.create_model("Interned", x=(int, 1), y=(str, "y"))
+  compile_model(model)
+
+  assert fielddesc._descs and fielddesc._attributes
+
+  clear_type_cache()
+
+  assert not fielddesc._descs
+  assert not fielddesc._attributes
+
+
+def test_interned_tables_are_bounded(monkeypatch):
+  monkeypatch.setattr(fielddesc, "INTERN_SIZE", 8)
+  clear_type_cache()
+
+  for i in range(20):
+    field_attributes({"default": i})
+
+  assert len(fielddesc._attributes) <= 8
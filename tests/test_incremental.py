@@ -0,0 +1,69 @@
+"""incremental re-rendering, see `pydform.incremental`"""
+import re
+
+import pydantic
+import pytest
+
+from pydform.cache import FormCache
+from pydform.incremental import FORM_KEY, FragmentRenderer
+from pydform.jinja import build_form
+
+
+def family(default=1, other_default=0, **fields):
+  """a new version of the classes, as after a reload"""
+  child = pydantic.create_model("Child", __module__="family", a=(int, default), b=(str, None))
+  other = pydantic.create_model("Other", __module__="family", c=(int, other_default))
+  return pydantic.create_model("Family", __module__="family", child=(child, None), other=(other, None), **fields)
+
+
+def strip_fragments(html):
+  return re.sub(r"<!--/?pydform:[^>]*-->", "", html)
+
+
+@pytest.fixture
+def renderer():
+  return FragmentRenderer(FormCache(maxsize=None))
+
+
+def test_first_render_matches_build_form(renderer):
+  model = family()
+  update = renderer.render(model, "/x")
+
+  assert update.changed == {}
+  assert strip_fragments(update.html) == build_form(model, "/x")
+
+
+def test_changed_subtree_is_rendered_and_the_rest_spliced(renderer):
+  renderer.render(family(1), "/x")
+  model = family(2)
+  update = renderer.render(model, "/x")
+
+  assert list(update.changed) == ["child.a"]
+  assert "value='2'" in update.changed["child.a"]
+  # the form, the child section and the changed input
+  assert update.rendered == 3
+  assert strip_fragments(update.html) == build_form(model, "/x")
+
+
+def test_unchanged_model_renders_nothing(renderer):
+  renderer.render(family(), "/x")
+  update = renderer.render(family(), "/x")
+
+  assert update.changed == {}
+  assert update.rendered == 0
+
+
+@pytest.mark.parametrize("before, after", [(1, True), (1, 1.0), (True, 1.0)])
+def test_equal_defaults_of_other_types_are_changes(renderer, before, after):
+  renderer.render(family(other_default=before), "/x")
+  update = renderer.render(family(other_default=after), "/x")
+
+  assert list(update.changed) == ["other.c"]
+  assert "value='%s'" % after in update.changed["other.c"]
+
+
+def test_new_field_replaces_the_form(renderer):
+  renderer.render(family(), "/x")
+  update = renderer.render(family(extra=(str, None)), "/x")
+
+  assert list(update.changed) == [FORM_KEY]
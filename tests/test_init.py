@@ -0,0 +1,30 @@
+"""the public names and submodules of pydform are imported on first use"""
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pydform
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PACKAGE = os.path.join(ROOT, "pydform")
+
+
+def test_every_submodule_is_listed():
+  modules = {name[:-3] for name in os.listdir(PACKAGE) if name.endswith(".py") and name != "__init__.py"}
+
+  assert modules - {"registry"} == set(pydform.SUBMODULES)
+
+
+def test_names_resolve_after_a_bare_import():
+  names = [*pydform.SUBMODULES, *pydform.NAMES]
+
+  # NB: ext needs jinja2, which is optional
+  if importlib.util.find_spec("jinja2") is None:
+    names.remove("ext")
+
+  # NB: in a new process, the tests have imported the submodules here
+  code = "import pydform\nfor name in %r:\n  getattr(pydform, name)" % (names,)
+  subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
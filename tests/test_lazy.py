@@ -0,0 +1,95 @@
+"""lazy sections served by `pydform.lazy.FragmentApp`"""
+import asyncio
+
+from typing import Dict
+
+import pydantic
+
+import pydform
+
+from pydform import lazy
+from pydform.cache import form_cache
+
+
+class Leaf(pydantic.BaseModel):
+  x: int = 1
+
+
+class Branch(pydantic.BaseModel):
+  label: str = "b"
+  leaves: Dict[str, Leaf] = {}
+
+
+class Root(pydantic.BaseModel):
+  name: str = "r"
+  branches: Dict[str, Branch] = {}
+
+
+APP = lazy.FragmentApp([Root])
+
+
+def get(path, query=b"", root_path="", headers=()):
+  """return (status, headers, body) of a GET on APP"""
+  messages = []
+
+  async def send(message):
+    messages.append(message)
+
+  scope = {
+    "type": "http", "method": "GET", "path": path, "root_path": root_path,
+    "query_string": query, "headers": list(headers),
+  }
+  asyncio.run(APP(scope, None, send))
+  return messages[0]["status"], dict(messages[0]["headers"]), messages[1]["body"]
+
+
+def test_placeholder_names_the_fragment():
+  html = pydform.asform({"model": Root, "uri": "/x", "options": {"lazy": "/fragments/Root"}})
+
+  assert "data-fragment='/fragments/Root?name=branches'" in html
+
+
+def test_fragment():
+  status, headers, body = get("/fragments/Root", b"name=branches", root_path="/fragments")
+
+  assert status == 200
+  assert b"name='branches._branches-key.label'" in body
+  assert b"data-fragment='/fragments/Root?name=branches/branches._branches-key.leaves'" in body
+
+  status, _, body = get("/fragments/Root", b"name=branches", root_path="/fragments",
+                        headers=[(b"if-none-match", headers[b"etag"])])
+  assert (status, body) == (304, b"")
+
+
+def test_fragment_with_path_relative_to_mount():
+  assert get("/Root", b"name=branches", root_path="/fragments")[2] == get("/fragments/Root", b"name=branches", root_path="/fragments")[2]
+
+
+def test_nested_fragment():
+  status, _, body = get("/Root", b"name=branches/branches._branches-key.leaves")
+
+  assert status == 200
+  assert b"name='branches._branches-key.leaves._leaves-key.x'" in body
+
+
+def test_unknown_paths_and_names_are_404():
+  assert get("/fragments/Root", b"name=nope", root_path="/fragments")[0] == 404
+  assert get("/fragments/Other", b"name=branches", root_path="/fragments")[0] == 404
+  assert get("/other/Root", b"name=branches", root_path="/fragments")[0] == 404
+  assert get("/fragments/any/Root", b"name=branches", root_path="/fragments")[0] == 404
+
+
+def test_caches_are_bounded_by_the_mount():
+  lazy.lazy_handlers.cache_clear()
+  lazy.fragment_cache.clear()
+  form_cache.clear()
+
+  for i in range(50):
+    get("/fragments/p%d/Root" % i, b"name=branches", root_path="/fragments")
+    get("/p%d/Root" % i, b"name=branches")
+    get("/Root", b"name=branches", root_path="/p%d" % i)
+
+  # NB: one mount per root_path, a real server has a fixed one
+  assert len(lazy.fragment_cache) == 50
+  assert lazy.lazy_handlers.cache_info().currsize == 50
+  assert len(form_cache) == 0
@@ -0,0 +1,102 @@
+"""forms of self-referencing and deeply nested models, see `pydform.plan.compile_model`"""
+import re
+
+from typing import Dict, Optional, Union
+
+import pydantic
+import pytest
+
+import pydform
+
+from pydform import plan
+
+
+class Node(pydantic.BaseModel):
+  label: str = "n"
+  parent: Optional["Node"] = None
+
+
+class Tree(pydantic.BaseModel):
+  name: str = "t"
+  children: Dict[str, "Tree"] = {}
+
+
+class Alt(pydantic.BaseModel):
+  label: str = "n"
+  alt: Union["Alt", int] = None
+
+
+Node.update_forward_refs()
+Tree.update_forward_refs()
+Alt.update_forward_refs()
+
+
+def deep_model(depth):
+  """a chain of depth acyclic nested models"""
+  child = pydantic.create_model("Level%d" % depth, name=(str, ...))
+
+  for level in reversed(range(depth)):
+    child = pydantic.create_model("Level%d" % level, name=(str, ...), child=(child, None))
+
+  return child
+
+
+def deep_values(depth, level=0):
+  return {"name": "lvl%d" % level, **({"child": deep_values(depth, level + 1)} if level < depth else {})}
+
+
+def input_values(html):
+  return set(re.findall(r"<input[^>]*value='([^']*)'", html))
+
+
+def handlers(nodes):
+  for node in nodes:
+    yield node.handler
+    yield from handlers(node.children)
+
+
+def test_acyclic_models_are_not_cut_by_default():
+  model = deep_model(10)
+  html = pydform.asform({"model": model(**deep_values(10)), "uri": "/x"})
+
+  assert "recursive" not in html
+  assert {"lvl%d" % level for level in range(11)} <= input_values(html)
+
+
+def test_max_depth_cuts_acyclic_models(monkeypatch):
+  monkeypatch.setattr(plan, "MAX_DEPTH", 4)
+  nodes = list(handlers(plan.get_plan(deep_model(10)).nodes))
+
+  assert "recursive" in nodes
+  assert "template" in nodes
+
+
+def test_recursive_model_is_cut():
+  html = pydform.asform({"model": Node, "uri": "/x", "cache": False})
+
+  assert "parent-recursive" in html
+  assert "parent.parent" not in html
+
+
+def test_recursive_edit_form_is_prefilled():
+  node = Node(label="a", parent=Node(label="b", parent=Node(label="c")))
+  html = pydform.asform({"model": node, "uri": "/x"})
+
+  assert {"a", "b", "c"} <= input_values(html)
+  assert "name='parent.parent.label'" in html
+
+
+def test_recursive_dict_edit_form_is_prefilled():
+  tree = Tree(name="root", children={"k1": Tree(name="one", children={"k2": Tree(name="two")}), "k3": Tree(name="three")})
+  html = pydform.asform({"model": tree, "uri": "/x"})
+
+  assert {"root", "one", "two", "three", "k1", "k2", "k3"} <= input_values(html)
+
+
+def test_forward_ref_union_ids():
+  html = pydform.asform({"model": Alt, "uri": "/x", "cache": False})
+  ids = re.findall(r"id='([^']*)'", html)
+
+  assert "ForwardRef" not in html
+  assert "alt.alt_Alt-recursive" in ids
+  assert all(re.fullmatch(r"[\w.\-]+", i) for i in ids)
@@ -0,0 +1,94 @@
+"""forms registered up front and converted by `FormRegistry.warm`"""
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pydantic
+import pytest
+
+import pydform
+
+from pydform import cache
+from pydform.cache import FormCache, make_key
+from pydform.registry import FormRegistry
+
+
+class User(pydantic.BaseModel):
+  name: str = "u"
+
+
+class Address(pydantic.BaseModel):
+  street: str = "s"
+
+
+class FailingExecutor:
+  """an executor whose tasks all fail, as unpicklable models do in a process pool"""
+  def __init__(self):
+    self.submitted = 0
+
+  def submit(self, fn, *args):
+    self.submitted += 1
+    future = Future()
+    future.set_exception(RuntimeError("cannot pickle"))
+    return future
+
+
+@pytest.fixture
+def registry():
+  registry = FormRegistry()
+  registry.register(User, "/users")
+  registry.register(Address, "/addresses", {"shared_templates": True})
+  yield registry
+  cache.form_cache.clear()
+
+
+def test_warm_into_an_empty_cache(registry):
+  target = FormCache()
+  cache.form_cache.clear()
+
+  with ThreadPoolExecutor(2) as executor:
+    assert registry.warm(executor=executor, cache=target) == 2
+
+  assert len(target) == 2
+  assert len(cache.form_cache) == 0
+  assert target.get(make_key(User, "/users")) == pydform.asform({"model": User, "uri": "/users", "cache": False})
+
+
+def test_warm_into_the_process_cache(registry):
+  cache.form_cache.clear()
+
+  with ThreadPoolExecutor(2) as executor:
+    registry.warm(executor=executor)
+
+  assert make_key(Address, "/addresses", {"shared_templates": True}) in cache.form_cache
+
+
+def test_failed_tasks_are_converted_in_process(registry):
+  target = FormCache()
+  executor = FailingExecutor()
+
+  assert registry.warm(executor=executor, cache=target) == 2
+  assert executor.submitted == 2
+  assert len(target) == 2
+
+
+def test_forms_on_disk_are_not_converted_again(registry, tmp_path):
+  disk_cache = cache.use_disk_cache(str(tmp_path))
+
+  try:
+    target = FormCache()
+    registry.warm(executor=FailingExecutor(), cache=target)
+
+    executor = FailingExecutor()
+    registry.warm(executor=executor, cache=target)
+
+    assert executor.submitted == 0
+    assert len(target) == 0
+    assert disk_cache.get(User, "/users") == pydform.asform({"model": User, "uri": "/users", "cache": False})
+  finally:
+    cache.use_disk_cache(None)
+
+
+def test_unregister(registry):
+  registry.unregister(User)
+
+  assert len(registry) == 1
+  assert [model for model, _, _ in registry] == [Address]
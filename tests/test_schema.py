@@ -0,0 +1,96 @@
+"""forms from JSON schema documents, see `pydform.schema`"""
+import enum
+import re
+
+from typing import Dict, List, Optional
+
+import pydantic
+import pytest
+
+import pydform
+
+from pydform.backend import FormModel, model_fields, model_schema
+from pydform.schema import schema_model
+
+
+class Size(str, enum.Enum):
+  small = "small"
+  large = "large"
+
+
+class Address(pydantic.BaseModel):
+  street: str
+  size: Size = Size.small
+
+
+class User(pydantic.BaseModel):
+  name: str
+  age: int = 3
+  home: Address = Address(street="h")
+  work: Optional[Address] = None
+  addrs: Dict[str, Address] = {}
+  tags: List[str] = []
+
+
+class Node(pydantic.BaseModel):
+  label: str = "n"
+  parent: Optional["Node"] = None
+
+
+Node.update_forward_refs()
+
+
+def template_ids(html):
+  """html with the recursion template ids blanked, they are named after the model module"""
+  return re.sub(r"pydform-type-\w+", "pydform-type", html)
+
+
+@pytest.mark.parametrize("model", [User, Address, Node])
+def test_schema_form_matches_the_model(model):
+  html = pydform.asform({"schema": model_schema(model), "uri": "/x", "cache": False})
+
+  assert template_ids(html) == template_ids(pydform.asform({"model": model, "uri": "/x", "cache": False}))
+
+
+def test_refs_resolve_to_one_class_per_definition():
+  model = schema_model(model_schema(User))
+  fields = {f.name: f for f in model_fields(model)}
+
+  # `home` has a default, so it is an `allOf` of the reference
+  assert fields["home"].type_ is fields["work"].type_ is fields["addrs"].type_
+  assert issubclass(fields["home"].type_, FormModel)
+
+
+def test_all_of_and_defs():
+  document = {
+    "title": "Order",
+    "type": "object",
+    "properties": {
+      "size": {"allOf": [{"$ref": "#/$defs/Size"}], "default": "large"},
+      "items": {"type": "object", "additionalProperties": {"$ref": "#/$defs/Item"}},
+    },
+    "$defs": {
+      "Size": {"title": "Size", "enum": ["small", "large"]},
+      "Item": {"title": "Item", "type": "object", "properties": {"count": {"type": "integer"}}},
+    },
+  }
+  html = pydform.asform({"schema": document, "uri": "/x"})
+
+  assert "<option value='large' selected>" in html
+  assert "name='items._items-key.count'" in html
+
+
+def test_documents_are_looked_up_by_identity():
+  document = model_schema(Address)
+  model = schema_model(document)
+
+  assert schema_model(document) is model
+  assert schema_model(dict(document)) is model
+
+
+def test_form_fields_is_abstract():
+  class Incomplete(FormModel):
+    pass
+
+  with pytest.raises(TypeError):
+    Incomplete()
@@ -0,0 +1,118 @@
+"""per-handler counters and timings, see `pydform.stats`"""
+import time
+
+from typing import Dict
+
+import pydantic
+
+import pydform
+
+from pydform import stats
+
+
+class Address(pydantic.BaseModel):
+  street: str = "s"
+  number: int = 1
+
+
+class User(pydantic.BaseModel):
+  name: str = "u"
+  home: Address = None
+  addrs: Dict[str, Address] = {}
+
+
+def render(model):
+  return pydform.asform({"model": model, "uri": "/x", "cache": False})
+
+
+def test_disabled_by_default():
+  assert stats.active is None
+
+
+def test_counts_compile_and_render():
+  model = pydantic.create_model("Counted", __base__=User)
+
+  with stats.instrumented() as recorded:
+    render(model)
+
+  result = recorded.asdict()
+
+  assert result["compile"]["str"]["calls"] == 3
+  assert result["compile"]["basemodel"]["calls"] == 1
+  assert result["compile"]["dict"]["calls"] == 1
+  assert result["render"]["dict"]["calls"] == 1
+  assert result["render"]["int"]["calls"] == 2
+
+  for phase in ("compile", "render"):
+    for metrics in result[phase].values():
+      assert 0 <= metrics["self"] <= metrics["cumulative"]
+
+  assert stats.active is None
+
+
+def clock(monkeypatch, *times):
+  """make time.perf_counter return times, in order"""
+  monkeypatch.setattr(time, "perf_counter", iter(times).__next__)
+
+
+def test_self_time_excludes_nested_fields(monkeypatch):
+  recorded = stats.HandlerStats()
+  clock(monkeypatch, 0.0, 1.0, 3.0, 4.0)
+
+  recorded.begin()
+  recorded.begin()
+  recorded.end("render", "str", "outer.inner")
+  recorded.end("render", "basemodel", "outer")
+
+  result = recorded.asdict()["render"]
+
+  assert result["str"] == {"calls": 1, "cumulative": 2.0, "self": 2.0}
+  assert result["basemodel"] == {"calls": 1, "cumulative": 4.0, "self": 2.0}
+
+
+def test_slowest_fields(monkeypatch):
+  recorded = stats.HandlerStats(slowest=2)
+  clock(monkeypatch, 0.0, 3.0, 0.0, 1.0, 0.0, 2.0)
+
+  for i in range(3):
+    recorded.begin()
+    recorded.end("compile", "str", "f%d" % i)
+
+  assert recorded.slowest() == [(3.0, "compile", "f0"), (2.0, "compile", "f2")]
+  assert [entry["field"] for entry in recorded.asdict()["slowest"]] == ["f0", "f2"]
+
+
+def test_reset():
+  with stats.instrumented() as recorded:
+    render(User)
+
+  recorded.reset()
+
+  assert recorded.asdict() == {"compile": {}, "render": {}, "slowest": []}
+
+
+def test_enable_and_disable():
+  recorded = stats.enable()
+
+  try:
+    render(User)
+    assert stats.active is recorded
+  finally:
+    assert stats.disable() is recorded
+
+  assert recorded.asdict()["render"]
+  assert stats.active is None
+
+
+def test_instrumented_restores_the_active_stats():
+  outer = stats.enable()
+
+  try:
+    with stats.instrumented() as inner:
+      render(User)
+
+    assert stats.active is outer
+    assert inner.asdict()["render"]
+    assert not outer.asdict()["render"]
+  finally:
+    stats.disable()
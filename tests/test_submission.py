@@ -0,0 +1,158 @@
+"""decoding submitted forms, see `pydform.submission` and `encode_form_data` in submission.js"""
+import json
+import os
+import re
+import shutil
+import subprocess
+
+from typing import Dict, List
+from urllib.parse import urlencode
+
+import pydantic
+import pytest
+
+import pydform
+
+from pydform.submission import decode_form, decode_model
+
+
+JS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pydform", "js")
+
+
+class Sub(pydantic.BaseModel):
+  n: int = 0
+
+
+class Record(pydantic.BaseModel):
+  name: str = ""
+  tags: List[str] = []
+  scores: Dict[str, int] = {}
+  subs: Dict[str, Sub] = {}
+
+
+class Inner(pydantic.BaseModel):
+  scores: Dict[str, int] = {}
+  subs: Dict[str, Sub] = {}
+
+
+class Outer(pydantic.BaseModel):
+  inner: Inner = None
+
+
+class Branch(pydantic.BaseModel):
+  label: str = "b"
+  leaves: Dict[str, Sub] = {}
+  counts: Dict[str, int] = {}
+
+
+class Tree(pydantic.BaseModel):
+  kids: Dict[str, Branch] = {}
+
+
+RECORD = Record(name="a", tags=["x", "y"], scores={"k": 1, "j": 2}, subs={"s": Sub(n=3), "t": Sub(n=4)})
+
+
+def submitted(html):
+  """the (name, value) pairs a browser submits for html, dict entry templates are not submitted"""
+  html = re.sub(r"<template.*?</template>", "", html, flags=re.S)
+  return [
+    (name, value)
+    for name, value in re.findall(r"<input[^>]*name='([^']*)'(?:[^>]*value='([^']*)')?", html)
+  ]
+
+
+def multipart(items, boundary="pydform-boundary"):
+  parts = [
+    '--%s\r\ncontent-disposition: form-data; name="%s"\r\n\r\n%s\r\n' % (boundary, name, value)
+    for name, value in items
+  ]
+  return ("".join(parts) + "--%s--\r\n" % boundary).encode(), "multipart/form-data; boundary=%s" % boundary
+
+
+def test_edit_form_round_trip_urlencoded():
+  items = submitted(pydform.asform({"model": RECORD, "uri": "/x"}))
+
+  assert decode_model(Record, urlencode(items).encode(), "application/x-www-form-urlencoded") == RECORD
+
+
+def test_edit_form_round_trip_multipart():
+  items = submitted(pydform.asform({"model": RECORD, "uri": "/x"}))
+
+  assert decode_model(Record, *multipart(items)) == RECORD
+
+
+@pytest.mark.parametrize("options", [{}, {"shared_templates": True}])
+@pytest.mark.parametrize("instance", [
+  Outer(inner=Inner(scores={"a": 1, "b": 2}, subs={"s": Sub(n=3)})),
+  Tree(kids={"a": Branch(label="x", leaves={"l": Sub(n=5), "m": Sub(n=6)}, counts={"c": 7}), "b": Branch()}),
+])
+def test_nested_dicts_round_trip(instance, options):
+  items = submitted(pydform.asform({"model": instance, "uri": "/x", "options": options}))
+
+  assert decode_model(type(instance), urlencode(items).encode(), "application/x-www-form-urlencoded") == instance
+
+
+def test_empty_form_round_trip():
+  items = submitted(pydform.asform({"model": Record, "uri": "/x"}))
+
+  assert decode_form(items) == {}
+
+
+def test_added_entries():
+  items = [
+    ("scores._scores-key", "new"), ("scores._scores-value", "5"),
+    ("subs._subs-key", "u"), ("subs._subs-key.n", "6"),
+  ]
+
+  assert decode_form(items) == {"scores": {"new": "5"}, "subs": {"u": {"n": "6"}}}
+
+
+@pytest.mark.parametrize("items, expected", [
+  ([("name", "x"), ("name", "")], {}),
+  ([("name", ""), ("name", "y")], {"name": "y"}),
+  ([("name", "x"), ("name", "y")], {"name": "y"}),
+  ([("scores._scores-0-key", "k"), ("scores._scores-0-key", ""), ("scores._scores-0-value", "1")],
+   {"scores": {"_scores-0-value": "1"}}),
+  ([("tags._tags-list", "a,b"), ("tags._tags-list", "")], {}),
+])
+def test_last_value_wins_before_empty_values_are_dropped(items, expected):
+  assert decode_form(items) == expected
+
+
+CASES = [
+  [("name", "x"), ("name", "")],
+  [("name", ""), ("name", "y"), ("_uri", "/x")],
+  [("scores._scores-0-key", "k"), ("scores._scores-0-key", ""), ("scores._scores-0-value", "1")],
+  [("scores._scores-0-key", ""), ("scores._scores-0-key", "k"), ("scores._scores-0-value", "1")],
+  [("tags._tags-list", "a,b"), ("tags._tags-list", ""), ("tags._tags-list", "c")],
+  submitted(pydform.asform({"model": RECORD, "uri": "/x"})),
+]
+
+NODE_SCRIPT = """
+const fs = require("fs");
+const path = require("path");
+const vm = require("vm");
+
+const context = vm.createContext({console: {log() {}}});
+
+for (const file of ["common.js", "submission.js"]) {
+  const filename = path.join(process.argv[1], file);
+  vm.runInContext(fs.readFileSync(filename, "utf8"), context, {filename});
+}
+
+const cases = JSON.parse(fs.readFileSync(0, "utf8"));
+const submissions = cases.map((entries) => context.encode_form_data(entries));
+
+// NB: as submit_form does
+submissions.forEach((submission) => delete submission["_uri"]);
+process.stdout.write(JSON.stringify(submissions));
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_decode_form_matches_encode_form_data():
+  process = subprocess.run(
+    ["node", "-e", NODE_SCRIPT, JS_DIR], input=json.dumps(CASES), capture_output=True, text=True, check=True
+  )
+
+  assert json.loads(process.stdout) == [decode_form(items) for items in CASES]